@@ -0,0 +1,89 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Бенчмарк пакетной генерации набора компонентов.
+
+Сравнивает N последовательных прогонов воркфлоу (как N вызовов
+/api/ai/generate) с BatchGenerator: анализы всех запросов идут первым
+этапом, совпадающие объединяются, затем дизайн, код и ревью - с
+ограниченным параллелизмом. Поддельный Ollama держит в памяти одну модель
+и тратит load_delay на каждую смену.
+
+Запуск из apps/backend:
+    python -m benchmarks.bench_batch --load-delay 0.2 --concurrency 2
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from src.agents.batch import create_batch_generator
+from src.agents.workflow import create_workflow
+from src.services.ollama_service import OllamaService, OllamaConfig
+from benchmarks.fake_ollama import FakeOllama
+
+KIT = [
+    "Кнопка", "Бейдж", "Карточка товара", "Модальное окно", "Поле ввода",
+    "кнопка", "Тултип", "Бейдж.", "Переключатель", "Карточка  товара",
+]
+
+
+async def measure(batch: bool, load_delay: float, latency: float, concurrency: int) -> dict:
+    fake = FakeOllama(load_delay=load_delay, latency=latency)
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    workflow = create_workflow(service)
+    started = time.perf_counter()
+    pipelines = len(KIT)
+    try:
+        if batch:
+            async for event in create_batch_generator(workflow, concurrency=concurrency).stream(KIT):
+                if event["event"] == "batch_complete":
+                    pipelines = event["pipelines"]
+        else:
+            for prompt in KIT:
+                await workflow.run(prompt)
+    finally:
+        await service.close()
+    return {
+        "seconds": time.perf_counter() - started,
+        "model_loads": fake.model_loads,
+        "llm_calls": sum(fake.stage_calls.values()),
+        "pipelines": pipelines,
+    }
+
+
+async def main(load_delay: float, latency: float, concurrency: int) -> None:
+    sequential = await measure(False, load_delay, latency, concurrency)
+    batched = await measure(True, load_delay, latency, concurrency)
+
+    print(f"Компонентов: {len(KIT)}, загрузка модели: {load_delay * 1000:.0f} мс, параллельно: {concurrency}")
+    print(f"{'режим':<16}{'прогонов':>10}{'вызовов LLM':>13}{'загрузок':>10}{'время, с':>10}")
+    for label, row in (("последовательно", sequential), ("пакет", batched)):
+        print(
+            f"{label:<16}{row['pipelines']:>10}{row['llm_calls']:>13}"
+            f"{row['model_loads']:>10}{row['seconds']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--load-delay", type=float, default=0.2)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--concurrency", type=int, default=2)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(args.load_delay, args.latency, args.concurrency))
@@ -0,0 +1,90 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Бенчмарк выбора кода: последовательные раунды против best-of-N.
+
+Поддельный Ollama с num_parallel слотами: в режиме serial первый код не
+проходит ревью (нет type="button"), правка и повторное ревью идут строго
+друг за другом. В режиме best_of_n кандидаты с разными seed генерируются
+одновременно: один из них сразу правильный, один не проходит статическую
+проверку. Сравниваются время, вызовы и токены (промпт + ответ) - то есть
+время при сопоставимом бюджете токенов.
+
+Запуск из apps/backend:
+    python -m benchmarks.bench_best_of_n --runs 5 --slots 3
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from src.agents.workflow import create_workflow
+from src.services.ollama_service import OllamaService, OllamaConfig
+from benchmarks.fake_ollama import FakeOllama
+
+
+async def measure(mode: str, candidates: int, args: argparse.Namespace) -> dict:
+    fake = FakeOllama(
+        candidate_variants=True,
+        review_score=5,
+        token_latency=args.token_latency,
+        prompt_latency=args.prompt_latency,
+        num_parallel=args.slots,
+        code_lines=args.code_lines,
+    )
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    workflow = create_workflow(service, code_selection=mode)
+    if workflow.candidate_selector is not None:
+        workflow.candidate_selector.candidates = candidates
+
+    seconds, tokens, scores = 0.0, 0, []
+    for i in range(args.runs):
+        started = time.perf_counter()
+        result = await workflow.run(f"Кнопка {i}")
+        seconds += time.perf_counter() - started
+        tokens += result["usage"]["prompt_eval_count"] + result["usage"]["eval_count"]
+        scores.append((result["review"] or {}).get("quality_score"))
+    await service.close()
+    return {
+        "seconds": seconds / args.runs,
+        "calls": sum(v for k, v in fake.stage_calls.items() if k in ("generation", "patch", "review")) / args.runs,
+        "tokens": tokens / args.runs,
+        "score": sum(s or 0 for s in scores) / len(scores),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    rows = [("serial", await measure("serial", 0, args))]
+    for n in (2, 3):
+        rows.append((f"best-of-{n}", await measure("best_of_n", n, args)))
+
+    print(f"Прогонов: {args.runs}, слотов Ollama: {args.slots}")
+    print(f"{'режим':<12}{'время, с':>10}{'вызовов кода':>14}{'токенов':>10}{'оценка':>8}")
+    for label, row in rows:
+        print(f"{label:<12}{row['seconds']:>10.2f}{row['calls']:>14.1f}{row['tokens']:>10.0f}{row['score']:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--slots", type=int, default=3)
+    parser.add_argument("--token-latency", type=float, default=0.002)
+    parser.add_argument("--prompt-latency", type=float, default=0.0005)
+    parser.add_argument("--code-lines", type=int, default=40)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(args))
@@ -0,0 +1,92 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Бенчмарк библиотеки принятых компонентов (RAG для дизайнера и генератора).
+
+Поддельный Ollama первым вариантом кода не проходит ревью (оценка ниже 7),
+а с примерами принятых компонентов в промпте пишет код, который ревью
+принимает. Поддельный сервер умеет генерировать только кнопку, поэтому
+поток состоит из запросов разных кнопок в разных формулировках.
+Сравнивается среднее число раундов генерации на запрос без библиотеки и
+с ней: библиотека пополняется по ходу потока.
+
+Запуск из apps/backend:
+    python -m benchmarks.bench_component_library --requests 40
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+from typing import List, Optional
+
+from src.agents.workflow import create_workflow
+from src.services.component_library import ComponentLibrary
+from src.services.ollama_service import OllamaService, OllamaConfig
+from benchmarks.fake_ollama import FakeOllama
+
+REQUESTS = [
+    "синяя кнопка с иконкой",
+    "кнопка с иконкой",
+    "кнопка отправки формы",
+    "кнопка отправки с индикатором загрузки",
+    "большая синяя кнопка",
+    "маленькая кнопка с иконкой удаления",
+    "кнопка подтверждения формы",
+    "кнопка-иконка для закрытия окна",
+]
+
+
+def traffic(requests: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [rng.choice(REQUESTS) for _ in range(requests)]
+
+
+async def measure(prompts: List[str], library: Optional[ComponentLibrary]) -> dict:
+    fake = FakeOllama(review_score=5, example_fix=True)
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    workflow = create_workflow(service, component_library=library)
+    iterations = 0
+    try:
+        for prompt in prompts:
+            iterations += (await workflow.run(prompt))["iteration_count"]
+    finally:
+        await service.close()
+    return {
+        "iterations": iterations / len(prompts),
+        "calls": sum(fake.stage_calls.values()) / len(prompts),
+        "items": len(library.index) if library else 0,
+    }
+
+
+async def main(requests: int, min_similarity: float) -> None:
+    prompts = traffic(requests)
+    before = await measure(prompts, None)
+    after = await measure(prompts, ComponentLibrary(min_similarity=min_similarity))
+
+    print(f"Запросов: {requests}, минимальное сходство примера: {min_similarity}")
+    print(f"{'режим':<18}{'раундов/запрос':>16}{'вызовов LLM/запрос':>20}{'в библиотеке':>14}")
+    for label, row in (("без библиотеки", before), ("с библиотекой", after)):
+        print(f"{label:<18}{row['iterations']:>16.2f}{row['calls']:>20.2f}{row['items']:>14}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--min-similarity", type=float, default=0.5)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(args.requests, args.min_similarity))
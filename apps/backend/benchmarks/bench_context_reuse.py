@@ -0,0 +1,76 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Бенчмарк переиспользования KV-кэша между этапами и раундами улучшения.
+
+Сравнивает две раскладки запроса: общий контекст прогона (запрос, требования,
+спецификация) внутри сообщения пользователя после системного промпта агента
+и он же первым системным сообщением. Поддельный Ollama, как раннер Ollama,
+не вычисляет заново общий префикс с предыдущим промптом той же модели и
+возвращает prompt_eval_count / prompt_eval_duration.
+
+Запуск из apps/backend:
+    python -m benchmarks.bench_context_reuse --runs 10 --prompt-latency 0.0005
+"""
+
+import argparse
+import asyncio
+import logging
+
+from src.agents.workflow import create_workflow
+from src.services.ollama_service import OllamaService, OllamaConfig
+from benchmarks.fake_ollama import FakeOllama
+
+
+async def measure(context_prefix: bool, runs: int, prompt_latency: float, code_lines: int) -> dict:
+    fake = FakeOllama(prompt_latency=prompt_latency, review_score=5, code_lines=code_lines)
+    config = OllamaConfig(cache_enabled=False, context_prefix=context_prefix)
+    service = OllamaService(config, transport=fake.transport())
+    workflow = create_workflow(service)
+    totals = {"calls": 0, "prompt_eval_count": 0, "prompt_eval_duration_ms": 0.0}
+    try:
+        for i in range(runs):
+            usage = (await workflow.run(f"Создай кнопку №{i}"))["usage"]
+            for key in totals:
+                totals[key] += usage[key]
+    finally:
+        await service.close()
+    return {key: value / runs for key, value in totals.items()}
+
+
+async def main(runs: int, prompt_latency: float, code_lines: int) -> None:
+    before = await measure(False, runs, prompt_latency, code_lines)
+    after = await measure(True, runs, prompt_latency, code_lines)
+
+    print(f"Запусков: {runs}, чтение промпта: {prompt_latency * 1000:.2f} мс/токен")
+    print(f"{'раскладка':<26}{'вызовов':>9}{'prompt_eval_count':>19}{'prompt_eval, мс':>17}")
+    for label, row in (("контекст в user-сообщении", before), ("контекст первым", after)):
+        print(
+            f"{label:<26}{row['calls']:>9.0f}{row['prompt_eval_count']:>19.0f}"
+            f"{row['prompt_eval_duration_ms']:>17.1f}"
+        )
+    saved = 1 - after["prompt_eval_count"] / max(before["prompt_eval_count"], 1)
+    print(f"Токенов промпта вычислено меньше на {saved:.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--prompt-latency", type=float, default=0.0005)
+    parser.add_argument("--code-lines", type=int, default=80)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(args.runs, args.prompt_latency, args.code_lines))
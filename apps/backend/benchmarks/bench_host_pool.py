@@ -0,0 +1,108 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Бенчмарк пула узлов Ollama.
+
+Поднимает несколько поддельных серверов Ollama на настоящих TCP-портах;
+каждый держит в памяти одну модель, тратит load_delay на её смену и
+обрабатывает один вызов за раз. Одни и те же прогоны воркфлоу идут на один
+узел, на три узла по очереди (без учёта моделей) и на три узла через
+HostPool, который выбирает узел с уже загруженной моделью.
+
+Запуск из apps/backend:
+    python -m benchmarks.bench_host_pool --runs 18 --concurrency 6
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+
+from src.agents.workflow import create_workflow
+from src.services.host_pool import HostPool
+from src.services.ollama_service import OllamaService, OllamaConfig
+from benchmarks.fake_ollama import FakeOllama
+from benchmarks.load_test import fake_ollama_server
+
+PROMPTS = ["Кнопка", "Бейдж", "Карточка товара", "Модальное окно", "Поле ввода", "Тултип"]
+
+
+class RoundRobinPool(HostPool):
+    """Узлы по очереди, без учёта загруженных моделей - для сравнения."""
+
+    _next = -1
+
+    def select(self, model: str):
+        self._next = (self._next + 1) % len(self.hosts)
+        return self.hosts[self._next]
+
+
+async def measure(nodes: int, affinity: bool, args: argparse.Namespace) -> dict:
+    fakes = [FakeOllama(load_delay=args.load_delay, latency=args.latency, num_parallel=1) for _ in range(nodes)]
+    async with AsyncExitStack() as stack:
+        urls = [await stack.enter_async_context(fake_ollama_server(fake)) for fake in fakes]
+        service = OllamaService(OllamaConfig(
+            base_urls=urls, cache_enabled=False, health_interval=0, cold_penalty=args.cold_penalty
+        ))
+        if not affinity:
+            service.pool = RoundRobinPool(service.pool.hosts)
+        await service.start()
+        workflow = create_workflow(service)
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def one(i: int) -> None:
+            async with semaphore:
+                await workflow.run(PROMPTS[i % len(PROMPTS)])
+
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(one(i) for i in range(args.runs)))
+        finally:
+            await service.close()
+        seconds = time.perf_counter() - started
+    return {
+        "seconds": seconds,
+        "model_loads": sum(fake.model_loads for fake in fakes),
+        "calls": [sum(fake.stage_calls.values()) for fake in fakes],
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    rows = [
+        ("1 узел", await measure(1, True, args)),
+        ("3 узла, по очереди", await measure(3, False, args)),
+        ("3 узла, по модели", await measure(3, True, args)),
+    ]
+    print(
+        f"Прогонов: {args.runs}, параллельно: {args.concurrency}, "
+        f"загрузка модели: {args.load_delay * 1000:.0f} мс, cold_penalty: {args.cold_penalty}"
+    )
+    print(f"{'режим':<22}{'загрузок':>10}{'время, с':>10}  вызовы по узлам")
+    for label, row in rows:
+        print(f"{label:<22}{row['model_loads']:>10}{row['seconds']:>10.2f}  {row['calls']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=18)
+    parser.add_argument("--concurrency", type=int, default=6)
+    parser.add_argument("--load-delay", type=float, default=1.0)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--cold-penalty", type=int, default=2)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(args))
@@ -0,0 +1,96 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Бенчмарк обрыва JSON-вызовов после закрытия объекта.
+
+Поддельный Ollama после JSON-ответа генерирует json_tail переводов строк
+(как модель с format, которая не выдаёт конец генерации до num_predict).
+Прогоны идут через workflow.stream(), как SSE-эндпоинт; сравниваются
+отданные моделью токены и время по этапам, а также момент первого поля
+анализа (событие field) относительно конца этапа.
+
+Запуск из apps/backend:
+    python -m benchmarks.bench_json_early_stop --runs 5 --json-tail 300 --token-latency 0.002
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from collections import defaultdict
+
+from src.agents.workflow import create_workflow
+from src.services.ollama_service import OllamaService, OllamaConfig
+from benchmarks.fake_ollama import FakeOllama
+
+
+async def measure(early_stop: bool, runs: int, json_tail: int, token_latency: float) -> dict:
+    fake = FakeOllama(json_tail=json_tail, token_latency=token_latency, review_score=9)
+    config = OllamaConfig(cache_enabled=False, json_early_stop=early_stop)
+    service = OllamaService(config, transport=fake.transport())
+    workflow = create_workflow(service)
+    seconds = defaultdict(float)
+    first_field, analysis_end = [], []
+    try:
+        for i in range(runs):
+            started = time.perf_counter()
+            field_at = None
+            async for event in workflow.stream(f"Создай кнопку №{i}"):
+                if event["event"] == "field" and field_at is None:
+                    field_at = time.perf_counter() - started
+                elif event["event"] == "stage_complete" and event["stage"] == "analyze_requirements":
+                    analysis_end.append(time.perf_counter() - started)
+                    if field_at is not None:
+                        first_field.append(field_at)
+                elif event["event"] == "result":
+                    for stage, ms in event["data"]["timings"]["by_stage"].items():
+                        seconds[stage] += ms / 1000
+    finally:
+        await service.close()
+    return {
+        "tokens": {stage: count / runs for stage, count in fake.stage_streamed.items()},
+        "seconds": {stage: value / runs for stage, value in seconds.items()},
+        "first_field": sum(first_field) / len(first_field) if first_field else None,
+        "analysis_end": sum(analysis_end) / len(analysis_end),
+    }
+
+
+async def main(runs: int, json_tail: int, token_latency: float) -> None:
+    before = await measure(False, runs, json_tail, token_latency)
+    after = await measure(True, runs, json_tail, token_latency)
+
+    print(f"Запусков: {runs}, хвост после JSON: {json_tail} токенов, {token_latency * 1000:.1f} мс/токен")
+    print(f"{'этап (токены)':<22}{'до':>8}{'после':>8}")
+    for stage in before["tokens"]:
+        print(f"{stage:<22}{before['tokens'][stage]:>8.0f}{after['tokens'].get(stage, 0):>8.0f}")
+    print(f"{'этап (секунды)':<22}{'до':>8}{'после':>8}")
+    for stage in before["seconds"]:
+        print(f"{stage:<22}{before['seconds'][stage]:>8.2f}{after['seconds'].get(stage, 0):>8.2f}")
+    total_before = sum(before["seconds"].values())
+    total_after = sum(after["seconds"].values())
+    print(f"Прогон: {total_before:.2f} -> {total_after:.2f} с ({1 - total_after / total_before:.0%} быстрее)")
+    print(f"Конец анализа: {before['analysis_end']:.2f} -> {after['analysis_end']:.2f} с, "
+          f"первое поле анализа (событие field): {after['first_field']:.2f} с")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json-tail", type=int, default=300)
+    parser.add_argument("--token-latency", type=float, default=0.002)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(args.runs, args.json_tail, args.token_latency))
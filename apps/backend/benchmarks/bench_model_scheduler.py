@@ -0,0 +1,91 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Бенчмарк планировщика моделей: число загрузок моделей и общее время
+для нескольких одновременных воркфлоу с планировщиком и без него.
+
+Поддельный Ollama держит в памяти одну модель и тратит load_delay на загрузку,
+как 8 ГБ машина с qwen2.5:3b и qwen2.5-coder:3b.
+
+Запуск из apps/backend:
+    python -m benchmarks.bench_model_scheduler --workflows 8 --load-delay 0.5
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from src.agents.workflow import create_workflow
+from src.services.ollama_service import OllamaService, OllamaConfig
+from benchmarks.fake_ollama import FakeOllama
+
+
+async def run_batch(
+    scheduler: bool,
+    workflows: int,
+    load_delay: float,
+    latency: float,
+    arrival: float,
+    parallel: int
+) -> dict:
+    fake = FakeOllama(latency=latency, load_delay=load_delay, num_parallel=parallel)
+    config = OllamaConfig(
+        cache_enabled=False,
+        keep_alive="10m",
+        scheduler_enabled=scheduler,
+        scheduler_max_parallel=parallel,
+    )
+    service = OllamaService(config, transport=fake.transport())
+    workflow = create_workflow(service)
+
+    async def user(i: int):
+        # Пользователи приходят не одновременно, а с интервалом arrival
+        await asyncio.sleep(i * arrival)
+        await workflow.run(f"Создай кнопку №{i}")
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(user(i) for i in range(workflows)))
+    finally:
+        await service.close()
+    return {
+        "wall_time": time.perf_counter() - start,
+        "model_loads": fake.model_loads,
+        "requests": fake.requests,
+    }
+
+
+async def main(workflows: int, load_delay: float, latency: float, arrival: float, parallel: int) -> None:
+    without = await run_batch(False, workflows, load_delay, latency, arrival, parallel)
+    with_scheduler = await run_batch(True, workflows, load_delay, latency, arrival, parallel)
+
+    print(f"Воркфлоу: {workflows}, загрузка модели: {load_delay} с, вызов: {latency} с")
+    print(f"{'режим':<16}{'загрузок':>10}{'время, с':>12}")
+    print(f"{'без планировщика':<16}{without['model_loads']:>10}{without['wall_time']:>12.2f}")
+    print(f"{'с планировщиком':<16}{with_scheduler['model_loads']:>10}{with_scheduler['wall_time']:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workflows", type=int, default=8)
+    parser.add_argument("--load-delay", type=float, default=0.5)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--arrival", type=float, default=0.1, help="интервал между пользователями, с")
+    parser.add_argument("--parallel", type=int, default=2, help="OLLAMA_NUM_PARALLEL")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    asyncio.run(main(args.workflows, args.load_delay, args.latency, args.arrival, args.parallel))
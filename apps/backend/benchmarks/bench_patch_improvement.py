@@ -0,0 +1,78 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Бенчмарк раундов улучшения кода: сколько токенов генерирует модель на этапах
+генерации и правки при полной перегенерации и при правках по замечаниям ревью.
+
+Поддельный Ollama ставит ревью оценку ниже порога, поэтому каждый прогон
+проходит все раунды улучшения; в режиме правок отвечает блоком SEARCH/REPLACE.
+
+Запуск из apps/backend:
+    python -m benchmarks.bench_patch_improvement --runs 20 --code-lines 150
+"""
+
+import argparse
+import asyncio
+import logging
+
+from src.agents.workflow import create_workflow
+from src.services.ollama_service import OllamaService, OllamaConfig
+from benchmarks.fake_ollama import FakeOllama
+
+
+async def measure(patch_mode: bool, runs: int, code_lines: int) -> dict:
+    fake = FakeOllama(review_score=5, code_lines=code_lines)
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    workflow = create_workflow(service)
+    workflow.code_generator.patch_mode = patch_mode
+    try:
+        for i in range(runs):
+            await workflow.run(f"Создай кнопку №{i}")
+    finally:
+        await service.close()
+
+    total_tokens = fake.stage_tokens.get("generation", 0) + fake.stage_tokens.get("patch", 0)
+    # Первая генерация одинакова в обоих режимах - вычитаем её
+    improvement_tokens = total_tokens - runs * len(fake.code.split())
+    improvement_rounds = fake.stage_calls.get("generation", 0) + fake.stage_calls.get("patch", 0) - runs
+    return {
+        "tokens_per_run": total_tokens / runs,
+        "improvement_tokens": improvement_tokens / max(improvement_rounds, 1),
+        "rounds": improvement_rounds,
+        **workflow.code_generator.stats,
+    }
+
+
+async def main(runs: int, code_lines: int) -> None:
+    before = await measure(False, runs, code_lines)
+    after = await measure(True, runs, code_lines)
+
+    print(f"Запусков: {runs}, строк в компоненте: {len(FakeOllama(code_lines=code_lines).code.splitlines())}")
+    print(f"{'режим':<18}{'раундов':>9}{'токенов/прогон':>16}{'токенов/раунд':>15}{'правок':>8}{'откатов':>9}")
+    for label, row in (("перегенерация", before), ("правки", after)):
+        print(
+            f"{label:<18}{row['rounds']:>9}{row['tokens_per_run']:>16.1f}"
+            f"{row['improvement_tokens']:>15.1f}{row['patched']:>8}{row['patch_failures']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--code-lines", type=int, default=150)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(args.runs, args.code_lines))
@@ -0,0 +1,86 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Бенчмарк анализатора требований: один структурированный вызов против двух
+(текст, затем «Создай JSON из анализа») на фиксированном наборе запросов.
+
+Задержки поддельного Ollama складываются из накладных на вызов и времени,
+пропорционального числу слов в промпте и ответе, поэтому второй вызов платит
+и за повторно переданный текст анализа.
+
+Запуск из apps/backend:
+    python -m benchmarks.bench_requirements_single_call
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+from src.agents.requirements_analyzer import create_requirements_analyzer
+from src.agents.schemas import AgentState
+from src.services.ollama_service import OllamaService, OllamaConfig
+from benchmarks.fake_ollama import FakeOllama
+
+PROMPT_CORPUS = [
+    "Создай кнопку с иконкой",
+    "Нужна карточка товара с картинкой, ценой и кнопкой «В корзину»",
+    "Модальное окно подтверждения удаления",
+    "Бейдж со статусом заказа: новый, в работе, доставлен",
+    "Поле ввода телефона с маской и валидацией",
+    "Выпадающее меню профиля пользователя",
+    "Пагинация для таблицы на 10 страниц",
+    "Тост-уведомление об успешном сохранении",
+]
+
+
+async def measure(single_call: bool, fake: FakeOllama) -> list:
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    analyzer = create_requirements_analyzer(service, single_call=single_call)
+    durations = []
+    try:
+        for prompt in PROMPT_CORPUS:
+            start = time.perf_counter()
+            state = await analyzer.process(AgentState(user_input=prompt))
+            durations.append(time.perf_counter() - start)
+            assert state.requirements and state.requirements_analysis, state.errors
+    finally:
+        await service.close()
+    return durations
+
+
+async def main(latency: float, token_latency: float, prompt_latency: float) -> None:
+    rows = []
+    for label, single_call in (("два вызова", False), ("один вызов", True)):
+        fake = FakeOllama(latency=latency, token_latency=token_latency, prompt_latency=prompt_latency)
+        durations = await measure(single_call, fake)
+        rows.append((label, fake.requests, statistics.mean(durations), max(durations)))
+
+    print(f"Запросов в корпусе: {len(PROMPT_CORPUS)}")
+    print(f"{'режим':<12}{'вызовов LLM':>12}{'среднее, с':>12}{'макс, с':>10}")
+    for label, calls, mean, worst in rows:
+        print(f"{label:<12}{calls:>12}{mean:>12.3f}{worst:>10.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.1, help="фиксированные накладные на вызов, с")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="с на слово ответа")
+    parser.add_argument("--prompt-latency", type=float, default=0.001, help="с на слово промпта")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    asyncio.run(main(args.latency, args.token_latency, args.prompt_latency))
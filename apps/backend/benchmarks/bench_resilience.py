@@ -0,0 +1,147 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Бенчмарк устойчивости вызовов Ollama.
+
+Два поддельных узла: часть вызовов получает 503, часть зависает на
+slow_delay (хвост задержки). Сравниваются вызовы без защиты, с повторами и
+с повторами и хеджированием: доля успешных, p50/p95/p99. Отдельно - лежащий
+узел, каждый вызов к которому ждёт таймаута соединения: сколько времени
+уходит на серию вызовов без автомата защиты и с ним.
+
+Запуск из apps/backend:
+    python -m benchmarks.bench_resilience --calls 200
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+
+import httpx
+
+from src.services.ollama_service import OllamaService, OllamaConfig, RetryPolicy, TaskType
+from benchmarks.fake_ollama import FakeOllama
+from benchmarks.load_test import percentile
+
+NODES = ["http://node-a:11434", "http://node-b:11434"]
+
+
+def flaky_transport(error_rate: float, slow_rate: float, slow_delay: float, latency: float, seed: int):
+    """Узлы, отвечающие 503 с вероятностью error_rate и зависающие с вероятностью slow_rate."""
+    rng = random.Random(seed)
+    fakes = {url.split("//")[1].split(":")[0]: FakeOllama(latency=latency) for url in NODES}
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/chat":
+            roll = rng.random()
+            if roll < error_rate:
+                return httpx.Response(503, json={"error": "server busy"})
+            if roll < error_rate + slow_rate:
+                await asyncio.sleep(slow_delay)
+        return await fakes[request.url.host].handle(request)
+
+    return httpx.MockTransport(handle)
+
+
+async def measure(config: OllamaConfig, args: argparse.Namespace) -> dict:
+    transport = flaky_transport(args.error_rate, args.slow_rate, args.slow_delay, args.latency, seed=1)
+    service = OllamaService(config, transport=transport)
+    latencies, failures = [], 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(i: int) -> None:
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await service.generate(f"Ревью {i}", task_type=TaskType.CODE_REVIEW)
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                failures += 1
+
+    await asyncio.gather(*(one(i) for i in range(args.calls)))
+    await service.close()
+    return {
+        "success": 1 - failures / args.calls,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+async def measure_outage(breaker: bool, calls: int, connect_timeout: float) -> float:
+    """Время на calls последовательных вызовов к лежащему узлу."""
+    async def handle(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(connect_timeout)
+        raise httpx.ConnectTimeout("timed out", request=request)
+
+    config = OllamaConfig(
+        cache_enabled=False,
+        retry=RetryPolicy(attempts=1),
+        retry_policies={},
+        max_failures=3 if breaker else 10 ** 9,
+        eject_seconds=60,
+    )
+    service = OllamaService(config, transport=httpx.MockTransport(handle))
+    started = time.perf_counter()
+    for i in range(calls):
+        try:
+            await service.generate(f"Вызов {i}")
+        except Exception:
+            pass
+    await service.close()
+    return time.perf_counter() - started
+
+
+async def main(args: argparse.Namespace) -> None:
+    base = dict(base_urls=NODES, cache_enabled=False, hedge_min_samples=20, hedge_min_delay=0.0)
+    rows = [
+        ("без защиты", OllamaConfig(**base, retry=RetryPolicy(attempts=1))),
+        ("повторы", OllamaConfig(**base, retry=RetryPolicy(attempts=3, base_delay=0.05))),
+        ("повторы + хедж", OllamaConfig(**base, retry=RetryPolicy(attempts=3, base_delay=0.05), hedge_enabled=True)),
+    ]
+    print(
+        f"Вызовов: {args.calls}, 503: {args.error_rate:.0%}, зависания: {args.slow_rate:.0%} "
+        f"по {args.slow_delay * 1000:.0f} мс, обычный вызов: {args.latency * 1000:.0f} мс"
+    )
+    print(f"{'режим':<16}{'успешно':>9}{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}")
+    for label, config in rows:
+        row = await measure(config, args)
+        print(f"{label:<16}{row['success']:>9.1%}{row['p50_ms']:>10.0f}{row['p95_ms']:>10.0f}{row['p99_ms']:>10.0f}")
+
+    without = await measure_outage(False, args.outage_calls, args.connect_timeout)
+    with_breaker = await measure_outage(True, args.outage_calls, args.connect_timeout)
+    print(
+        f"Лежащий узел, {args.outage_calls} вызовов по {args.connect_timeout * 1000:.0f} мс таймаута: "
+        f"без автомата {without:.2f} с, с автоматом {with_breaker:.2f} с"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-delay", type=float, default=1.0)
+    parser.add_argument("--outage-calls", type=int, default=20)
+    parser.add_argument("--connect-timeout", type=float, default=0.5)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(args))
@@ -0,0 +1,90 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Бенчмарк семантического кэша анализа и дизайна.
+
+Поток запросов состоит из нескольких намерений в разных формулировках
+(перестановка слов, другие окончания). Сравниваются прогоны без кэша и
+с SemanticCache: сколько вызовов анализатора и дизайнера сделано и сколько
+времени занял поток при заданной задержке модели.
+
+Запуск из apps/backend:
+    python -m benchmarks.bench_semantic_cache --requests 40 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+from typing import List, Optional
+
+from src.agents.workflow import create_workflow
+from src.services.ollama_service import OllamaService, OllamaConfig
+from src.services.semantic_cache import SemanticCache
+from benchmarks.fake_ollama import FakeOllama
+
+INTENTS = [
+    ["синяя кнопка с иконкой", "кнопка с иконкой синяя", "синяя кнопка иконкой"],
+    ["карточка товара с ценой", "карточка с ценой товара", "товара карточка цена"],
+    ["модальное окно подтверждения", "окно модальное для подтверждения"],
+    ["таблица пользователей с сортировкой", "сортировка в таблице пользователей"],
+    ["форма входа с паролем", "форма входа по паролю"],
+]
+
+
+def traffic(requests: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [rng.choice(rng.choice(INTENTS)) for _ in range(requests)]
+
+
+async def measure(prompts: List[str], latency: float, threshold: Optional[float]) -> dict:
+    fake = FakeOllama(latency=latency)
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    cache = SemanticCache(threshold=threshold) if threshold is not None else None
+    workflow = create_workflow(service, semantic_cache=cache)
+    started = time.perf_counter()
+    try:
+        for prompt in prompts:
+            await workflow.run(prompt)
+    finally:
+        await service.close()
+    return {
+        "seconds": time.perf_counter() - started,
+        "upstream": fake.stage_calls.get("requirements", 0) + fake.stage_calls.get("design", 0),
+        "hit_rate": cache.snapshot()["hit_rate"] if cache else 0.0,
+    }
+
+
+async def main(requests: int, latency: float, threshold: float) -> None:
+    prompts = traffic(requests)
+    before = await measure(prompts, latency, None)
+    after = await measure(prompts, latency, threshold)
+
+    print(f"Запросов: {requests}, задержка вызова: {latency * 1000:.0f} мс, порог: {threshold}")
+    print(f"{'режим':<20}{'анализ+дизайн':>15}{'hit rate':>10}{'время, с':>10}")
+    for label, row in (("без кэша", before), ("семантический кэш", after)):
+        print(f"{label:<20}{row['upstream']:>15}{row['hit_rate']:>10.0%}{row['seconds']:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--threshold", type=float, default=0.92)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(args.requests, args.latency, args.threshold))
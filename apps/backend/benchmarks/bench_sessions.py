@@ -0,0 +1,77 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Бенчмарк сессий уточнений.
+
+Уточнение к готовому компоненту («сделай кнопку круглой») выполняется
+полным прогоном с дописанным запросом и ходом сессии, который начинается
+с правки кода. Поддельный Ollama отдаёт токены с задержкой token_latency,
+сравниваются время ответа и число LLM-вызовов по этапам.
+
+Запуск из apps/backend:
+    python -m benchmarks.bench_sessions --token-latency 0.002
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from src.agents.sessions import create_session_manager
+from src.agents.workflow import create_workflow
+from src.services.ollama_service import OllamaService, OllamaConfig
+from benchmarks.fake_ollama import FakeOllama
+
+PROMPT = "Создай кнопку"
+FOLLOW_UPS = ("Сделай кнопку круглой", "Добавь проп size")
+
+
+async def follow_up(session_mode: bool, text: str, token_latency: float) -> dict:
+    fake = FakeOllama(review_score=9, token_latency=token_latency)
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    workflow = create_workflow(service)
+    sessions = create_session_manager(workflow)
+    try:
+        session = sessions.open()
+        await sessions.handle(session, PROMPT)
+        before = dict(fake.stage_calls)
+        started = time.perf_counter()
+        if session_mode:
+            await sessions.handle(session, text)
+        else:
+            await workflow.run(f"{PROMPT}. {text}")
+        calls = {stage: count - before.get(stage, 0) for stage, count in fake.stage_calls.items()}
+        return {"seconds": time.perf_counter() - started, "calls": {s: c for s, c in calls.items() if c}}
+    finally:
+        await service.close()
+
+
+async def main(token_latency: float) -> None:
+    print(f"Задержка токена: {token_latency * 1000:.1f} мс")
+    print(f"{'уточнение':<24}{'режим':<16}{'время, с':>10}  LLM-вызовы")
+    for text in FOLLOW_UPS:
+        for label, session_mode in (("полный прогон", False), ("сессия", True)):
+            row = await follow_up(session_mode, text, token_latency)
+            calls = ", ".join(f"{stage}={count}" for stage, count in sorted(row["calls"].items()))
+            print(f"{text:<24}{label:<16}{row['seconds']:>10.2f}  {calls}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--token-latency", type=float, default=0.002)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(args.token_latency))
@@ -0,0 +1,92 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Бенчмарк: общий OllamaService и скомпилированный граф против создания на каждый запрос.
+
+Запуск из apps/backend:
+    python -m benchmarks.bench_shared_workflow --requests 200
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from src.agents.workflow import create_workflow
+from src.services.ollama_service import OllamaService, OllamaConfig
+from benchmarks.fake_ollama import FakeOllama
+
+
+async def per_request(fake: FakeOllama, config: OllamaConfig, prompts: list) -> float:
+    """Старое поведение: новый клиент, агенты и граф на каждый запрос."""
+    start = time.perf_counter()
+    for prompt in prompts:
+        service = OllamaService(config, transport=fake.transport())
+        try:
+            workflow = create_workflow(service)
+            await workflow.run(prompt)
+        finally:
+            await service.close()
+    return time.perf_counter() - start
+
+
+async def shared(fake: FakeOllama, config: OllamaConfig, prompts: list) -> float:
+    """Новое поведение: один сервис и один граф, как в lifespan приложения."""
+    start = time.perf_counter()
+    service = OllamaService(config, transport=fake.transport())
+    try:
+        workflow = create_workflow(service)
+        for prompt in prompts:
+            await workflow.run(prompt)
+    finally:
+        await service.close()
+    return time.perf_counter() - start
+
+
+def setup_cost(config: OllamaConfig, repeats: int) -> float:
+    """Среднее время создания сервиса и компиляции графа (без запросов)."""
+    fake = FakeOllama()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        service = OllamaService(config, transport=fake.transport())
+        create_workflow(service)
+        asyncio.run(service.close())
+    return (time.perf_counter() - start) / repeats
+
+
+async def main(requests: int) -> None:
+    config = OllamaConfig()
+    prompts = [f"Создай кнопку №{i}" for i in range(requests)]
+
+    # Прогрев импорта и кэшей интерпретатора
+    await shared(FakeOllama(), config, prompts[:2])
+
+    old = await per_request(FakeOllama(), config, prompts)
+    new = await shared(FakeOllama(), config, prompts)
+
+    print(f"Запросов: {requests}")
+    print(f"На каждый запрос: {old:.3f} с ({old / requests * 1000:.2f} мс/запрос)")
+    print(f"Общие объекты:    {new:.3f} с ({new / requests * 1000:.2f} мс/запрос)")
+    print(f"Снятые накладные: {(old - new) / requests * 1000:.2f} мс/запрос")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    print(f"Создание сервиса и графа: {setup_cost(OllamaConfig(), 20) * 1000:.2f} мс")
+    asyncio.run(main(args.requests))
@@ -0,0 +1,157 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Микробенчмарк накладных расходов узлов графа на больших состояниях.
+
+Сравнивает прежнюю схему (StateGraph(dict), в каждом узле AgentState(**state)
+и полный .model_dump() на выходе, повторная сборка модели в условии перехода)
+с текущей (WorkflowState с редьюсерами, узел возвращает только изменения).
+Агенты заменены заглушками без LLM: измеряется только обвязка графа.
+
+Запуск из apps/backend:
+    python -m benchmarks.bench_state_updates --runs 20 --code-kb 256
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+import tracemalloc
+
+from langgraph.graph import StateGraph, END
+
+from src.agents.schemas import AgentState
+from src.agents.workflow import MultiAgentWorkflow
+
+NODES = ("analyze_requirements", "design_component", "generate_code", "review_code")
+ITERATIONS = 3
+
+
+class StubAgent:
+    """
+    Агент-заглушка: присваивает этапу крупные значения, как настоящие агенты.
+    Значения готовятся заранее, чтобы в замер попадала только обвязка графа.
+    """
+
+    def __init__(self, stage: str, code_kb: int):
+        self.stage = stage
+        self.requirements = "требование " * 2000
+        self.analysis = {"component_type": "Button", "notes": ["пункт"] * 500}
+        self.design = {"props": [{"name": f"p{i}", "type": "string"} for i in range(500)]}
+        self.code = "x" * (code_kb * 1024)
+        self.review = {
+            "quality_score": 5,
+            "issues": [{"severity": "minor", "message": "замечание " * 10} for _ in range(500)],
+        }
+
+    async def process(self, state: AgentState) -> AgentState:
+        if self.stage == "analyze_requirements":
+            state.requirements = self.requirements
+            state.requirements_analysis = self.analysis
+            state.requirements_complete = True
+        elif self.stage == "design_component":
+            state.component_design = self.design
+            state.design_complete = True
+        elif self.stage == "generate_code":
+            state.generated_code = self.code
+            state.iteration_count += 1
+            state.code_generated = True
+        else:
+            state.code_review = self.review
+            state.code_reviewed = True
+        return state
+
+
+def _should_improve(state: dict) -> str:
+    return "improve" if state.get("iteration_count", 0) < ITERATIONS else "end"
+
+
+def build_legacy_graph(agents: dict):
+    """Прежняя обвязка: полная пересборка и сериализация состояния на каждом шаге."""
+    graph = StateGraph(dict)
+
+    def make_node(agent):
+        async def node(state: dict) -> dict:
+            result = await agent.process(AgentState(**state))
+            return result.model_dump()
+        return node
+
+    def should_improve(state: dict) -> str:
+        return _should_improve(AgentState(**state).model_dump())
+
+    for name in NODES:
+        graph.add_node(name, make_node(agents[name]))
+    _wire(graph, should_improve)
+    return graph.compile()
+
+
+def build_delta_graph(agents: dict):
+    """Текущая обвязка MultiAgentWorkflow с агентами-заглушками."""
+    workflow = MultiAgentWorkflow.__new__(MultiAgentWorkflow)
+    workflow.checkpoint_store = None
+    workflow.requirements_analyzer = agents["analyze_requirements"]
+    workflow.component_designer = agents["design_component"]
+    workflow.code_generator = agents["generate_code"]
+    workflow.code_reviewer = agents["review_code"]
+    workflow._should_improve_code = _should_improve
+    return workflow._build_graph()
+
+
+def _wire(graph: StateGraph, should_improve) -> None:
+    graph.set_entry_point("analyze_requirements")
+    graph.add_edge("analyze_requirements", "design_component")
+    graph.add_edge("design_component", "generate_code")
+    graph.add_edge("generate_code", "review_code")
+    graph.add_conditional_edges("review_code", should_improve, {"improve": "generate_code", "end": END})
+
+
+async def measure(graph, runs: int) -> dict:
+    hops = len(NODES) + (ITERATIONS - 1) * 2
+    initial = AgentState(user_input="Кнопка").model_dump()
+
+    await graph.ainvoke(dict(initial))  # прогрев
+    started = time.perf_counter()
+    for _ in range(runs):
+        await graph.ainvoke(dict(initial))
+    elapsed = time.perf_counter() - started
+
+    # Память меряется отдельным прогоном: tracemalloc сильно искажает время
+    tracemalloc.start()
+    await graph.ainvoke(dict(initial))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"per_node_ms": elapsed / (runs * hops) * 1000, "peak_mb": peak / 1024 / 1024}
+
+
+async def main(runs: int, code_kb: int) -> None:
+    agents = {name: StubAgent(name, code_kb) for name in NODES}
+    legacy = await measure(build_legacy_graph(agents), runs)
+    delta = await measure(build_delta_graph(agents), runs)
+
+    print(f"Прогонов: {runs}, код: {code_kb} КБ, итераций улучшения: {ITERATIONS}")
+    print(f"{'схема':<22}{'мс на узел':>12}{'пик памяти, МБ':>16}")
+    for label, row in (("полное состояние", legacy), ("дельты + редьюсеры", delta)):
+        print(f"{label:<22}{row['per_node_ms']:>12.3f}{row['peak_mb']:>16.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--code-kb", type=int, default=256)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(args.runs, args.code_kb))
@@ -0,0 +1,77 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Бенчмарк структурированного вывода: доля неразбираемых JSON-ответов и число
+лишних повторных генераций кода до (разбор текста) и после (format = JSON Schema).
+
+Поддельный Ollama без format заворачивает часть JSON-ответов в пояснения
+и markdown, как это делают небольшие модели; с format отвечает чистым JSON.
+
+Запуск из apps/backend:
+    python -m benchmarks.bench_structured_output --runs 50 --noise 0.2
+"""
+
+import argparse
+import asyncio
+import logging
+
+from src.agents.workflow import create_workflow
+from src.services.ollama_service import OllamaService, OllamaConfig
+from benchmarks.fake_ollama import FakeOllama
+
+
+async def measure(structured: bool, runs: int, noise: float) -> dict:
+    fake = FakeOllama(json_noise=noise, seed=42)
+    config = OllamaConfig(cache_enabled=False, structured_output=structured)
+    service = OllamaService(config, transport=fake.transport())
+    workflow = create_workflow(service)
+    try:
+        for i in range(runs):
+            await workflow.run(f"Создай кнопку №{i}")
+    finally:
+        await service.close()
+
+    stats = service.json_stats
+    generations = fake.stage_calls.get("generation", 0)
+    return {
+        "json_requests": stats["requests"],
+        "parse_failures": stats["parse_failures"],
+        "failure_rate": stats["parse_failures"] / max(stats["requests"], 1),
+        "retries": stats["retries"],
+        "wasted_generations": generations - runs,
+    }
+
+
+async def main(runs: int, noise: float) -> None:
+    before = await measure(False, runs, noise)
+    after = await measure(True, runs, noise)
+
+    print(f"Запусков: {runs}, доля «шумных» ответов без format: {noise:.0%}")
+    print(f"{'режим':<14}{'JSON-ответов':>14}{'ошибок разбора':>16}{'доля':>8}{'повторов':>10}{'лишних генераций':>18}")
+    for label, row in (("разбор текста", before), ("JSON Schema", after)):
+        print(
+            f"{label:<14}{row['json_requests']:>14}{row['parse_failures']:>16}"
+            f"{row['failure_rate']:>8.1%}{row['retries']:>10}{row['wasted_generations']:>18}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--noise", type=float, default=0.2)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(args.runs, args.noise))
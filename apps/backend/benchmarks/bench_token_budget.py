@@ -0,0 +1,100 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Бенчмарк бюджета токенов.
+
+Сравнивает прежнюю сериализацию контекста (JSON с отступами и пустыми
+полями, num_predict = MAX_TOKENS для всех этапов, num_ctx не задан) с
+компактной и бюджетом по этапам. Размер промптов оценивается по телам
+запросов к поддельному Ollama той же оценкой, что у TokenBudget.
+
+Запуск из apps/backend:
+    python -m benchmarks.bench_token_budget --runs 10
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from collections import defaultdict
+
+import src.agents.base as base
+from src.agents.workflow import create_workflow
+from src.services.ollama_service import OllamaService, OllamaConfig
+from src.services.token_budget import compact_json, estimate_tokens
+from benchmarks.fake_ollama import FakeOllama
+
+
+def indented_json(data) -> str:
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, indent=1, default=str)
+
+
+async def measure(compact: bool, runs: int) -> dict:
+    fake = FakeOllama(review_score=5, code_lines=40)
+    stages = defaultdict(lambda: {"calls": 0, "prompt": 0, "num_predict": 0, "num_ctx": set()})
+    handle = fake.handle
+
+    async def recording(request):
+        payload = json.loads(request.content)
+        if "messages" in payload:
+            row = stages[fake.stage_of(payload)]
+            row["calls"] += 1
+            row["prompt"] += sum(estimate_tokens(m["content"]) for m in payload["messages"])
+            row["num_predict"] = payload["options"]["num_predict"]
+            row["num_ctx"].add(payload["options"].get("num_ctx"))
+        return await handle(request)
+
+    fake.handle = recording
+    base.compact_json = compact_json if compact else indented_json
+    service = OllamaService(OllamaConfig(cache_enabled=False, token_budget=compact), transport=fake.transport())
+    workflow = create_workflow(service)
+    try:
+        for i in range(runs):
+            await workflow.run(f"Создай кнопку №{i} с иконкой и состоянием загрузки")
+    finally:
+        await service.close()
+        base.compact_json = compact_json
+    return dict(stages)
+
+
+async def main(runs: int) -> None:
+    before = await measure(False, runs)
+    after = await measure(True, runs)
+
+    print(f"Запусков: {runs}")
+    print(f"{'этап':<24}{'промпт до':>11}{'промпт после':>14}{'num_predict':>14}{'num_ctx':>12}")
+    total_before = total_after = 0
+    for stage, row in after.items():
+        old = before.get(stage, row)
+        prompt_before = old["prompt"] / max(old["calls"], 1)
+        prompt_after = row["prompt"] / max(row["calls"], 1)
+        total_before += old["prompt"]
+        total_after += row["prompt"]
+        ctx = ",".join(str(value) for value in sorted(row["num_ctx"]))
+        print(
+            f"{stage:<24}{prompt_before:>11.0f}{prompt_after:>14.0f}"
+            f"{str(old['num_predict']) + ' -> ' + str(row['num_predict']):>14}{ctx:>12}"
+        )
+    print(f"Токенов промпта за прогон: {total_before / runs:.0f} -> {total_after / runs:.0f} "
+          f"({1 - total_after / max(total_before, 1):.0%} меньше)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(args.runs))
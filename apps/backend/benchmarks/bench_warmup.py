@@ -0,0 +1,95 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Бенчмарк прогрева моделей и пробы готовности.
+
+Первый прогон после старта без прогрева и после него: поддельный Ollama
+загружает модель load_delay секунд. Затем - сколько запросов к Ollama
+порождают частые проверки /health/ready (проба кэшируется на ttl).
+
+Запуск из apps/backend:
+    python -m benchmarks.bench_warmup --load-delay 1.0 --max-loaded 2
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from src.agents.workflow import create_workflow
+from src.services.health import ReadinessProbe, create_model_warmup
+from src.services.ollama_service import OllamaService, OllamaConfig
+from benchmarks.fake_ollama import FakeOllama
+
+
+async def first_run(warm: bool, scheduler: bool, load_delay: float, max_loaded: int) -> dict:
+    fake = FakeOllama(load_delay=load_delay, max_loaded=max_loaded, review_score=9)
+    config = OllamaConfig(
+        cache_enabled=False, scheduler_enabled=scheduler, scheduler_max_loaded_models=max_loaded, keep_alive="10m"
+    )
+    service = OllamaService(config, transport=fake.transport())
+    workflow = create_workflow(service)
+    warmup_seconds = 0.0
+    try:
+        if warm:
+            warmup = create_model_warmup(service, service.stage_models())
+            await warmup.run()
+            warmup_seconds = warmup.duration
+        started = time.perf_counter()
+        await workflow.run("Создай кнопку")
+        return {"first_run": time.perf_counter() - started, "warmup": warmup_seconds, "loads": fake.model_loads}
+    finally:
+        await service.close()
+
+
+async def health_checks(checks: int, interval: float, ttl: float) -> dict:
+    fake = FakeOllama()
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    readiness = ReadinessProbe(service, service.stage_models(), ttl=ttl)
+    try:
+        for _ in range(checks):
+            await readiness.check()
+            await asyncio.sleep(interval)
+        return {"checks": checks, "ollama_requests": fake.requests}
+    finally:
+        await service.close()
+
+
+async def main(load_delay: float, max_loaded: int, checks: int) -> None:
+    rows = (
+        ("без прогрева", await first_run(False, True, load_delay, max_loaded)),
+        ("прогрев, планировщик", await first_run(True, True, load_delay, max_loaded)),
+        ("прогрев, без планировщика", await first_run(True, False, load_delay, max_loaded)),
+    )
+    print(f"Загрузка модели: {load_delay:.1f} с, моделей в памяти: {max_loaded}")
+    print(f"{'старт':<28}{'прогрев, с':>12}{'первый прогон, с':>18}{'загрузок':>10}")
+    for label, row in rows:
+        print(f"{label:<28}{row['warmup']:>12.2f}{row['first_run']:>18.2f}{row['loads']:>10}")
+
+    uncached = await health_checks(checks, 0.01, ttl=0)
+    cached = await health_checks(checks, 0.01, ttl=5.0)
+    print(f"Проверок готовности: {checks} за ~{checks * 0.01:.1f} с; запросов к Ollama: "
+          f"без кэша {uncached['ollama_requests']}, с кэшем пробы {cached['ollama_requests']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--load-delay", type=float, default=1.0)
+    parser.add_argument("--max-loaded", type=int, default=2)
+    parser.add_argument("--checks", type=int, default=100)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(args.load_delay, args.max_loaded, args.checks))
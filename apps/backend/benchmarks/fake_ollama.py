@@ -0,0 +1,462 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Детерминированная подмена Ollama для тестов и бенчмарков.
+Отвечает на /api/chat, /api/embed, /api/tags и /api/ps заготовленными
+ответами без запуска настоящей модели. Работает внутри процесса через
+httpx.MockTransport или как отдельный HTTP-сервер (ASGI):
+
+    python -m benchmarks.fake_ollama --port 11435 --token-latency 0.01 --load-delay 1.5
+"""
+
+EMBEDDING_DIM = 64
+
+# Модели по умолчанию из настроек - их отдаёт /api/tags
+DEFAULT_MODELS = ["qwen2.5-coder:3b", "qwen2.5:3b", "nomic-embed-text"]
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+
+import httpx
+
+CANNED_JSON = {
+    "component_type": "Button",
+    "purpose": "Интерактивная кнопка",
+    "features": ["Текст", "Иконка"],
+    "name": "Button",
+    "props": {"children": {"type": "ReactNode", "required": "false"}},
+    "quality_score": 8,
+    "issues": [],
+    "suggestions": [],
+}
+
+CANNED_ANALYSIS = (
+    "Пользователь просит интерактивную кнопку с иконкой. Кнопка должна поддерживать "
+    "основной и дополнительный варианты, размеры sm, md и lg, состояние загрузки и "
+    "блокировки. Иконка располагается слева от текста, при отсутствии текста кнопка "
+    "становится квадратной. Требуется поддержка клавиатуры и видимый фокус, "
+    "стилизация через Tailwind CSS, типизация пропсов на TypeScript."
+)
+
+CANNED_CODE = """import React from 'react';
+
+interface ButtonProps {
+  children?: React.ReactNode;
+}
+
+export const Button: React.FC<ButtonProps> = ({ children }) => (
+  <button className="px-4 py-2 rounded bg-blue-600 text-white">{children}</button>
+);
+
+export default Button;
+"""
+
+
+class ClosingStream(httpx.AsyncByteStream):
+    """
+    Тело потокового ответа, которое закрывает генератор вместе с ответом:
+    MockTransport этого не делает, и оборванный клиентом поток держал бы
+    модель «занятой», как будто генерация продолжается.
+    """
+
+    def __init__(self, generator):
+        self._generator = generator
+
+    async def __aiter__(self):
+        async for chunk in self._generator:
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self._generator.aclose()
+
+
+class FakeOllama:
+    """Поддельный сервер Ollama, работающий внутри процесса через httpx.MockTransport."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        token_latency: float = 0.0,
+        load_delay: float = 0.0,
+        max_loaded: int = 1,
+        num_parallel: int = 0,
+        prompt_latency: float = 0.0,
+        json_noise: float = 0.0,
+        review_score: int = 8,
+        code_lines: int = 0,
+        prefix_cache: bool = True,
+        example_fix: bool = False,
+        candidate_variants: bool = False,
+        json_tail: int = 0,
+        responses: dict = None,
+        models: list = None,
+        seed: int = 0
+    ):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.prompt_latency = prompt_latency
+        # Доля JSON-ответов, которые без format приходят с пояснениями вокруг
+        self.json_noise = json_noise
+        self._random = random.Random(seed)
+        # Оценка ревью: ниже 7 запускает раунды улучшения кода
+        self.review_score = review_score
+        # Дополнительные строки кода: размер компонента, ближе к реальному
+        self.code = CANNED_CODE + "".join(
+            f"export const variant{i} = 'px-{i % 8} py-{i % 4} text-sm rounded';\n" for i in range(code_lines)
+        )
+        # С примерами принятых компонентов в промпте генератор сразу пишет код,
+        # который ревью принимает (type="button" на месте)
+        self.example_fix = example_fix
+        # Кандидаты best-of-N: код зависит от seed - seed % 3 == 0 как обычно,
+        # 1 - с type="button" (ревью принимает), 2 - с незакрытой скобкой
+        self.candidate_variants = candidate_variants
+        # Токены после закрытого JSON: как модель, которая с format генерирует
+        # переводы строк до num_predict (грамматика их допускает)
+        self.json_tail = json_tail
+        # Заготовленные ответы по этапам (requirements, design, generation, patch, review)
+        self.responses = responses or {}
+        self.models = list(models or DEFAULT_MODELS)
+        self.stage_calls: dict = {}
+        # Как раннер Ollama: KV-кэш последнего промпта модели, общий префикс не вычисляется заново
+        self.prefix_cache = prefix_cache
+        self._kv: dict = {}
+        # Сгенерированные «токены» (слова) по этапам
+        self.stage_tokens: dict = {}
+        # Фрагменты, действительно отданные потоком по этапам (клиент может оборвать поток)
+        self.stage_streamed: dict = {}
+        self.load_delay = load_delay
+        self.max_loaded = max_loaded
+        self.requests = 0
+        self.embed_calls = 0
+        # Как OLLAMA_NUM_PARALLEL: сколько вызовов модель обрабатывает одновременно (0 - без лимита)
+        self._slots = asyncio.Semaphore(num_parallel) if num_parallel else None
+
+        # Имитация памяти Ollama: загруженные модели и выполняющиеся вызовы
+        self.loaded: list = []
+        self.model_loads = 0
+        # Загрузка, которую отчитает в load_duration следующий ответ модели
+        self._pending_load: dict = {}
+        self._in_flight: dict = {}
+        self._memory = asyncio.Condition()
+        self._admission = asyncio.Lock()
+
+    async def _ensure_loaded(self, model: str) -> None:
+        """
+        Как Ollama: запросы обслуживаются по очереди прихода; чтобы загрузить
+        модель, ждём завершения вызовов вытесняемой.
+        """
+        async with self._admission:
+            async with self._memory:
+                while model not in self.loaded:
+                    if len(self.loaded) < self.max_loaded:
+                        self.loaded.append(model)
+                        self.model_loads += 1
+                        self._pending_load[model] = self.load_delay
+                        await asyncio.sleep(self.load_delay)
+                        break
+                    victim = next((m for m in self.loaded if not self._in_flight.get(m)), None)
+                    if victim is not None:
+                        self.loaded.remove(victim)
+                        continue
+                    await self._memory.wait()
+                self._in_flight[model] = self._in_flight.get(model, 0) + 1
+
+    async def _compute(self, seconds: float) -> None:
+        if not seconds:
+            return
+        if self._slots is None:
+            await asyncio.sleep(seconds)
+            return
+        async with self._slots:
+            await asyncio.sleep(seconds)
+
+    async def _finish(self, model: str) -> None:
+        async with self._memory:
+            self._in_flight[model] -= 1
+            self._memory.notify_all()
+
+    def _answer(self, payload: dict) -> str:
+        answer = self._compose(payload)
+        stage = self.stage_of(payload)
+        self.stage_tokens[stage] = self.stage_tokens.get(stage, 0) + len(answer.split())
+        return answer
+
+    def _compose(self, payload: dict) -> str:
+        stage = self.stage_of(payload)
+        if stage in self.responses:
+            return self.responses[stage]
+        system = " ".join(
+            m["content"] for m in payload.get("messages", []) if m["role"] == "system"
+        )
+        if "правке кода" in system:
+            return self._patch(payload)
+        if "JSON" in system:
+            answer = dict(CANNED_JSON)
+            score = self.review_score
+            if (self.example_fix or self.candidate_variants) and 'type="button"' in (self._button_line(payload) or ""):
+                score = max(score, 8)
+            answer["quality_score"] = score
+            if score < 7:
+                answer["issues"] = [{"severity": "major", "category": "a11y", "description": "У кнопки не указан type"}]
+            if "summary" in system:
+                answer["summary"] = CANNED_ANALYSIS
+            if self.stage_of(payload) == "requirements":
+                # Анализ зависит от запроса: разные компоненты - разные анализы
+                answer["purpose"] = payload["messages"][-1]["content"].split(":", 1)[-1].strip()
+            text = json.dumps(answer, ensure_ascii=False)
+            # С format декодирование ограничено грамматикой - пояснений не бывает
+            if "format" not in payload and self._random.random() < self.json_noise:
+                text = f"Вот результат анализа:\n```json\n{text}\n```\nЕсли нужно, могу уточнить."
+            return text + " \n" * self.json_tail
+        if "анализу требований" in system:
+            return CANNED_ANALYSIS
+        seed = payload.get("options", {}).get("seed")
+        if self.candidate_variants and seed is not None:
+            return self._variant(seed)
+        if self.example_fix and any("Примеры принятых" in m["content"] for m in payload["messages"]):
+            return self.code.replace("<button", '<button type="button"', 1)
+        return self.code
+
+    def _variant(self, seed: int) -> str:
+        variant = seed % 3
+        if variant == 1:
+            return self.code.replace("<button", '<button type="button"', 1)
+        if variant == 2:
+            return self.code.replace("}\n\nexport const", "\n\nexport const", 1)
+        return self.code
+
+    @staticmethod
+    def _button_line(payload: dict):
+        """Строка с <button текущего кода: он идёт в сообщениях после примеров."""
+        prompt = "\n".join(m["content"] for m in payload.get("messages", []))
+        lines = [l for l in prompt.splitlines() if "<button" in l]
+        return lines[-1] if lines else None
+
+    def _patch(self, payload: dict) -> str:
+        """Правка SEARCH/REPLACE к строке с <button из кода в сообщениях запроса."""
+        line = self._button_line(payload)
+        if line is None:
+            return "Не нашёл, что исправить."
+        return (
+            "<<<<<<< SEARCH\n" + line + "\n=======\n" +
+            line.replace("<button", '<button type="button"', 1) + "\n>>>>>>> REPLACE"
+        )
+
+    @staticmethod
+    def stage_of(payload: dict) -> str:
+        """Этап пайплайна по системному промпту запроса."""
+        system = " ".join(
+            m["content"] for m in payload.get("messages", []) if m["role"] == "system"
+        )
+        for marker, stage in (
+            ("анализу требований", "requirements"),
+            ("дизайну", "design"),
+            ("генерации кода", "generation"),
+            ("правке кода", "patch"),
+            ("ревью", "review"),
+        ):
+            if marker in system:
+                return stage
+        return "other"
+
+    def _prompt_eval(self, payload: dict) -> tuple:
+        """
+        (токенов вычислено, секунд) для чтения промпта. Сообщения склеиваются как
+        в шаблоне Ollama (подряд идущие системные - в одно); из KV-кэша модели
+        берётся общий префикс с её предыдущим промптом.
+        """
+        messages = payload.get("messages", [])
+        system = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+        rendered = [system] + [m["content"] for m in messages if m["role"] != "system"]
+        tokens = " ".join(rendered).split()
+        cached = 0
+        if self.prefix_cache:
+            previous = self._kv.get(payload["model"], [])
+            while cached < min(len(tokens), len(previous)) and tokens[cached] == previous[cached]:
+                cached += 1
+            self._kv[payload["model"]] = tokens
+        evaluated = len(tokens) - cached
+        return evaluated, evaluated * self.prompt_latency
+
+    def _usage(self, model: str, prompt_eval: tuple, content: str) -> dict:
+        """Счётчики в формате ответа Ollama (длительности в наносекундах)."""
+        evaluated, seconds = prompt_eval
+        load = self._pending_load.pop(model, 0.0)
+        generation = self._generation_time(content)
+        return {
+            "total_duration": int((load + self.latency + seconds + generation) * 1e9),
+            "load_duration": int(load * 1e9),
+            "prompt_eval_count": evaluated,
+            "prompt_eval_duration": int(seconds * 1e9),
+            "eval_count": len(content.split()),
+            "eval_duration": int(generation * 1e9),
+        }
+
+    @staticmethod
+    def embedding(text: str) -> list:
+        """
+        Детерминированный эмбеддинг: мешок трёхбуквенных основ слов.
+        Перестановка слов и смена окончаний («синяя»/«синего») дают близкие векторы.
+        """
+        vector = [0.0] * EMBEDDING_DIM
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.md5(word[:3].encode("utf-8")).digest()
+            vector[digest[0] % EMBEDDING_DIM] += 1.0
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def _generation_time(self, content: str) -> float:
+        return len(content.split(" ")) * self.token_latency
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        path = request.url.path
+        if path == "/api/chat":
+            payload = json.loads(request.content)
+            stage = self.stage_of(payload)
+            self.stage_calls[stage] = self.stage_calls.get(stage, 0) + 1
+            await self._ensure_loaded(payload["model"])
+            if payload.get("stream"):
+                return httpx.Response(200, stream=ClosingStream(self._stream(payload)))
+            try:
+                content = self._answer(payload)
+                prompt_eval = self._prompt_eval(payload)
+                await self._compute(self.latency + prompt_eval[1] + self._generation_time(content))
+            finally:
+                await self._finish(payload["model"])
+            return httpx.Response(200, json={
+                "model": payload["model"],
+                "message": {"role": "assistant", "content": content},
+                "done": True,
+                **self._usage(payload["model"], prompt_eval, content),
+            })
+        if path == "/api/embed":
+            payload = json.loads(request.content)
+            self.embed_calls += 1
+            inputs = payload["input"] if isinstance(payload["input"], list) else [payload["input"]]
+            return httpx.Response(200, json={
+                "model": payload["model"],
+                "embeddings": [self.embedding(text) for text in inputs],
+                "prompt_eval_count": sum(len(text.split()) for text in inputs),
+            })
+        if path == "/api/tags":
+            return httpx.Response(200, json={"models": [
+                {"name": m, "model": m, "size": 0, "details": {"family": m.split(":")[0]}} for m in self.models
+            ]})
+        if path == "/api/ps":
+            return httpx.Response(200, json={"models": [{"name": m, "model": m} for m in self.loaded]})
+        if path == "/api/generate":
+            payload = json.loads(request.content)
+            if payload.get("keep_alive") in (0, "0"):
+                async with self._memory:
+                    if payload["model"] in self.loaded and not self._in_flight.get(payload["model"]):
+                        self.loaded.remove(payload["model"])
+                    self._memory.notify_all()
+            elif not payload.get("prompt"):
+                # Запрос без промпта только загружает модель (прогрев)
+                await self._ensure_loaded(payload["model"])
+                await self._finish(payload["model"])
+            return httpx.Response(200, json={"model": payload["model"], "response": "", "done": True})
+        return httpx.Response(404, json={"error": "not found"})
+
+    async def _stream(self, payload: dict):
+        """NDJSON-фрагменты в формате Ollama, по одному на «токен» (слово)."""
+        finished = False
+        try:
+            prompt_eval = self._prompt_eval(payload)
+            await self._compute(self.latency + prompt_eval[1])
+            content = self._answer(payload)
+            words = content.split(" ")
+            for i, word in enumerate(words):
+                if self.token_latency:
+                    await asyncio.sleep(self.token_latency)
+                token = word if i == len(words) - 1 else word + " "
+                stage = self.stage_of(payload)
+                self.stage_streamed[stage] = self.stage_streamed.get(stage, 0) + 1
+                chunk = {"model": payload["model"], "message": {"role": "assistant", "content": token}, "done": False}
+                yield (json.dumps(chunk, ensure_ascii=False) + "\n").encode()
+            # Освобождаем модель до последнего фрагмента: клиент может не дочитать поток
+            finished = True
+            await self._finish(payload["model"])
+            final = {"model": payload["model"], "done": True, **self._usage(payload["model"], prompt_eval, content)}
+            yield (json.dumps(final) + "\n").encode()
+        finally:
+            if not finished:
+                await self._finish(payload["model"])
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def __call__(self, scope, receive, send) -> None:
+        """ASGI-приложение: тот же обработчик, но за настоящим HTTP-сервером."""
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        request = httpx.Request(scope["method"], f"http://fake{scope['path']}", content=body)
+        response = await self.handle(request)
+        await send({
+            "type": "http.response.start",
+            "status": response.status_code,
+            # Потоковые ответы создаются без заголовков - это NDJSON
+            "headers": [(b"content-type", response.headers.get("content-type", "application/x-ndjson").encode())],
+        })
+        async for chunk in response.stream:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Поддельный сервер Ollama")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.0, help="Задержка на вызов, с")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Задержка на токен ответа, с")
+    parser.add_argument("--prompt-latency", type=float, default=0.0, help="Задержка на токен промпта, с")
+    parser.add_argument("--load-delay", type=float, default=0.0, help="Загрузка модели в память, с")
+    parser.add_argument("--max-loaded", type=int, default=1)
+    parser.add_argument("--num-parallel", type=int, default=0)
+    args = parser.parse_args()
+
+    fake = FakeOllama(
+        latency=args.latency,
+        token_latency=args.token_latency,
+        prompt_latency=args.prompt_latency,
+        load_delay=args.load_delay,
+        max_loaded=args.max_loaded,
+        num_parallel=args.num_parallel,
+    )
+    uvicorn.run(fake, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Нагрузочный тест /api/ai/generate.
+
+По умолчанию всё поднимается внутри процесса: поддельный Ollama слушает
+настоящий TCP-порт (uvicorn в отдельном потоке), бэкенд src.main:app
+вызывается через ASGI со своим lifespan, поэтому в замер входят HTTP-клиент
+к Ollama, граф агентов, допуск и сериализация. С --url нагружается уже
+запущенный бэкенд, а поддельный сервер не поднимается.
+
+Отчёт: p50/p95/p99 задержки, пропускная способность, коды ответов.
+С --save результат пишется в JSON-базу, с --compare сравнивается с ней;
+при регрессии больше --tolerance процесс завершается с кодом 1.
+
+Запуск из apps/backend:
+    python -m benchmarks.load_test --requests 40 --concurrency 4 --save benchmarks/baselines/generate_c4.json
+    python -m benchmarks.load_test --requests 40 --concurrency 4 --compare benchmarks/baselines/generate_c4.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import socket
+import sys
+import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from benchmarks.fake_ollama import FakeOllama
+
+# Метрики базы: для задержек хуже - больше, для пропускной способности - меньше
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms")
+HIGHER_IS_BETTER = ("throughput_rps",)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Перцентиль с линейной интерполяцией между соседними значениями."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def fake_ollama_server(fake: FakeOllama) -> AsyncIterator[str]:
+    """Поддельный Ollama на свободном порту; отдаёт его base URL."""
+    import uvicorn
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(fake, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        await asyncio.to_thread(thread.join)
+
+
+@asynccontextmanager
+async def in_process_backend(ollama_url: str, workdir: str) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Бэкенд внутри процесса. Настройки читаются при импорте src, поэтому
+    окружение задаётся до него; кэши выключены, чтобы каждый запрос проходил
+    весь пайплайн.
+    """
+    overrides = {
+        "OLLAMA_BASE_URL": ollama_url,
+        "OLLAMA_CACHE_ENABLED": "false",
+        "SEMANTIC_CACHE_ENABLED": "false",
+        "COMPONENT_LIBRARY_ENABLED": "false",
+        "DATABASE_URL": f"sqlite:///{workdir}/load_test.sqlite3",
+    }
+    previous = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+    try:
+        from src.main import app
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://backend", timeout=None) as client:
+                yield client
+    finally:
+        # Окружение процесса возвращается как было - настройки не утекают в последующие импорты
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+async def drive(client: httpx.AsyncClient, requests: int, concurrency: int, warmup: int) -> Dict[str, Any]:
+    """Отправляет requests запросов, держа concurrency одновременно."""
+    for i in range(warmup):
+        await client.post("/api/ai/generate", json={"prompt": f"Прогрев №{i}"})
+
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                response = await client.post("/api/ai/generate", json={"prompt": f"Создай кнопку №{i}"})
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - started
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == "200":
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "succeeded": len(latencies),
+        "statuses": statuses,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(latencies) / duration, 3) if duration else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Регрессии относительно базы: метрики, ухудшившиеся больше чем на tolerance."""
+    regressions = []
+    for key in LOWER_IS_BETTER:
+        if baseline.get(key) and current[key] > baseline[key] * (1 + tolerance):
+            regressions.append(f"{key}: {baseline[key]} -> {current[key]}")
+    for key in HIGHER_IS_BETTER:
+        if baseline.get(key) and current[key] < baseline[key] * (1 - tolerance):
+            regressions.append(f"{key}: {baseline[key]} -> {current[key]}")
+    if current["succeeded"] < current["requests"]:
+        regressions.append(f"неуспешные ответы: {current['statuses']}")
+    return regressions
+
+
+def print_report(result: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    print(f"Запросов: {result['requests']}, одновременно: {result['concurrency']}, коды: {result['statuses']}")
+    print(f"{'метрика':<16}{'сейчас':>12}" + (f"{'база':>12}{'изменение':>12}" if baseline else ""))
+    for key in LOWER_IS_BETTER + ("mean_ms", "max_ms") + HIGHER_IS_BETTER:
+        line = f"{key:<16}{result[key]:>12.2f}"
+        if baseline and baseline.get(key):
+            line += f"{baseline[key]:>12.2f}{result[key] / baseline[key] - 1:>+12.1%}"
+        print(line)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    fake_config = {
+        "latency": args.latency,
+        "token_latency": args.token_latency,
+        "prompt_latency": args.prompt_latency,
+        "load_delay": args.load_delay,
+        "max_loaded": args.max_loaded,
+    }
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=None) as client:
+            result = await drive(client, args.requests, args.concurrency, args.warmup)
+    else:
+        with tempfile.TemporaryDirectory() as workdir:
+            async with fake_ollama_server(FakeOllama(**fake_config)) as ollama_url:
+                async with in_process_backend(ollama_url, workdir) as client:
+                    result = await drive(client, args.requests, args.concurrency, args.warmup)
+
+    result["config"] = {"target": args.url or "in-process", **({} if args.url else {"fake_ollama": fake_config})}
+    result["environment"] = {"python": platform.python_version(), "platform": platform.platform()}
+    result["timestamp"] = datetime.now().isoformat(timespec="seconds")
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Адрес запущенного бэкенда; без него всё поднимается внутри процесса")
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.0, help="Поддельный Ollama: задержка на вызов, с")
+    parser.add_argument("--token-latency", type=float, default=0.001, help="Задержка на токен ответа, с")
+    parser.add_argument("--prompt-latency", type=float, default=0.0, help="Задержка на токен промпта, с")
+    parser.add_argument("--load-delay", type=float, default=0.0, help="Загрузка модели в память, с")
+    parser.add_argument("--max-loaded", type=int, default=1)
+    parser.add_argument("--save", help="Сохранить результат как JSON-базу")
+    parser.add_argument("--compare", help="Сравнить с JSON-базой")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Допустимое ухудшение (доля)")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    result = asyncio.run(run(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != result["config"] or baseline.get("concurrency") != result["concurrency"]:
+            print("Внимание: параметры прогона отличаются от базы - сравнение может быть некорректным")
+    print_report(result, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"База сохранена: {args.save}")
+
+    if baseline is not None:
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print(f"Регрессия больше {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"Регрессий нет (допуск {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
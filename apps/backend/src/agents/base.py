@@ -19,10 +19,15 @@
 
 import logging
 from abc import ABC, abstractmethod
-from typing import Optional, Any
+from typing import Any, Dict, List, Optional, Type
 
+from pydantic import BaseModel
+
+from ..core.metrics import agent_scope
 from ..services.ollama_service import OllamaService, TaskType
+from ..services.token_budget import CONTEXT_TOKENS_SAVED, compact_json, estimate_tokens
 from .schemas import AgentState
+from .events import field_callback, token_callback
 
 logger = logging.getLogger(__name__)
 
@@ -54,23 +59,97 @@ class BaseAgent(ABC):
         self,
         prompt: str,
         system_prompt: Optional[str] = None,
-        return_json: bool = False
+        return_json: bool = False,
+        schema: Optional[Type[BaseModel]] = None,
+        shared_context: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None
     ) -> Any:
-        """Вспомогательный метод для генерации ответа через Ollama."""
+        """
+        Вспомогательный метод для генерации ответа через Ollama.
+        schema - модель Pydantic, ограничивающая JSON-ответ (только с return_json).
+        shared_context - общий контекст прогона (см. shared_context()).
+        options - параметры модели для текстового ответа (temperature, seed).
+        """
+        # При потоковом запуске токены уходят подписчику по мере генерации
+        on_token = token_callback(self.name)
         try:
-            if return_json:
-                result = await self.ollama_service.generate_json(
-                    prompt=prompt,
-                    task_type=self.task_type,
-                    system_prompt=system_prompt or self.system_prompt
-                )
-            else:
-                result = await self.ollama_service.generate(
-                    prompt=prompt,
-                    task_type=self.task_type,
-                    system_prompt=system_prompt or self.system_prompt
-                )
+            # Вызовы модели в метриках помечаются именем агента
+            with agent_scope(self.name):
+                if return_json:
+                    result = await self.ollama_service.generate_json(
+                        prompt=prompt,
+                        task_type=self.task_type,
+                        system_prompt=system_prompt or self.system_prompt,
+                        on_token=on_token,
+                        schema=schema,
+                        shared_context=shared_context,
+                        on_field=field_callback(self.name)
+                    )
+                else:
+                    result = await self.ollama_service.generate(
+                        prompt=prompt,
+                        task_type=self.task_type,
+                        system_prompt=system_prompt or self.system_prompt,
+                        on_token=on_token,
+                        shared_context=shared_context,
+                        options=options
+                    )
             return result
         except Exception as e:
             logger.error(f"Агент '{self.name}': ошибка генерации - {e}")
-            raise
\ No newline at end of file
+            raise
+
+
+def shared_context(state: AgentState, include_design: bool = True, include_code: bool = False) -> str:
+    """
+    Общий для этапов блок контекста: запрос, требования, примеры принятых
+    компонентов из библиотеки, спецификация, уточнения сессии и (для ревью
+    и правок) текущий код. Части идут от стабильных к меняющимся,
+    сериализация каноническая (сортировка ключей), поэтому префикс побайтно
+    совпадает во всех вызовах прогона и раундах улучшения. JSON минифицирован
+    и без пустых полей (см. compact_json).
+    """
+    requirements = state.requirements_analysis or None
+    design = (state.component_design or None) if include_design else None
+    requirements_json, design_json = _serialize([requirements, design])
+    parts = [f"Запрос пользователя: {state.user_input}"]
+    if requirements:
+        parts.append("Требования:\n" + requirements_json)
+    examples = state.context.get("examples")
+    if examples:
+        parts.append(_format_examples(examples))
+    if design:
+        parts.append("Спецификация компонента:\n" + design_json)
+    refinements = [m["content"] for m in state.conversation_history if m.get("role") == "user"]
+    if refinements:
+        parts.append("Уточнения пользователя (по порядку, последнее - текущее):\n" + "\n".join(f"- {item}" for item in refinements))
+    if include_code and state.generated_code:
+        parts.append("Текущий код компонента:\n" + state.generated_code)
+    return "\n\n".join(parts)
+
+
+def _format_examples(examples: List[Dict[str, Any]]) -> str:
+    """Примеры принятых компонентов для дизайнера и генератора."""
+    blocks = ["Примеры принятых ранее компонентов (ориентир по структуре и стилю, не копируй дословно):"]
+    for example in examples:
+        props = ", ".join(example["props"]) or "нет"
+        blocks.append(f"### {example['name']} (пропсы: {props})\n```tsx\n{example['code'].strip()}\n```")
+    return "\n\n".join(blocks)
+
+
+def _serialize(blocks: List[Any]) -> List[str]:
+    """
+    Компактный JSON блоков контекста. Экономия считается против repr словаря,
+    который агенты подставляли в промпт до общего контекста, - на каждый
+    собранный контекст, т.е. на промпт (метрика context_json_tokens_saved_total).
+    """
+    texts = [compact_json(data) for data in blocks]
+    saved = sum(
+        estimate_tokens(str(data)) - estimate_tokens(text)
+        for data, text in zip(blocks, texts)
+        if data is not None
+    )
+    if saved > 0:
+        CONTEXT_TOKENS_SAVED.inc(saved)
+        logger.info(f"Контекст: ~{sum(map(estimate_tokens, texts))} токенов JSON, сэкономлено ~{saved}")
+    return texts
@@ -0,0 +1,209 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Пакетная генерация компонентов (наборы для дизайн-системы).
+Работа идёт по этапам, а не по запросам: сначала анализ требований для
+всех запросов (одна модель), затем дизайн, код и ревью для каждого
+уникального анализа (другая модель). Так модели в памяти меняются один раз
+на пакет, а не дважды на каждый запрос. Одинаковые запросы и совпадающие
+после нормализации анализы выполняются один раз, результат получают все
+их элементы. Результаты отдаются по мере готовности.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import re
+import time
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, List, Optional, Tuple
+
+from .schemas import AgentState
+from ..services.admission import AdmissionController, Priority
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Запрос без различий в регистре, пробелах и завершающей пунктуации."""
+    return re.sub(r"\s+", " ", prompt).strip().strip(".!").lower()
+
+
+def analysis_key(state: AgentState) -> Optional[str]:
+    """
+    Ключ совпадения анализов: канонический JSON с нормализованными строками
+    и отсортированными списками. None - анализ не получен, объединять нечего.
+    """
+    if not state.requirements_analysis:
+        return None
+
+    def normalize(value: Any) -> Any:
+        if isinstance(value, str):
+            return normalize_prompt(value)
+        if isinstance(value, list):
+            return sorted((normalize(item) for item in value), key=lambda item: json.dumps(item, sort_keys=True))
+        if isinstance(value, dict):
+            return {key: normalize(item) for key, item in value.items()}
+        return value
+
+    return json.dumps(normalize(state.requirements_analysis), ensure_ascii=False, sort_keys=True)
+
+
+class BatchGenerator:
+    """
+    Пакетный запуск воркфлоу с ограниченным параллелизмом.
+    Каждая единица работы (анализ или доводка прогона) дополнительно
+    проходит контроль допуска процесса с указанным приоритетом.
+    """
+
+    def __init__(
+        self,
+        workflow,
+        admission: Optional[AdmissionController] = None,
+        concurrency: int = 2,
+        priority: Priority = Priority.BATCH
+    ):
+        self.workflow = workflow
+        self.admission = admission
+        self.priority = priority
+        self._semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    @contextlib.asynccontextmanager
+    async def _slot(self) -> AsyncIterator[None]:
+        async with self._semaphore:
+            if self.admission is None:
+                yield
+                return
+            async with self.admission.admit(self.priority):
+                yield
+
+    async def _analyze(self, prompt: str) -> Tuple[AgentState, Optional[List[float]]]:
+        async with self._slot():
+            return await self.workflow.analyze(prompt)
+
+    async def _complete(
+        self,
+        state: AgentState,
+        vector: Optional[List[float]],
+        indices: List[int]
+    ) -> Tuple[List[int], Optional[Dict[str, Any]], Optional[str]]:
+        try:
+            async with self._slot():
+                result = await self.workflow.continue_from(state, vector)
+            return indices, result, None
+        except Exception as e:
+            logger.error(f"Пакет: ошибка прогона для элементов {indices} - {e}")
+            return indices, None, str(e)
+
+    async def stream(self, prompts: List[str]) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        События пакета:
+        analysis_complete - анализы готовы, известно число уникальных прогонов;
+        item / item_error - результат элемента (по мере готовности);
+        batch_complete - итоговая статистика.
+        """
+        started = time.perf_counter()
+
+        # Одинаковые запросы анализируются один раз
+        by_prompt: Dict[str, List[int]] = {}
+        for index, prompt in enumerate(prompts):
+            by_prompt.setdefault(normalize_prompt(prompt), []).append(index)
+        prompt_groups = list(by_prompt.values())
+
+        # Этап 1: все анализы подряд - модель анализатора загружается один раз
+        analyses = await asyncio.gather(
+            *(self._analyze(prompts[indices[0]]) for indices in prompt_groups),
+            return_exceptions=True,
+        )
+
+        failed = unanalyzed = 0
+        groups: Dict[str, Tuple[AgentState, Optional[List[float]], List[int]]] = {}
+        for indices, analysis in zip(prompt_groups, analyses):
+            detail = None
+            if isinstance(analysis, BaseException):
+                detail = str(analysis)
+            else:
+                state, vector = analysis
+                if state.errors or not state.requirements_analysis:
+                    # Без анализа дизайн и код не имеют смысла - прогон не доводится
+                    detail = "; ".join(state.errors) or "Анализ требований не получен"
+                    await self.workflow.discard(state.run_id)
+            if detail is not None:
+                failed += len(indices)
+                unanalyzed += len(indices)
+                for index in indices:
+                    yield {"event": "item_error", "index": index, "prompt": prompts[index], "detail": detail}
+                continue
+            key = analysis_key(state)
+            if key in groups:
+                # Элементы получат результат ведущего прогона, свой чекпоинт не нужен
+                groups[key][2].extend(indices)
+                await self.workflow.discard(state.run_id)
+            else:
+                groups[key] = (state, vector, list(indices))
+
+        yield {
+            "event": "analysis_complete",
+            "items": len(prompts),
+            "unique_prompts": len(prompt_groups),
+            "pipelines": len(groups),
+        }
+
+        # Этап 2: дизайн, код и ревью по уникальным анализам, результаты - по готовности
+        tasks = [asyncio.create_task(self._complete(*group)) for group in groups.values()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                indices, result, error = await next_done
+                leader = min(indices)
+                for index in sorted(indices):
+                    if error is not None:
+                        failed += 1
+                        yield {"event": "item_error", "index": index, "prompt": prompts[index], "detail": error}
+                        continue
+                    yield {
+                        "event": "item",
+                        "index": index,
+                        "prompt": prompts[index],
+                        "shared_with": leader if index != leader else None,
+                        "data": result,
+                    }
+        finally:
+            # Клиент мог отключиться - не оставляем прогоны в фоне
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            for task in tasks:
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+
+        yield {
+            "event": "batch_complete",
+            "items": len(prompts),
+            "succeeded": len(prompts) - failed,
+            "failed": failed,
+            "pipelines": len(groups),
+            # Элементы, получившие чужой результат вместо собственного прогона
+            "coalesced": len(prompts) - unanalyzed - len(groups),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+
+def create_batch_generator(
+    workflow,
+    admission: Optional[AdmissionController] = None,
+    concurrency: int = 2,
+    priority: Priority = Priority.BATCH
+) -> BatchGenerator:
+    return BatchGenerator(workflow, admission, concurrency, priority)
@@ -0,0 +1,185 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Выбор лучшего из N кандидатов кода (режим CODE_SELECTION_MODE=best_of_n).
+Вместо последовательных раундов «генерация -> ревью -> улучшение» генератор
+сразу пишет N вариантов с разными temperature и seed: при нескольких слотах
+или узлах Ollama они идут одновременно. Кандидаты ранжируются статической
+проверкой (без модели), LLM-ревьюер параллельно оценивает только финалистов,
+и побеждает лучший по оценке ревью.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .events import candidate_scope, emit
+from .schemas import AgentState
+from .static_review import VERDICT_LLM_REVIEW, VERDICT_REGENERATE, VERDICT_SKIP_LLM, StaticReview, analyze_tsx
+
+logger = logging.getLogger(__name__)
+
+# Режимы выбора кода (CODE_SELECTION_MODE)
+CODE_SELECTION_SERIAL = "serial"
+CODE_SELECTION_BEST_OF_N = "best_of_n"
+
+_VERDICT_RANK = {VERDICT_SKIP_LLM: 2, VERDICT_LLM_REVIEW: 1, VERDICT_REGENERATE: 0}
+
+
+def static_rank(review: StaticReview) -> Tuple[int, int, int, int]:
+    """Ключ ранжирования по статической проверке: больше - лучше."""
+    severities = [issue.severity for issue in review.issues]
+    return (
+        _VERDICT_RANK.get(review.verdict, 0),
+        -severities.count("critical"),
+        -severities.count("major"),
+        -severities.count("minor"),
+    )
+
+
+class CandidateSelector:
+    """
+    Узел best-of-N в графе: генерация кандидатов, статический отбор,
+    LLM-ревью финалистов и выбор победителя.
+    Особенности:
+    - Кандидат i получает temperature из temperatures (по кругу) и seed=i
+    - Кандидаты с критичными замечаниями статической проверки до ревьюера не доходят;
+      со skip_llm чистый по статической проверке лучший кандидат ревью не ждёт
+    - Ошибка одного кандидата не срывает этап, пока есть хотя бы один код
+    """
+
+    name = "candidate_selector"
+
+    def __init__(
+        self,
+        generator,
+        reviewer,
+        candidates: int = 3,
+        finalists: int = 2,
+        temperatures: Sequence[float] = (0.3, 0.7, 1.0),
+        skip_llm: bool = False
+    ):
+        self.generator = generator
+        self.reviewer = reviewer
+        self.candidates = max(1, candidates)
+        self.finalists = max(1, finalists)
+        self.temperatures = list(temperatures) or [0.7]
+        self.skip_llm = skip_llm
+        self.stats: Dict[str, int] = {
+            "runs": 0, "candidates": 0, "failed": 0, "static_rejected": 0, "llm_reviews": 0
+        }
+
+    def candidate_options(self, index: int) -> Dict[str, Any]:
+        return {"temperature": self.temperatures[index % len(self.temperatures)], "seed": index}
+
+    async def _generate(self, state: AgentState, index: int) -> str:
+        with candidate_scope(index):
+            return await self.generator.generate_candidate(state, self.candidate_options(index))
+
+    async def _review(self, state: AgentState, candidate: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """LLM-ревью финалиста на копии состояния; None - ревью не получено."""
+        copy = state.model_copy(update={
+            "generated_code": candidate["code"],
+            "static_review": candidate["static"].model_dump(exclude={"cleaned_code"}),
+            "code_review": None,
+            "errors": [],
+        })
+        with candidate_scope(candidate["index"]):
+            reviewed = await self.reviewer.process(copy)
+        if reviewed.errors:
+            logger.warning(f"Best-of-N: ревью кандидата {candidate['index']} не получено - {reviewed.errors[-1]}")
+        return reviewed.code_review if isinstance(reviewed.code_review, dict) else None
+
+    async def process(self, state: AgentState) -> AgentState:
+        self.stats["runs"] += 1
+        results = await asyncio.gather(
+            *(self._generate(state, index) for index in range(self.candidates)),
+            return_exceptions=True
+        )
+
+        candidates: List[Dict[str, Any]] = []
+        errors: List[str] = []
+        for index, result in enumerate(results):
+            self.stats["candidates"] += 1
+            if isinstance(result, Exception):
+                self.stats["failed"] += 1
+                errors.append(str(result))
+                continue
+            static = analyze_tsx(result, state.component_design)
+            candidates.append({"index": index, "code": static.cleaned_code or result, "static": static, "review": None})
+            await emit("candidate_checked", index=index, verdict=static.verdict, issues=len(static.issues))
+
+        if not candidates:
+            # Кода нет: code_generated не ставим, чтобы ни ревью, ни результат не приняли прогон за удачный
+            state.errors.append(f"Ошибка генератора: не получен ни один из {self.candidates} кандидатов ({errors[0]})")
+            return state
+
+        # Сортировка устойчивая: при равном ранге раньше идёт кандидат с меньшей temperature
+        candidates.sort(key=lambda c: static_rank(c["static"]), reverse=True)
+        finalists = [c for c in candidates[:self.finalists] if c["static"].verdict != VERDICT_REGENERATE]
+        if self.skip_llm and candidates[0]["static"].verdict == VERDICT_SKIP_LLM:
+            finalists = []
+        self.stats["static_rejected"] += sum(1 for c in candidates if c["static"].verdict == VERDICT_REGENERATE)
+
+        reviews = await asyncio.gather(*(self._review(state, c) for c in finalists))
+        self.stats["llm_reviews"] += len(finalists)
+        for candidate, review in zip(finalists, reviews):
+            candidate["review"] = review
+
+        def score(candidate: Dict[str, Any]) -> Tuple[int, Tuple[int, int, int, int]]:
+            review = candidate["review"] or {}
+            quality = review.get("quality_score")
+            return (quality if isinstance(quality, int) else -1, static_rank(candidate["static"]))
+
+        best = max(candidates, key=score)
+        static = best["static"]
+        state.generated_code = best["code"]
+        state.code_language = "tsx"
+        state.code_generated = True
+        state.iteration_count += 1
+        state.static_review = static.model_dump(exclude={"cleaned_code"})
+        if static.component_name:
+            state.component_name = static.component_name
+        state.code_review = best["review"] or static.to_review()
+        state.code_reviewed = True
+        # Новый словарь, а не правка на месте: граф замечает изменения по идентичности
+        state.context = {**state.context, "candidates": [
+            {
+                "index": c["index"],
+                **self.candidate_options(c["index"]),
+                "static_verdict": c["static"].verdict,
+                "static_issues": len(c["static"].issues),
+                "quality_score": (c["review"] or {}).get("quality_score"),
+                "selected": c is best,
+            }
+            for c in sorted(candidates, key=lambda c: c["index"])
+        ]}
+        await emit("candidate_selected", index=best["index"], quality_score=state.code_review.get("quality_score"))
+        logger.info(f"Best-of-N: выбран кандидат {best['index']} из {len(candidates)}, финалистов {len(finalists)}")
+        return state
+
+    def snapshot(self) -> Dict[str, int]:
+        return dict(self.stats)
+
+
+def create_candidate_selector(
+    generator,
+    reviewer,
+    candidates: int = 3,
+    finalists: int = 2,
+    temperatures: Sequence[float] = (0.3, 0.7, 1.0),
+    skip_llm: bool = False
+):
+    return CandidateSelector(generator, reviewer, candidates, finalists, temperatures, skip_llm)
@@ -12,33 +12,51 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+
 """
 Агент генератора кода.
 Создаёт функциональный код компонентов на основе анализа требований.
 """
 
-from .base import BaseAgent
+import logging
+from typing import Any, Dict, List, Optional
+
+from .base import BaseAgent, shared_context
 from .schemas import AgentState
-from .prompts import CODE_GENERATOR_SYSTEM_PROMPT
+from .patching import PatchError, apply_patch
+from .prompts import CODE_GENERATOR_SYSTEM_PROMPT, CODE_PATCHER_SYSTEM_PROMPT
+from ..core.config import settings
 from ..services.ollama_service import TaskType
 
+logger = logging.getLogger(__name__)
+
 class CodeGeneratorAgent(BaseAgent):
-    """Агент для генерации кода компонентов."""
+    """
+    Агент для генерации кода компонентов.
+    В раундах улучшения модель получает текущий код и замечания ревью и
+    возвращает только правки; если их не удаётся применить, компонент
+    генерируется заново (настройка CODE_PATCH_IMPROVEMENT).
+    """
 
-    def __init__(self, ollama_service):
+    def __init__(self, ollama_service, patch_mode: Optional[bool] = None):
         super().__init__(
             ollama_service=ollama_service,
             name="code_generator",
             task_type=TaskType.CODE_GENERATION,
             system_prompt=CODE_GENERATOR_SYSTEM_PROMPT
         )
+        self.patch_mode = settings.CODE_PATCH_IMPROVEMENT if patch_mode is None else patch_mode
+        self.stats: Dict[str, int] = {"generated": 0, "patched": 0, "patch_failures": 0}
 
     async def process(self, state: AgentState) -> AgentState:
         """Процесс генерации кода."""
         try:
-            design_context = state.component_design or state.requirements_analysis
-            prompt = f"Сгенерируй код на основе: {design_context}"
-            code = await self._generate_response(prompt)
+            findings = self._review_findings(state.code_review)
+            code = None
+            if self.patch_mode and state.generated_code and findings:
+                code = await self._improve_with_patch(state, findings)
+            if code is None:
+                code = await self._generate_full(state, findings)
 
             state.generated_code = code
             state.code_language = "tsx"
@@ -51,5 +69,60 @@ class CodeGeneratorAgent(BaseAgent):
 
         return state
 
-def create_code_generator(ollama_service):
-    return CodeGeneratorAgent(ollama_service)
\ No newline at end of file
+    async def _generate_full(self, state: AgentState, findings: List[str]) -> str:
+        """Полная генерация; в раунде улучшения - с учётом замечаний ревью."""
+        prompt = "Сгенерируй код компонента по спецификации из контекста."
+        if findings:
+            prompt += "\n\nИсправь замечания ревью:\n" + "\n".join(f"- {item}" for item in findings)
+        self.stats["generated"] += 1
+        return await self._generate_response(prompt, shared_context=shared_context(state))
+
+    async def generate_candidate(self, state: AgentState, options: Dict[str, Any]) -> str:
+        """
+        Один кандидат для режима best-of-N: полная генерация с заданными
+        temperature и seed (см. CandidateSelector).
+        """
+        self.stats["generated"] += 1
+        return await self._generate_response(
+            "Сгенерируй код компонента по спецификации из контекста.",
+            shared_context=shared_context(state),
+            options=options
+        )
+
+    async def _improve_with_patch(self, state: AgentState, findings: List[str]) -> Optional[str]:
+        """Правки по замечаниям ревью; None - правку применить не удалось."""
+        code = state.generated_code
+        prompt = "Замечания ревью к текущему коду:\n" + "\n".join(f"- {item}" for item in findings)
+        patch = await self._generate_response(
+            prompt,
+            system_prompt=CODE_PATCHER_SYSTEM_PROMPT,
+            shared_context=shared_context(state, include_code=True)
+        )
+        try:
+            patched = apply_patch(code, patch)
+        except PatchError as e:
+            logger.warning(f"Агент '{self.name}': правка не применилась ({e}), полная генерация")
+            self.stats["patch_failures"] += 1
+            return None
+        self.stats["patched"] += 1
+        return patched
+
+    @staticmethod
+    def _review_findings(review: Optional[Dict[str, Any]]) -> List[str]:
+        """Замечания и предложения ревью в виде списка строк."""
+        if not isinstance(review, dict):
+            return []
+        findings = []
+        for issue in review.get("issues") or []:
+            if isinstance(issue, dict):
+                description = issue.get("description") or issue.get("message")
+                if description:
+                    findings.append(f"[{issue.get('severity', 'minor')}] {description}")
+            elif issue:
+                findings.append(str(issue))
+        for key in ("suggestions", "security_concerns", "accessibility_issues"):
+            findings.extend(str(item) for item in review.get(key) or [] if item)
+        return findings
+
+def create_code_generator(ollama_service, patch_mode: Optional[bool] = None):
+    return CodeGeneratorAgent(ollama_service, patch_mode=patch_mode)
@@ -17,8 +17,8 @@
 Анализирует сгенерированный код и выявляет проблемы.
 """
 
-from .base import BaseAgent
-from .schemas import AgentState
+from .base import BaseAgent, shared_context
+from .schemas import AgentState, CodeReview
 from .prompts import CODE_REVIEWER_SYSTEM_PROMPT
 from ..services.ollama_service import TaskType
 
@@ -39,12 +39,23 @@ class CodeReviewerAgent(BaseAgent):
             if not state.generated_code:
                 raise ValueError("Нет сгенерированного кода")
 
-            prompt = f"Проведи ревью кода: {state.generated_code}"
-            review = await self._generate_response(prompt, return_json=True)
+            # Код - последняя часть общего контекста: следующий за ревью вызов правки читает тот же префикс
+            prompt = "Проведи ревью текущего кода на соответствие спецификации из контекста."
+            # Замечания статической проверки - подсказка ревьюеру, где смотреть
+            static_issues = (state.static_review or {}).get("issues") or []
+            if static_issues:
+                prompt += "\n\nЗамечания статической проверки:\n" + "\n".join(
+                    f"- {issue['description']}" for issue in static_issues
+                )
+            review = await self._generate_response(
+                prompt,
+                return_json=True,
+                schema=CodeReview,
+                shared_context=shared_context(state, include_code=True)
+            )
 
             state.code_review = review
             state.code_reviewed = True
-            state.iteration_count += 1
 
         except Exception as e:
             state.errors.append(f"Ошибка ревьюера: {e}")
@@ -17,8 +17,8 @@
 Создаёт детальную спецификацию архитектуры компонента.
 """
 
-from .base import BaseAgent
-from .schemas import AgentState
+from .base import BaseAgent, shared_context
+from .schemas import AgentState, ComponentDesign
 from .prompts import COMPONENT_DESIGNER_SYSTEM_PROMPT
 from ..services.ollama_service import TaskType
 
@@ -39,12 +39,16 @@ class ComponentDesignerAgent(BaseAgent):
             if not state.requirements_analysis:
                 raise ValueError("Нет анализа требований")
 
-            prompt = f"Спроектируй компонент на основе: {state.requirements_analysis}"
-            design_spec = await self._generate_response(prompt, return_json=True)
+            prompt = "Спроектируй компонент по требованиям из контекста."
+            design_spec = await self._generate_response(
+                prompt,
+                return_json=True,
+                schema=ComponentDesign,
+                shared_context=shared_context(state, include_design=False)
+            )
 
             state.component_design = design_spec
             state.design_complete = True
-            state.iteration_count += 1
 
         except Exception as e:
             state.errors.append(f"Ошибка дизайнера: {e}")
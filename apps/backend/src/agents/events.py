@@ -0,0 +1,89 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+События выполнения воркфлоу.
+Узлы графа и агенты публикуют события (начало этапа, токены, завершение этапа)
+в очередь текущего запуска, если она установлена. Без подписчика события
+просто отбрасываются, поэтому обычный (не потоковый) запуск ничего не платит.
+"""
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from ..services.ollama_service import FieldCallback, TokenCallback
+
+# Очередь событий текущего запуска воркфлоу
+_event_sink: ContextVar[Optional[asyncio.Queue]] = ContextVar("workflow_event_sink", default=None)
+# Номер кандидата best-of-N, который генерируется в текущем контексте
+_candidate: ContextVar[Optional[int]] = ContextVar("workflow_candidate", default=None)
+
+
+@contextmanager
+def event_sink(queue: asyncio.Queue) -> Iterator[asyncio.Queue]:
+    """Направляет события текущего контекста в очередь."""
+    token = _event_sink.set(queue)
+    try:
+        yield queue
+    finally:
+        _event_sink.reset(token)
+
+
+@contextmanager
+def candidate_scope(index: int) -> Iterator[None]:
+    """Помечает токены вызовов в контексте номером кандидата: кандидаты генерируются параллельно."""
+    token = _candidate.set(index)
+    try:
+        yield
+    finally:
+        _candidate.reset(token)
+
+
+def has_subscriber() -> bool:
+    """Есть ли получатель событий в текущем контексте."""
+    return _event_sink.get() is not None
+
+
+async def emit(event: str, **data: Any) -> None:
+    """Публикует событие, если у запуска есть подписчик."""
+    queue = _event_sink.get()
+    if queue is not None:
+        payload: Dict[str, Any] = {"event": event, **data}
+        await queue.put(payload)
+
+
+def token_callback(stage: str) -> Optional[TokenCallback]:
+    """Колбэк для OllamaService, публикующий токены этапа; None без подписчика."""
+    if not has_subscriber():
+        return None
+    candidate = _candidate.get()
+    extra = {} if candidate is None else {"candidate": candidate}
+
+    async def on_token(content: str) -> None:
+        await emit("token", stage=stage, content=content, **extra)
+
+    return on_token
+
+
+def field_callback(stage: str) -> Optional[FieldCallback]:
+    """Колбэк, публикующий законченные поля JSON-ответа этапа до конца вызова; None без подписчика."""
+    if not has_subscriber():
+        return None
+
+    async def on_field(name: str, value: Any) -> None:
+        await emit("field", stage=stage, name=name, value=value)
+
+    return on_field
@@ -0,0 +1,151 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Применение правок к сгенерированному коду.
+Модель в режиме улучшения возвращает не весь компонент, а правки -
+блоки SEARCH/REPLACE или unified diff. Если правку нельзя применить
+однозначно, выбрасывается PatchError и вызывающий код перегенерирует компонент.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+SEARCH_MARKER = "<<<<<<< SEARCH"
+DIVIDER_MARKER = "======="
+REPLACE_MARKER = ">>>>>>> REPLACE"
+
+_FENCE_RE = re.compile(r"^```[\w+-]*\s*$")
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,\d+)? \+\d+(?:,\d+)? @@")
+
+
+class PatchError(Exception):
+    """Правку нельзя применить к текущему коду."""
+
+
+def apply_patch(source: str, patch: str) -> str:
+    """Применяет правки в формате SEARCH/REPLACE или unified diff."""
+    patch = _strip_fences(patch)
+    if SEARCH_MARKER in patch:
+        return apply_search_replace(source, patch)
+    if re.search(r"^@@ ", patch, re.MULTILINE):
+        return apply_unified_diff(source, patch)
+    raise PatchError("Ответ не содержит правок")
+
+
+def apply_search_replace(source: str, patch: str) -> str:
+    """Применяет блоки SEARCH/REPLACE по порядку."""
+    blocks = _parse_search_replace(patch)
+    if not blocks:
+        raise PatchError("Не найдено ни одного блока SEARCH/REPLACE")
+
+    lines = source.splitlines()
+    for search, replace in blocks:
+        if not search:
+            raise PatchError("Пустой блок SEARCH")
+        start = _find_block(lines, search, hint=None)
+        lines[start:start + len(search)] = replace
+    return "\n".join(lines) + ("\n" if source.endswith("\n") else "")
+
+
+def apply_unified_diff(source: str, patch: str) -> str:
+    """Применяет hunk'и unified diff; номера строк - только подсказка для поиска."""
+    hunks = _parse_unified_diff(patch)
+    if not hunks:
+        raise PatchError("Не найдено ни одного hunk'а")
+
+    lines = source.splitlines()
+    offset = 0
+    for start_hint, old, new in hunks:
+        if not old:
+            # Чистая вставка: позиция берётся из заголовка
+            position = min(max(start_hint + offset, 0), len(lines))
+        else:
+            position = _find_block(lines, old, hint=start_hint + offset)
+        lines[position:position + len(old)] = new
+        offset += len(new) - len(old)
+    return "\n".join(lines) + ("\n" if source.endswith("\n") else "")
+
+
+def _strip_fences(text: str) -> str:
+    return "\n".join(line for line in text.strip().splitlines() if not _FENCE_RE.match(line.strip()))
+
+
+def _parse_search_replace(patch: str) -> List[Tuple[List[str], List[str]]]:
+    blocks = []
+    search: Optional[List[str]] = None
+    replace: Optional[List[str]] = None
+    for line in patch.splitlines():
+        marker = line.strip()
+        if marker == SEARCH_MARKER:
+            search, replace = [], None
+        elif marker == DIVIDER_MARKER and search is not None and replace is None:
+            replace = []
+        elif marker == REPLACE_MARKER and replace is not None:
+            blocks.append((search, replace))
+            search, replace = None, None
+        elif replace is not None:
+            replace.append(line)
+        elif search is not None:
+            search.append(line)
+    if search is not None:
+        raise PatchError("Незакрытый блок SEARCH/REPLACE")
+    return blocks
+
+
+def _parse_unified_diff(patch: str) -> List[Tuple[int, List[str], List[str]]]:
+    hunks = []
+    current = None
+    for line in patch.splitlines():
+        header = _HUNK_RE.match(line)
+        if header:
+            # В заголовке строки нумеруются с 1
+            current = (int(header.group(1)) - 1, [], [])
+            hunks.append(current)
+            continue
+        if current is None or line.startswith(("---", "+++", "\\")):
+            continue
+        _, old, new = current
+        if line.startswith("-"):
+            old.append(line[1:])
+        elif line.startswith("+"):
+            new.append(line[1:])
+        else:
+            # Строка контекста; модели часто теряют ведущий пробел
+            text = line[1:] if line.startswith(" ") else line
+            old.append(text)
+            new.append(text)
+    return [(max(start, 0), old, new) for start, old, new in hunks]
+
+
+def _find_block(lines: List[str], block: List[str], hint: Optional[int]) -> int:
+    """
+    Позиция блока в коде. Сначала точное совпадение, затем без учёта отступов.
+    Из нескольких совпадений берётся ближайшее к подсказке; без подсказки
+    несколько совпадений считаются неоднозначностью.
+    """
+    for normalize in (str.rstrip, str.strip):
+        target = [normalize(line) for line in block]
+        normalized = [normalize(line) for line in lines]
+        matches = [
+            i for i in range(len(lines) - len(block) + 1)
+            if normalized[i:i + len(block)] == target
+        ]
+        if len(matches) == 1:
+            return matches[0]
+        if matches:
+            if hint is None:
+                raise PatchError(f"Фрагмент встречается в коде {len(matches)} раз")
+            return min(matches, key=lambda i: abs(i - hint))
+    raise PatchError("Фрагмент для замены не найден в коде")
@@ -23,6 +23,19 @@ REQUIREMENTS_ANALYZER_SYSTEM_PROMPT = """
 Если запрос на русском - отвечай на русском.
 """
 
+# Один вызов вместо двух: текстовое резюме и структура анализа в одном JSON
+REQUIREMENTS_SINGLE_CALL_INSTRUCTION = """
+Верни один JSON-объект с полями:
+- summary: краткий анализ требований обычным текстом (2-5 предложений)
+- component_type: тип компонента (например, Button)
+- purpose: назначение компонента
+- features: список функций
+- styling_requirements: список требований к стилю
+- technical_requirements: список технических требований
+- accessibility_notes: список требований доступности
+- dependencies: список зависимостей
+"""
+
 COMPONENT_DESIGNER_SYSTEM_PROMPT = """
 Ты - эксперт по дизайну React-компонентов.
 Создай детальную спецификацию с пропсами, вариантами, слотами и Tailwind CSS классами.
@@ -33,6 +46,19 @@ CODE_GENERATOR_SYSTEM_PROMPT = """
 Следуй точно спецификации дизайнера. Генерируй только код без пояснений.
 """
 
+# Режим улучшения: модель правит существующий код вместо полной перегенерации
+CODE_PATCHER_SYSTEM_PROMPT = """
+Ты - эксперт по правке кода на React, TypeScript и Tailwind CSS.
+Исправь только указанные замечания и не переписывай остальной код.
+Верни только правки в формате (блоков может быть несколько):
+<<<<<<< SEARCH
+точные строки из текущего кода
+=======
+новые строки
+>>>>>>> REPLACE
+Фрагмент SEARCH должен однозначно встречаться в коде. Без пояснений.
+"""
+
 CODE_REVIEWER_SYSTEM_PROMPT = """
 Ты - эксперт по ревью кода.
 Проверь качество, безопасность, производительность и соответствие спецификации.
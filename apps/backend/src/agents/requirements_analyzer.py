@@ -18,36 +18,41 @@
 """
 
 from .base import BaseAgent
-from .schemas import AgentState
-from .prompts import REQUIREMENTS_ANALYZER_SYSTEM_PROMPT
+from .schemas import AgentState, RequirementsAnalysis, RequirementsAnalysisResult
+from .prompts import REQUIREMENTS_ANALYZER_SYSTEM_PROMPT, REQUIREMENTS_SINGLE_CALL_INSTRUCTION
+from ..core.config import settings
 from ..services.ollama_service import TaskType
-from typing import Any
+from typing import Any, Dict, Optional, Tuple
 
 class RequirementsAnalyzerAgent(BaseAgent):
-    """Агент для анализа требований к компонентам."""
+    """
+    Агент для анализа требований к компонентам.
+    По умолчанию текстовый анализ и его JSON-структура получаются одним вызовом;
+    прежний режим из двух вызовов включается через single_call=False
+    (настройка REQUIREMENTS_SINGLE_CALL).
+    """
 
-    def __init__(self, ollama_service):
+    def __init__(self, ollama_service, single_call: Optional[bool] = None):
         super().__init__(
             ollama_service=ollama_service,
             name="requirements_analyzer",
             task_type=TaskType.REQUIREMENTS_ANALYSIS,
             system_prompt=REQUIREMENTS_ANALYZER_SYSTEM_PROMPT
         )
+        self.single_call = settings.REQUIREMENTS_SINGLE_CALL if single_call is None else single_call
 
     async def process(self, state: AgentState) -> AgentState:
         """Процесс анализа требований."""
         try:
             prompt = f"Проанализируй запрос: {state.user_input}"
-            analysis_text = await self._generate_response(prompt)
-            analysis_json = await self._generate_response(
-                f"Создай JSON из анализа: {analysis_text}",
-                return_json=True
-            )
+            if self.single_call:
+                analysis_text, analysis_json = await self._analyze_single_call(prompt)
+            else:
+                analysis_text, analysis_json = await self._analyze_two_calls(prompt)
 
             state.requirements = analysis_text
             state.requirements_analysis = analysis_json
             state.requirements_complete = True
-            state.iteration_count += 1
 
         except Exception as e:
             state.errors.append(f"Ошибка анализатора: {e}")
@@ -55,5 +60,41 @@ class RequirementsAnalyzerAgent(BaseAgent):
 
         return state
 
-def create_requirements_analyzer(ollama_service):
-    return RequirementsAnalyzerAgent(ollama_service)
\ No newline at end of file
+    async def _analyze_single_call(self, prompt: str) -> Tuple[str, Dict[str, Any]]:
+        """Один структурированный вызов: резюме и анализ приходят вместе."""
+        result = await self._generate_response(
+            prompt,
+            system_prompt=self.system_prompt + REQUIREMENTS_SINGLE_CALL_INSTRUCTION,
+            return_json=True,
+            schema=RequirementsAnalysisResult
+        )
+        analysis = dict(result)
+        summary = analysis.pop("summary", None)
+        if not isinstance(summary, str) or not summary.strip():
+            summary = self._summarize(analysis)
+        return summary, analysis
+
+    async def _analyze_two_calls(self, prompt: str) -> Tuple[str, Dict[str, Any]]:
+        """Прежний режим: свободный текст, затем отдельный вызов для JSON."""
+        analysis_text = await self._generate_response(prompt)
+        analysis_json = await self._generate_response(
+            f"Создай JSON из анализа: {analysis_text}",
+            return_json=True,
+            schema=RequirementsAnalysis
+        )
+        return analysis_text, analysis_json
+
+    @staticmethod
+    def _summarize(analysis: Dict[str, Any]) -> str:
+        """Текстовое резюме из структуры, если модель не вернула summary."""
+        parts = []
+        if analysis.get("component_type"):
+            parts.append(f"Компонент: {analysis['component_type']}.")
+        if analysis.get("purpose"):
+            parts.append(f"Назначение: {analysis['purpose']}.")
+        if analysis.get("features"):
+            parts.append("Функции: " + ", ".join(map(str, analysis["features"])) + ".")
+        return " ".join(parts)
+
+def create_requirements_analyzer(ollama_service, single_call: Optional[bool] = None):
+    return RequirementsAnalyzerAgent(ollama_service, single_call=single_call)
\ No newline at end of file
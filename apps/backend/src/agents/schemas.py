@@ -17,11 +17,71 @@
 Определяют структуру данных, передаваемых между агентами.
 """
 
-from typing import List, Dict, Optional, Any
+import operator
+from typing import Annotated, Callable, List, Dict, Optional, Any, TypedDict, Union
 from pydantic import BaseModel, Field
 from datetime import datetime
 
 
+# Структуры ответов агентов. Из них строятся JSON Schema для параметра
+# format в Ollama, и в них же валидируются ответы модели.
+
+class RequirementsAnalysis(BaseModel):
+    """Структурированный анализ требований."""
+    component_type: str = Field(..., description="Тип компонента, например Button")
+    purpose: str = Field(default="")
+    features: List[str] = Field(default_factory=list)
+    styling_requirements: List[str] = Field(default_factory=list)
+    technical_requirements: List[str] = Field(default_factory=list)
+    accessibility_notes: List[str] = Field(default_factory=list)
+    dependencies: List[str] = Field(default_factory=list)
+
+
+class RequirementsAnalysisResult(RequirementsAnalysis):
+    """Ответ анализатора в режиме одного вызова: анализ и текстовое резюме."""
+    summary: str = Field(default="", description="Краткий анализ обычным текстом")
+
+
+class PropSpec(BaseModel):
+    """Описание одного пропса компонента."""
+    type: str = Field(default="any")
+    required: Union[bool, str] = Field(default=False)
+    default: Optional[Any] = Field(default=None)
+    description: str = Field(default="")
+
+
+class ComponentDesign(BaseModel):
+    """Спецификация компонента от дизайнера."""
+    name: str = Field(..., description="Имя компонента в PascalCase")
+    description: str = Field(default="")
+    props: Dict[str, PropSpec] = Field(default_factory=dict)
+    variants: Dict[str, List[str]] = Field(default_factory=dict)
+    slots: List[str] = Field(default_factory=list)
+    states: List[str] = Field(default_factory=list)
+    tailwind_classes: Dict[str, Any] = Field(default_factory=dict)
+    example_usage: str = Field(default="")
+    architecture_notes: List[str] = Field(default_factory=list)
+
+
+class ReviewIssue(BaseModel):
+    """Замечание ревьюера."""
+    severity: str = Field(default="minor")
+    category: str = Field(default="")
+    description: str = Field(...)
+
+
+class CodeReview(BaseModel):
+    """Результат ревью кода."""
+    quality_score: int = Field(..., ge=0, le=10)
+    issues: List[ReviewIssue] = Field(default_factory=list)
+    suggestions: List[str] = Field(default_factory=list)
+    best_practices_violated: List[str] = Field(default_factory=list)
+    security_concerns: List[str] = Field(default_factory=list)
+    performance_notes: List[str] = Field(default_factory=list)
+    accessibility_issues: List[str] = Field(default_factory=list)
+    specification_compliance: str = Field(default="")
+
+
 class AgentState(BaseModel):
     """Основное состояние агента - передаётся между всеми агентами."""
     user_input: str = Field(..., description="Исходный запрос пользователя")
@@ -47,13 +107,73 @@ class AgentState(BaseModel):
     issues_found: List[str] = Field(default_factory=list)
     suggestions: List[str] = Field(default_factory=list)
     code_reviewed: bool = Field(default=False)
+    static_review: Optional[Dict[str, Any]] = Field(None, description="Результат статической проверки")
 
     # Контекст
     conversation_history: List[Dict[str, str]] = Field(default_factory=list)
     context: Dict[str, Any] = Field(default_factory=dict)
 
     # Метаданные
+    run_id: Optional[str] = Field(None, description="Идентификатор прогона для чекпоинтов")
     timestamp: datetime = Field(default_factory=datetime.now)
-    iteration_count: int = Field(default=0)
+    iteration_count: int = Field(default=0)  # Число раундов генерации кода
     errors: List[str] = Field(default_factory=list)
-    final_output_ready: bool = Field(default=False)
\ No newline at end of file
+    final_output_ready: bool = Field(default=False)
+
+
+
+class WorkflowState(TypedDict, total=False):
+    """
+    Состояние графа LangGraph - те же поля, что у AgentState.
+    Узлы возвращают только изменённые поля, а merge_state сливает их
+    с накопленным состоянием по правилам STATE_REDUCERS.
+    """
+    user_input: str
+    current_stage: str
+
+    requirements: Optional[str]
+    requirements_analysis: Optional[Dict[str, Any]]
+    requirements_complete: bool
+
+    component_design: Optional[Dict[str, Any]]
+    design_complete: bool
+
+    generated_code: Optional[str]
+    code_language: Optional[str]
+    component_name: Optional[str]
+    code_generated: bool
+
+    code_review: Optional[Dict[str, Any]]
+    issues_found: List[str]
+    suggestions: List[str]
+    code_reviewed: bool
+    static_review: Optional[Dict[str, Any]]
+
+    conversation_history: List[Dict[str, str]]
+    context: Dict[str, Any]
+
+    run_id: Optional[str]
+    timestamp: datetime
+    iteration_count: int
+    errors: List[str]
+    final_output_ready: bool
+
+
+# Поля, которые накапливаются; остальные перезаписываются последним значением
+STATE_REDUCERS: Dict[str, Callable[[Any, Any], Any]] = {
+    "errors": operator.add,
+}
+
+
+def merge_state(current: Optional[Dict[str, Any]], update: Dict[str, Any]) -> Dict[str, Any]:
+    """Редьюсер графа: применяет дельту узла к состоянию без копирования значений."""
+    merged = dict(current or {})
+    for key, value in update.items():
+        reducer = STATE_REDUCERS.get(key)
+        merged[key] = reducer(merged[key], value) if reducer and key in merged else value
+    return merged
+
+
+# Граф хранит состояние в одном канале: в LangGraph 0.0.x отдельный канал
+# на каждое поле обходится дороже, чем сама дельта
+GraphState = Annotated[WorkflowState, merge_state]
@@ -0,0 +1,205 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Сессии уточнений компонента.
+Уточнение вроде «сделай кнопку круглой» не требует нового анализа и
+дизайна: сессия хранит последнее AgentState, и следующий запрос начинается
+с самого дешёвого достаточного этапа (см. route_follow_up). Простаивающие
+сессии вытесняются по таймауту, а при превышении лимита числа или памяти -
+давно не использованные первыми.
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Dict, Optional
+
+from .schemas import AgentState
+from ..core.metrics import REGISTRY
+from ..services.admission import AdmissionController, Priority
+
+logger = logging.getLogger(__name__)
+
+REFINE_FULL = "full"          # Новый компонент: полный прогон
+REFINE_REDESIGN = "redesign"  # Меняется API компонента: спецификация и правка кода
+REFINE_PATCH = "patch"        # Внешний вид и поведение: только правка кода
+
+# Признаки в тексте уточнения (нижний регистр, по вхождению)
+NEW_COMPONENT_MARKERS = ("создай", "сгенерируй", "новый компонент", "другой компонент", "с нуля", "заново")
+DESIGN_MARKERS = (
+    "проп", "prop", "свойств", "параметр", "интерфейс", "обработчик", "колбэк", "callback", "событи", "вариант",
+)
+
+SESSION_TURNS = REGISTRY.counter("session_turns_total", "Запросы в сессиях уточнений по маршруту", ("route",))
+SESSION_EVICTIONS = REGISTRY.counter("session_evictions_total", "Вытесненные сессии: idle или memory", ("reason",))
+
+
+def route_follow_up(text: str, state: Optional[AgentState]) -> str:
+    """
+    Самый дешёвый достаточный маршрут для запроса сессии. Без готового кода
+    и для нового компонента - полный прогон; изменения пропсов и событий
+    требуют новой спецификации; остальное - правка текущего кода.
+    """
+    if state is None or not state.generated_code:
+        return REFINE_FULL
+    lowered = text.lower()
+    if any(marker in lowered for marker in NEW_COMPONENT_MARKERS):
+        return REFINE_FULL
+    if any(marker in lowered for marker in DESIGN_MARKERS):
+        return REFINE_REDESIGN
+    return REFINE_PATCH
+
+
+class Session:
+    """Сессия: последнее состояние прогона и блокировка, упорядочивающая её запросы."""
+
+    def __init__(self, session_id: str, now: float):
+        self.id = session_id
+        self.state: Optional[AgentState] = None
+        self.size = 0
+        self.turns = 0
+        self.last_used = now
+        self.lock = asyncio.Lock()
+
+
+class SessionManager:
+    """
+    Хранилище сессий и выполнение их запросов.
+    Каждый запрос проходит контроль допуска с интерактивным приоритетом.
+    Размер сессии оценивается по JSON её состояния.
+    """
+
+    def __init__(
+        self,
+        workflow,
+        admission: Optional[AdmissionController] = None,
+        max_sessions: int = 256,
+        max_bytes: int = 32 * 1024 * 1024,
+        idle_timeout: float = 1800.0,
+        review_refinements: bool = False,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.workflow = workflow
+        self.admission = admission
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_timeout = idle_timeout
+        self.review_refinements = review_refinements
+        self._clock = clock
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.stats: Dict[str, int] = {"created": 0, "evicted_idle": 0, "evicted_memory": 0}
+        self.routes: Dict[str, int] = {REFINE_FULL: 0, REFINE_REDESIGN: 0, REFINE_PATCH: 0}
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(session.size for session in self._sessions.values())
+
+    def open(self, session_id: Optional[str] = None) -> Session:
+        """Существующая сессия по идентификатору или новая."""
+        self.evict_idle()
+        session = self._sessions.get(session_id) if session_id else None
+        if session is None:
+            session = Session(session_id or uuid.uuid4().hex, self._clock())
+            self._sessions[session.id] = session
+            self.stats["created"] += 1
+        self._touch(session)
+        self._enforce_limits(keep=session)
+        return session
+
+    def _touch(self, session: Session) -> None:
+        session.last_used = self._clock()
+        self._sessions.move_to_end(session.id)
+
+    @contextlib.asynccontextmanager
+    async def _admitted(self) -> AsyncIterator[None]:
+        if self.admission is None:
+            yield
+        else:
+            async with self.admission.admit(Priority.INTERACTIVE):
+                yield
+
+    async def handle(self, session: Session, prompt: str) -> Dict[str, Any]:
+        """Выполняет запрос сессии; результат как у run() плюс маршрут и номер хода."""
+        async with session.lock:
+            route = route_follow_up(prompt, session.state)
+            async with self._admitted():
+                if route == REFINE_FULL:
+                    state, result = await self.workflow.run_with_state(prompt)
+                else:
+                    state, result = await self.workflow.refine(session.state, prompt, route, review=self.review_refinements)
+            session.turns += 1
+            self.routes[route] += 1
+            SESSION_TURNS.inc(route=route)
+            logger.info(f"Сессия {session.id}: ход {session.turns}, маршрут {route}")
+            self._store(session, state)
+        result["session"] = {"id": session.id, "route": route, "turn": session.turns}
+        return result
+
+    def stream(self, session: Session, prompt: str) -> AsyncGenerator[Dict[str, Any], None]:
+        """События воркфлоу по запросу сессии, последним - result (см. handle)."""
+        return self.workflow.stream_call(lambda: self.handle(session, prompt))
+
+    def _store(self, session: Session, state: AgentState) -> None:
+        # Сессию могли вытеснить, пока шёл запрос, - клиент по-прежнему её держит
+        self._sessions.setdefault(session.id, session)
+        session.state = state
+        session.size = len(state.model_dump_json())
+        self._touch(session)
+        self._enforce_limits(keep=session)
+
+    def evict_idle(self) -> int:
+        """Удаляет сессии, простаивающие дольше idle_timeout (кроме выполняющих запрос)."""
+        deadline = self._clock() - self.idle_timeout
+        expired = [s for s in self._sessions.values() if s.last_used < deadline and not s.lock.locked()]
+        for session in expired:
+            self._evict(session, "idle")
+        return len(expired)
+
+    def _enforce_limits(self, keep: Session) -> None:
+        """Вытесняет давно не использованные сессии сверх лимитов числа и памяти."""
+        for session in list(self._sessions.values()):
+            if len(self._sessions) <= self.max_sessions and self.total_bytes <= self.max_bytes:
+                break
+            if session is keep or session.lock.locked():
+                continue
+            self._evict(session, "memory")
+
+    def _evict(self, session: Session, reason: str) -> None:
+        del self._sessions[session.id]
+        self.stats[f"evicted_{reason}"] += 1
+        SESSION_EVICTIONS.inc(reason=reason)
+        logger.info(f"Сессия {session.id} вытеснена ({reason})")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "active": len(self._sessions),
+            "bytes": self.total_bytes,
+            "routes": dict(self.routes),
+        }
+
+
+def create_session_manager(
+    workflow,
+    admission: Optional[AdmissionController] = None,
+    max_sessions: int = 256,
+    max_bytes: int = 32 * 1024 * 1024,
+    idle_timeout: float = 1800.0,
+    review_refinements: bool = False
+) -> SessionManager:
+    return SessionManager(workflow, admission, max_sessions, max_bytes, idle_timeout, review_refinements)
@@ -0,0 +1,383 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Статическая проверка сгенерированного TSX перед LLM-ревью.
+Чистый Python без вызовов модели: скобки и строки, экспорт компонента,
+соответствие пропсов дизайну и типичные ошибки в классах Tailwind.
+По результату граф либо сразу отправляет код на перегенерацию,
+либо пропускает LLM-ревью, либо передаёт код ревьюеру.
+"""
+
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from .schemas import AgentState, ReviewIssue
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Решения статической проверки
+VERDICT_REGENERATE = "regenerate"
+VERDICT_SKIP_LLM = "skip_llm"
+VERDICT_LLM_REVIEW = "llm_review"
+
+_FENCE_RE = re.compile(r"```[\w+-]*\n(.*?)```", re.DOTALL)
+_CODE_LINE_RE = re.compile(r"^\s*(import|export|const|let|function|interface|type|return|//|/\*|\*|[<>{}()\[\];])")
+_EXPORT_RE = re.compile(
+    r"export\s+(?:default\s+)?(?:const|let|function|class)\s+([A-Z]\w*)"
+    r"|export\s+default\s+([A-Z]\w*)\s*;?"
+    r"|export\s*\{[^}]*\b([A-Z]\w*)\b"
+)
+_DEFAULT_EXPORT_RE = re.compile(
+    r"export\s+default\s+(?:async\s+)?(?:(?:function|class)\b\s*\*?\s*([A-Za-z_$][\w$]*)?|([^;\n]+))"
+)
+_GENERIC_ARGS_RE = re.compile(r"<[^<>()]*>")
+_NAMED_FUNCTION_RE = re.compile(r"\bfunction\s+([A-Z][\w$]*)")
+# PascalCase-идентификатор, не являющийся пространством имён (React.memo)
+_PASCAL_IDENT_RE = re.compile(r"(?<![\w.$])([A-Z][\w$]*)\b(?!\s*\.)")
+_PROPS_BLOCK_RE = re.compile(r"(?:interface\s+\w*Props\b[^{]*|type\s+\w*Props\s*=\s*)\{", re.MULTILINE)
+_MEMBER_RE = re.compile(r"^\s*(?:readonly\s+)?['\"]?([A-Za-z_]\w*)['\"]?\??\s*:", re.MULTILINE)
+_CLASSNAME_RE = re.compile(r"className\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|\{\s*`([^`]*)`\s*\})")
+_CLASS_ATTR_RE = re.compile(r"<[a-z][\w.-]*\b[^>]*\sclass\s*=", re.DOTALL)
+
+# Группы утилит Tailwind, в которых два разных класса противоречат друг другу
+_TAILWIND_GROUPS: List[Tuple[str, re.Pattern]] = [
+    ("padding", re.compile(r"^-?(p|px|py|pt|pr|pb|pl)-")),
+    ("margin", re.compile(r"^-?(m|mx|my|mt|mr|mb|ml)-")),
+    ("width", re.compile(r"^w-")),
+    ("height", re.compile(r"^h-")),
+    ("font-size", re.compile(r"^text-(xs|sm|base|lg|\d?xl)$")),
+    ("font-weight", re.compile(r"^font-(thin|extralight|light|normal|medium|semibold|bold|extrabold|black)$")),
+    ("text-color", re.compile(r"^text-(white|black|transparent|current|[a-z]+-\d{2,3})$")),
+    ("background", re.compile(r"^bg-(white|black|transparent|current|[a-z]+-\d{2,3})$")),
+    ("radius", re.compile(r"^rounded(-(none|sm|md|lg|xl|2xl|3xl|full))?$")),
+    ("display", re.compile(r"^(block|inline|inline-block|flex|inline-flex|grid|inline-grid|hidden|contents)$")),
+]
+# Единицы измерения вместо шкалы Tailwind: px-4px, mt-2rem
+_BAD_UNIT_RE = re.compile(r"^-?[a-z]+(-[a-z]+)*-\d+(\.\d+)?(px|rem|em|%)$")
+
+
+class StaticReview(BaseModel):
+    """Результат статической проверки."""
+    verdict: str = Field(default=VERDICT_LLM_REVIEW)
+    component_name: Optional[str] = Field(default=None)
+    issues: List[ReviewIssue] = Field(default_factory=list)
+    cleaned_code: Optional[str] = Field(default=None, description="Код без markdown вокруг")
+
+    def to_review(self) -> Dict[str, Any]:
+        """Ревью в формате CodeReview - для генератора и итогового ответа."""
+        score = {
+            VERDICT_REGENERATE: 2,
+            VERDICT_SKIP_LLM: 8 if not self.issues else 7,
+        }.get(self.verdict, 5)
+        return {
+            "quality_score": score,
+            "issues": [issue.model_dump() for issue in self.issues],
+            "suggestions": [],
+            "source": "static",
+        }
+
+
+def analyze_tsx(code: str, design: Optional[Dict[str, Any]] = None) -> StaticReview:
+    """Проверяет код компонента и выносит решение о дальнейшем ревью."""
+    issues: List[ReviewIssue] = []
+    cleaned = None
+
+    source, prose = _extract_code(code or "")
+    if prose:
+        if source is None:
+            issues.append(_issue("critical", "format", "Ответ содержит текст вместо кода"))
+        else:
+            cleaned = source
+            issues.append(_issue("minor", "format", "Код был обёрнут в markdown - пояснения удалены"))
+    source = source if source is not None else (code or "")
+
+    if not source.strip():
+        issues.append(_issue("critical", "structure", "Пустой код"))
+    else:
+        issues.extend(_issue("critical", "structure", problem) for problem in check_brackets(source))
+
+    component_name = find_exported_component(source)
+    if not has_exported_component(source) and source.strip():
+        issues.append(_issue("critical", "structure", "Не найден экспортируемый компонент"))
+
+    issues.extend(check_props(source, design))
+    issues.extend(check_tailwind(source))
+
+    severities = {issue.severity for issue in issues}
+    if "critical" in severities:
+        verdict = VERDICT_REGENERATE
+    elif "major" in severities:
+        verdict = VERDICT_LLM_REVIEW
+    else:
+        verdict = VERDICT_SKIP_LLM
+
+    return StaticReview(verdict=verdict, component_name=component_name, issues=issues, cleaned_code=cleaned)
+
+
+def _issue(severity: str, category: str, description: str) -> ReviewIssue:
+    return ReviewIssue(severity=severity, category=category, description=description)
+
+
+def _extract_code(text: str) -> Tuple[Optional[str], bool]:
+    """(код, был ли вокруг текст). Код - самый длинный блок ```...```, иначе весь ответ."""
+    blocks = _FENCE_RE.findall(text)
+    if blocks:
+        code = max(blocks, key=len)
+        return code, True
+    lines = [line for line in text.splitlines() if line.strip()]
+    if lines and not any(_CODE_LINE_RE.match(line) for line in lines[:3]):
+        # Ни одна из первых строк не похожа на код - модель ответила текстом
+        return None, True
+    return text, False
+
+
+def check_brackets(code: str) -> List[str]:
+    """
+    Баланс (), [], {} с учётом строк, шаблонных строк и комментариев.
+    Апостроф сразу после буквы считается текстом JSX («Don't»), а не началом строки.
+    """
+    problems: List[str] = []
+    stack: List[Tuple[str, int]] = []
+    pairs = {")": "(", "]": "[", "}": "{"}
+    i, n, line = 0, len(code), 1
+
+    while i < n:
+        c = code[i]
+        if c == "\n":
+            line += 1
+        if code.startswith("//", i):
+            end = code.find("\n", i)
+            i = n if end == -1 else end
+            continue
+        if code.startswith("/*", i):
+            end = code.find("*/", i + 2)
+            if end == -1:
+                problems.append(f"Незакрытый комментарий (строка {line})")
+                return problems
+            line += code.count("\n", i, end)
+            i = end + 2
+            continue
+        if c == '"' or (c == "'" and not (i and code[i - 1].isalnum())):
+            end = _string_end(code, i, c)
+            if end is None:
+                problems.append(f"Незакрытая строка (строка {line})")
+                return problems
+            i = end + 1
+            continue
+        if c == "`" or (c == "}" and stack and stack[-1][0] == "${"):
+            if c == "}":
+                stack.pop()
+            end, nested = _template_end(code, i + 1)
+            if end is None:
+                problems.append(f"Незакрытая шаблонная строка (строка {line})")
+                return problems
+            line += code.count("\n", i, end)
+            if nested:
+                stack.append(("${", line))
+            i = end + 1
+            continue
+        if c in "([{":
+            stack.append((c, line))
+        elif c in ")]}":
+            if not stack or stack[-1][0] != pairs[c]:
+                problems.append(f"Лишняя или несогласованная скобка '{c}' (строка {line})")
+                return problems
+            stack.pop()
+        i += 1
+
+    for bracket, opened in stack:
+        problems.append(f"Незакрытая скобка '{bracket[-1]}' (строка {opened})")
+    return problems
+
+
+def _string_end(code: str, start: int, quote: str) -> Optional[int]:
+    i = start + 1
+    while i < len(code):
+        c = code[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == quote:
+            return i
+        if c == "\n" and quote != '"':
+            return None
+        i += 1
+    return None
+
+
+def _template_end(code: str, i: int) -> Tuple[Optional[int], bool]:
+    """Конец участка шаблонной строки: закрывающая ` или начало ${ (nested=True)."""
+    while i < len(code):
+        c = code[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "`":
+            return i, False
+        if code.startswith("${", i):
+            return i + 1, True
+        i += 1
+    return None, False
+
+
+def _default_export(code: str) -> Tuple[bool, Optional[str]]:
+    """
+    Есть ли export default и имя компонента в нём. Выражение может оборачивать
+    компонент: memo(Button), React.memo(Button), forwardRef(function Button(...)),
+    withStyles(styles)(Button); для анонимного выражения имя - None.
+    """
+    match = _DEFAULT_EXPORT_RE.search(code)
+    if match is None:
+        return False, None
+    declared, expression = match.groups()
+    if expression is None:
+        return True, declared if declared and declared[0].isupper() else None
+    named = _NAMED_FUNCTION_RE.search(expression)
+    if named:
+        return True, named.group(1)
+    # Аргументы дженериков (forwardRef<HTMLButtonElement, ButtonProps>) - не имя компонента
+    previous = None
+    while previous != expression:
+        previous, expression = expression, _GENERIC_ARGS_RE.sub("", expression)
+    ident = _PASCAL_IDENT_RE.search(expression)
+    return True, ident.group(1) if ident else None
+
+
+def find_exported_component(code: str) -> Optional[str]:
+    """Имя экспортируемого компонента (PascalCase); default-экспорт в приоритете."""
+    _, name = _default_export(code)
+    if name:
+        return name
+    for match in _EXPORT_RE.finditer(code):
+        name = next(group for group in match.groups() if group)
+        return name
+    return None
+
+
+def has_exported_component(code: str) -> bool:
+    """Экспортирован ли компонент: любой export default (в том числе анонимный) или именованный."""
+    return _default_export(code)[0] or _EXPORT_RE.search(code) is not None
+
+
+def declared_props(code: str) -> Optional[List[str]]:
+    """Пропсы из interface/type ...Props; None - тип пропсов не объявлен."""
+    match = _PROPS_BLOCK_RE.search(code)
+    if match is None:
+        return None
+    depth, i = 1, match.end()
+    while i < len(code) and depth:
+        depth += {"{": 1, "}": -1}.get(code[i], 0)
+        i += 1
+    body = code[match.end():i - 1]
+    # Только члены верхнего уровня: вложенные объекты вырезаем
+    flat = re.sub(r"\{[^{}]*\}", "{}", body)
+    return _MEMBER_RE.findall(flat)
+
+
+def check_props(code: str, design: Optional[Dict[str, Any]]) -> List[ReviewIssue]:
+    """Сверяет пропсы кода с component_design["props"]."""
+    props = design.get("props") if isinstance(design, dict) else None
+    if isinstance(props, list):
+        expected = [prop.get("name") for prop in props if isinstance(prop, dict) and prop.get("name")]
+    else:
+        expected = list(props or {})
+    if not expected:
+        return []
+    declared = declared_props(code)
+    if declared is None:
+        return [_issue("major", "props", "Не объявлен тип пропсов (interface ...Props)")]
+    missing = [name for name in expected if name not in declared]
+    if missing:
+        return [_issue("major", "props", "Нет пропсов из дизайна: " + ", ".join(missing))]
+    return []
+
+
+def check_tailwind(code: str) -> List[ReviewIssue]:
+    """Противоречащие и повторяющиеся классы, единицы вместо шкалы, class вместо className."""
+    issues: List[ReviewIssue] = []
+    if _CLASS_ATTR_RE.search(code):
+        issues.append(_issue("major", "tailwind", "Атрибут class вместо className"))
+
+    for match in _CLASSNAME_RE.finditer(code):
+        value = next(group for group in match.groups() if group is not None)
+        # В шаблонных строках учитываем только статическую часть
+        classes = re.sub(r"\$\{[^}]*\}", " ", value).split()
+        seen: Dict[Tuple[str, str], str] = {}
+        for cls in classes:
+            variants, _, utility = cls.rpartition(":")
+            if _BAD_UNIT_RE.match(utility):
+                issues.append(_issue("minor", "tailwind", f"Единицы в классе {cls}: используйте шкалу или [..]"))
+            for group, pattern in _TAILWIND_GROUPS:
+                matched = pattern.match(utility)
+                if not matched:
+                    continue
+                # px и py не противоречат друг другу: ось входит в ключ группы
+                axis = matched.group(1) if group in ("padding", "margin") else ""
+                key = (variants, group + axis)
+                if key in seen and seen[key] != cls:
+                    issues.append(_issue("minor", "tailwind", f"Противоречащие классы {seen[key]} и {cls}"))
+                elif key in seen:
+                    issues.append(_issue("minor", "tailwind", f"Повтор класса {cls}"))
+                seen[key] = cls
+                break
+    return issues
+
+
+class StaticReviewer:
+    """
+    Узел статической проверки в графе.
+    Без вызовов модели решает, нужен ли LLM-ревьюер, и считает сэкономленные вызовы.
+    """
+
+    name = "static_reviewer"
+
+    def __init__(self, skip_llm: Optional[bool] = None):
+        self.skip_llm = settings.STATIC_REVIEW_SKIP_LLM if skip_llm is None else skip_llm
+        self.stats: Dict[str, int] = {"checked": 0, "llm_skipped": 0, "regenerations": 0}
+
+    async def process(self, state: AgentState) -> AgentState:
+        result = analyze_tsx(state.generated_code or "", state.component_design)
+        if result.verdict == VERDICT_SKIP_LLM and not self.skip_llm:
+            result.verdict = VERDICT_LLM_REVIEW
+
+        self.stats["checked"] += 1
+        if result.cleaned_code is not None:
+            state.generated_code = result.cleaned_code
+        if result.component_name:
+            state.component_name = result.component_name
+
+        if result.verdict == VERDICT_REGENERATE:
+            self.stats["regenerations"] += 1
+            state.code_review = result.to_review()
+        elif result.verdict == VERDICT_SKIP_LLM:
+            self.stats["llm_skipped"] += 1
+            state.code_review = result.to_review()
+            state.code_reviewed = True
+
+        state.static_review = result.model_dump(exclude={"cleaned_code"})
+        logger.info(f"Статическая проверка: {result.verdict}, замечаний: {len(result.issues)}")
+        return state
+
+    def snapshot(self) -> Dict[str, int]:
+        # Каждый пропуск и каждая сразу назначенная перегенерация - не сделанный вызов ревьюера
+        return {**self.stats, "llm_calls_saved": self.stats["llm_skipped"] + self.stats["regenerations"]}
+
+
+def create_static_reviewer(skip_llm: Optional[bool] = None):
+    return StaticReviewer(skip_llm=skip_llm)
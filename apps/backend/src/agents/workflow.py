@@ -16,50 +16,160 @@
 Основной граф работы мультиагентной системы.
 """
 
+import asyncio
+import contextlib
 import logging
-from typing import Dict, Any, Literal
+import time
+import uuid
+from datetime import datetime
+from contextvars import ContextVar
+from typing import AsyncGenerator, Awaitable, Callable, Dict, Any, Iterator, List, Literal, Optional, Tuple
 from langgraph.graph import StateGraph, END
 
-from .schemas import AgentState
+from .schemas import AgentState, GraphState, merge_state
+from .events import emit, event_sink
 from .requirements_analyzer import create_requirements_analyzer
 from .component_designer import create_component_designer
 from .code_generator import create_code_generator
 from .code_reviewer import create_code_reviewer
+from .best_of_n import CODE_SELECTION_BEST_OF_N, CODE_SELECTION_SERIAL, create_candidate_selector
+from .sessions import REFINE_PATCH, REFINE_REDESIGN
+from .static_review import VERDICT_REGENERATE, VERDICT_SKIP_LLM, create_static_reviewer
+from ..core.config import settings
+from ..core.metrics import REGISTRY
+from ..services.checkpoint_store import CheckpointStore
+from ..services.ollama_service import usage_scope
+from ..services.component_library import ComponentLibrary
+from ..services.semantic_cache import SemanticCache
 
 logger = logging.getLogger(__name__)
 
+WORKFLOW_STAGE_SECONDS = REGISTRY.histogram(
+    "workflow_stage_duration_seconds", "Длительность этапа воркфлоу", ("stage",)
+)
+WORKFLOW_RUN_SECONDS = REGISTRY.histogram(
+    "workflow_run_duration_seconds", "Длительность прогона воркфлоу (без ожидания допуска)"
+)
+WORKFLOW_ITERATIONS = REGISTRY.histogram(
+    "workflow_iterations", "Раундов генерации кода за прогон", buckets=(1, 2, 3, 4, 5)
+)
+WORKFLOW_RUNS = REGISTRY.counter(
+    "workflow_runs_total", "Завершённые прогоны по исходу: success, failed (с ошибками агентов), error", ("outcome",)
+)
+
+# Длительности этапов текущего прогона (см. stage_timings)
+_stage_timings: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("workflow_stage_timings", default=None)
+
+
+@contextlib.contextmanager
+def stage_timings() -> Iterator[List[Dict[str, Any]]]:
+    """Собирает длительности этапов прогона в текущем контексте."""
+    timings: List[Dict[str, Any]] = []
+    token = _stage_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _stage_timings.reset(token)
+
 
 class MultiAgentWorkflow:
     """
     Мультиагентный воркфлоу на базе LangGraph.
+    Если передано хранилище чекпоинтов, состояние сохраняется после каждого
+    узла, и прерванный прогон продолжается с последнего завершённого этапа.
+    С семантическим кэшем похожий на прошлый запрос сразу получает готовые
+    анализ и дизайн и начинается с генерации кода. Библиотека компонентов
+    подставляет в промпты дизайнера и генератора похожие принятые компоненты.
+    В режиме best_of_n код выбирается из N параллельных кандидатов (узел
+    select_code) вместо раундов генерации и ревью. Уточнение готового
+    компонента (refine) начинается с дизайна или сразу с правки кода.
     """
 
-    def __init__(self, ollama_service):
+    # Следующий узел после завершённого этапа (после static_review и review_code решают условия)
+    NEXT_NODE = {
+        "analyze_requirements": "design_component",
+        "design_component": "generate_code",
+        "generate_code": "static_review",
+        "select_code": "end",
+    }
+
+    def __init__(
+        self,
+        ollama_service,
+        checkpoint_store: Optional[CheckpointStore] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        component_library: Optional[ComponentLibrary] = None,
+        code_selection: Optional[str] = None
+    ):
         self.ollama_service = ollama_service
+        self.checkpoint_store = checkpoint_store
+        self.semantic_cache = semantic_cache
+        self.component_library = component_library
 
         # Создаём агентов
         self.requirements_analyzer = create_requirements_analyzer(ollama_service)
         self.component_designer = create_component_designer(ollama_service)
         self.code_generator = create_code_generator(ollama_service)
         self.code_reviewer = create_code_reviewer(ollama_service)
+        self.static_reviewer = create_static_reviewer() if settings.STATIC_REVIEW_ENABLED else None
+        self.code_selection = code_selection or settings.CODE_SELECTION_MODE
+        if self.code_selection not in (CODE_SELECTION_SERIAL, CODE_SELECTION_BEST_OF_N):
+            raise ValueError(f"Неизвестный режим выбора кода: {self.code_selection}")
+        self.candidate_selector = None
+        if self.code_selection == CODE_SELECTION_BEST_OF_N:
+            self.candidate_selector = create_candidate_selector(
+                self.code_generator,
+                self.code_reviewer,
+                candidates=settings.BEST_OF_N_CANDIDATES,
+                finalists=settings.BEST_OF_N_FINALISTS,
+                temperatures=settings.BEST_OF_N_TEMPERATURES,
+                skip_llm=settings.STATIC_REVIEW_SKIP_LLM,
+            )
 
         # Создаём граф
         self.graph = self._build_graph()
 
     def _build_graph(self) -> StateGraph:
         """Строит граф состояний и переходов."""
-        # Определяем структуру состояния как dict (не Pydantic модель!)
-        workflow = StateGraph(dict)
+        # Типизированное состояние с редьюсерами: узлы возвращают только изменения
+        workflow = StateGraph(GraphState)
 
         workflow.add_node("analyze_requirements", self._analyze_requirements_node)
         workflow.add_node("design_component", self._design_component_node)
         workflow.add_node("generate_code", self._generate_code_node)
+        workflow.add_node("static_review", self._static_review_node)
         workflow.add_node("review_code", self._review_code_node)
+        # Генерация после дизайна: раунды по очереди или выбор из N кандидатов
+        first_code_node = "generate_code"
+        if self.candidate_selector is not None:
+            workflow.add_node("select_code", self._select_code_node)
+            workflow.add_edge("select_code", END)
+            first_code_node = "select_code"
 
-        workflow.set_entry_point("analyze_requirements")
+        # Новый прогон начинается с анализа, восстановленный - со следующего за чекпоинтом узла
+        workflow.set_conditional_entry_point(
+            self._route_entry,
+            {
+                "analyze_requirements": "analyze_requirements",
+                "design_component": "design_component",
+                "generate_code": first_code_node,
+                # Правка по уточнению - всегда одним генератором, без кандидатов
+                "refine_code": "generate_code",
+                "static_review": "static_review",
+                "review_code": "review_code",
+                "end": END,
+            }
+        )
         workflow.add_edge("analyze_requirements", "design_component")
-        workflow.add_edge("design_component", "generate_code")
-        workflow.add_edge("generate_code", "review_code")
+        workflow.add_edge("design_component", first_code_node)
+        workflow.add_edge("generate_code", "static_review")
+
+        # Статическая проверка: сразу на перегенерацию, без LLM-ревью или к ревьюеру
+        workflow.add_conditional_edges(
+            "static_review",
+            self._route_after_static_review,
+            {"regenerate": "generate_code", "review": "review_code", "end": END}
+        )
 
         workflow.add_conditional_edges(
             "review_code",
@@ -69,79 +179,419 @@ class MultiAgentWorkflow:
 
         return workflow.compile()
 
+    async def _run_stage(self, stage: str, agent, state: dict, uses_llm: bool = True) -> dict:
+        """
+        Запускает агента этапа и публикует события начала и завершения.
+        Возвращает только изменённые поля состояния.
+        """
+        await emit("stage_start", stage=stage)
+        if uses_llm and not self.ollama_service.available:
+            # Автоматы всех узлов Ollama разомкнуты: этап пропускается без вызовов
+            # и без чекпоинта, чтобы продолжение прогона выполнило его заново
+            error = f"Этап {stage} пропущен: Ollama недоступен"
+            logger.warning(f"Workflow: {error}")
+            await emit("stage_complete", stage=stage, iteration_count=state.get("iteration_count", 0),
+                       errors=[error], duration_ms=0.0, skipped=True)
+            return {"current_stage": stage, "errors": [error]}
+        # Состояние уже проверено на входе в граф - собираем модель без повторной валидации.
+        # Список ошибок копируем: агенты дописывают в него, а граф накапливает его редьюсером
+        agent_state = AgentState.model_construct(**state)
+        agent_state.errors = list(agent_state.errors)
+        # Обрабатываем
+        started = time.perf_counter()
+        result_state = await agent.process(agent_state)
+        duration = time.perf_counter() - started
+        result_state.current_stage = stage
+
+        WORKFLOW_STAGE_SECONDS.observe(duration, stage=stage)
+        timings = _stage_timings.get()
+        if timings is not None:
+            timings.append({
+                "stage": stage,
+                "iteration": result_state.iteration_count,
+                "duration_ms": round(duration * 1000, 2),
+            })
+
+        update = self._state_delta(state, result_state)
+        if self.checkpoint_store is not None and result_state.run_id:
+            await self.checkpoint_store.save(result_state.run_id, stage, {**state, **update, "errors": result_state.errors})
+        await emit(
+            "stage_complete",
+            stage=stage,
+            iteration_count=result_state.iteration_count,
+            errors=result_state.errors,
+            duration_ms=round(duration * 1000, 2),
+        )
+        return update
+
+    @staticmethod
+    def _state_delta(before: dict, after: AgentState) -> dict:
+        """
+        Поля, которые агент изменил. Агенты присваивают новые значения, поэтому
+        достаточно сравнения по идентичности - без обхода больших строк и словарей.
+        """
+        update = {
+            key: value
+            for key, value in after.__dict__.items()
+            if key != "errors" and value is not before.get(key)
+        }
+        # Для ошибок отдаём только новые - редьюсер допишет их к накопленным
+        new_errors = after.errors[len(before.get("errors", [])):]
+        if new_errors:
+            update["errors"] = new_errors
+        return update
+
     async def _analyze_requirements_node(self, state: dict) -> dict:
         """Узел анализа требований."""
         logger.info("Workflow: запуск анализатора требований")
-        # Преобразуем dict → AgentState
-        agent_state = AgentState(**state)
-        # Обрабатываем
-        result_state = await self.requirements_analyzer.process(agent_state)
-        # Возвращаем dict
-        return result_state.dict()
+        return await self._run_stage("analyze_requirements", self.requirements_analyzer, state)
 
     async def _design_component_node(self, state: dict) -> dict:
         """Узел дизайна компонента."""
         logger.info("Workflow: запуск дизайнера компонентов")
-        agent_state = AgentState(**state)
-        result_state = await self.component_designer.process(agent_state)
-        return result_state.dict()
+        return await self._run_stage("design_component", self.component_designer, state)
 
     async def _generate_code_node(self, state: dict) -> dict:
         """Узел генерации кода."""
         logger.info("Workflow: запуск генератора кода")
-        agent_state = AgentState(**state)
-        result_state = await self.code_generator.process(agent_state)
-        return result_state.dict()
+        return await self._run_stage("generate_code", self.code_generator, state)
+
+    async def _select_code_node(self, state: dict) -> dict:
+        """Узел best-of-N: кандидаты, статический отбор, ревью финалистов."""
+        logger.info("Workflow: выбор лучшего из кандидатов кода")
+        return await self._run_stage("select_code", self.candidate_selector, state)
+
+    async def _static_review_node(self, state: dict) -> dict:
+        """Узел статической проверки кода (без LLM)."""
+        if self.static_reviewer is None:
+            return {"current_stage": "static_review"}
+        return await self._run_stage("static_review", self.static_reviewer, state, uses_llm=False)
 
     async def _review_code_node(self, state: dict) -> dict:
         """Узел ревью кода."""
         logger.info("Workflow: запуск ревьюера кода")
-        agent_state = AgentState(**state)
-        result_state = await self.code_reviewer.process(agent_state)
-        return result_state.dict()
+        return await self._run_stage("review_code", self.code_reviewer, state)
+
+    def _route_entry(self, state: dict) -> str:
+        """Точка входа графа: узел после последнего завершённого этапа."""
+        stage = state.get("current_stage")
+        if stage == "static_review":
+            return {"regenerate": "generate_code", "review": "review_code"}.get(
+                self._route_after_static_review(state), "end"
+            )
+        if stage == "review_code":
+            return "generate_code" if self._should_improve_code(state) == "improve" else "end"
+        if stage == "design_component" and self._refinement(state).get("route") == REFINE_PATCH:
+            return "refine_code"
+        return self.NEXT_NODE.get(stage, "analyze_requirements")
+
+    @staticmethod
+    def _refinement(state: dict) -> Dict[str, Any]:
+        return (state.get("context") or {}).get("refinement") or {}
+
+    def _route_after_static_review(self, state: dict) -> Literal["regenerate", "review", "end"]:
+        """Переход после статической проверки."""
+        verdict = (state.get("static_review") or {}).get("verdict")
+        if not state.get("generated_code"):
+            # Генератор не вернул код (ошибка модели) - ни ревью, ни повтор не помогут
+            return "end"
+        if verdict == VERDICT_SKIP_LLM:
+            return "end"
+        if verdict == VERDICT_REGENERATE:
+            # Лимит раундов исчерпан - отдаём код как есть, ревьюер его не исправит
+            return "regenerate" if state.get("iteration_count", 0) < 3 else "end"
+        refinement = self._refinement(state)
+        if refinement and not refinement.get("review"):
+            # Уточнение: правке достаточно статической проверки
+            return "end"
+        return "review"
 
     def _should_improve_code(self, state: dict) -> Literal["improve", "end"]:
         """Условие для улучшения кода."""
-        # Преобразуем dict → AgentState для удобства
-        agent_state = AgentState(**state)
+        if state.get("iteration_count", 0) >= 3:
+            return "end"
 
-        if agent_state.iteration_count >= 3:
+        # Ревью не удалось (ответ не разобран даже после повторов) - повторная
+        # генерация кода ничего не исправит, поэтому не тратим на неё вызовы
+        code_review = state.get("code_review")
+        if not code_review:
             return "end"
 
         # Получаем оценку качества
         quality_score = 0
-        if agent_state.code_review and isinstance(agent_state.code_review, dict):
-            quality_score = agent_state.code_review.get('quality_score', 0)
+        if isinstance(code_review, dict):
+            quality_score = code_review.get('quality_score', 0)
 
         if quality_score < 7:
             return "improve"
         return "end"
 
-    async def run(self, user_input: str):
-        """Запуск полного воркфлоу."""
+    async def run(self, user_input: str, run_id: Optional[str] = None):
+        """
+        Запуск полного воркфлоу.
+        Если для run_id уже есть чекпоинт, прогон продолжается с него.
+        """
+        return (await self.run_with_state(user_input, run_id))[1]
+
+    async def run_with_state(self, user_input: str, run_id: Optional[str] = None) -> Tuple[AgentState, Dict[str, Any]]:
+        """Как run(), но возвращает и итоговое состояние (для сессий уточнений)."""
         logger.info(f"Workflow: запуск обработки запроса: '{user_input[:50]}...'")
 
-        try:
-            # Создаём начальное состояние как dict
-            initial_state = AgentState(user_input=user_input)
-            initial_dict = initial_state.dict()
+        run_id = run_id or uuid.uuid4().hex
+        if self.checkpoint_store is not None:
+            checkpoint = await self.checkpoint_store.load(run_id)
+            if checkpoint is not None:
+                return await self._execute(AgentState(**checkpoint.state), checkpoint.node)
 
-            # Запускаем граф
-            final_dict = await self.graph.ainvoke(initial_dict)
+        initial_state, completed_node, vector = await self._prepare(user_input, run_id)
+        return await self._execute(initial_state, completed_node, vector)
 
-            # Преобразуем обратно в AgentState для форматирования
-            final_state = AgentState(**final_dict)
+    async def _prepare(self, user_input: str, run_id: str) -> Tuple[AgentState, Optional[str], Optional[List[float]]]:
+        """
+        Начальное состояние нового прогона: примеры из библиотеки компонентов и,
+        при попадании в семантический кэш, готовые анализ и дизайн.
+        Возвращает состояние, последний выполненный узел и эмбеддинг запроса.
+        """
+        initial_state = AgentState(user_input=user_input, run_id=run_id)
 
-            return self._format_result(final_state)
+        vector = await self._embed_request(user_input)
+        if vector is None:
+            return initial_state, None, None
 
+        if self.component_library is not None:
+            examples = self.component_library.search(vector)
+            if examples:
+                initial_state.context["examples"] = examples
+
+        completed_node = None
+        if self.semantic_cache is not None:
+            cached = self.semantic_cache.lookup(vector)
+            if cached is not None:
+                await self._apply_cached_design(initial_state, *cached)
+                completed_node = "design_component"
+
+        return initial_state, completed_node, vector
+
+    async def resume(self, run_id: str):
+        """Продолжает прерванный прогон с последнего сохранённого узла."""
+        if self.checkpoint_store is None:
+            raise KeyError("Чекпоинты отключены")
+        checkpoint = await self.checkpoint_store.load(run_id)
+        if checkpoint is None:
+            raise KeyError(f"Чекпоинт прогона {run_id} не найден")
+        return await self._continue(AgentState(**checkpoint.state), checkpoint.node)
+
+    async def analyze(self, user_input: str, run_id: Optional[str] = None) -> Tuple[AgentState, Optional[List[float]]]:
+        """
+        Только анализ требований. Пакетная генерация сначала анализирует все
+        запросы, а затем доводит каждый уникальный анализ через continue_from.
+        Семантический кэш и библиотека используются так же, как в run(): при
+        попадании в кэш состояние возвращается уже с дизайном.
+        Возвращает состояние и эмбеддинг запроса для continue_from.
+        """
+        state, completed_node, vector = await self._prepare(user_input, run_id or uuid.uuid4().hex)
+        if completed_node is None:
+            current = state.dict()
+            update = await self._analyze_requirements_node(current)
+            state = AgentState(**merge_state(current, update))
+        return state, vector
+
+    async def continue_from(self, state: AgentState, vector: Optional[List[float]] = None):
+        """Доводит прогон, полученный из analyze(), до конца."""
+        return await self._continue(state, state.current_stage, vector)
+
+    async def discard(self, run_id: str) -> None:
+        """Удаляет чекпоинт прогона, который не будет доведён до конца."""
+        if self.checkpoint_store is not None:
+            await self.checkpoint_store.delete(run_id)
+
+    async def refine(
+        self,
+        state: AgentState,
+        follow_up: str,
+        route: str,
+        review: bool = False
+    ) -> Tuple[AgentState, Dict[str, Any]]:
+        """
+        Уточнение готового компонента. Пожелание попадает в историю диалога
+        (её видят все этапы) и замечанием - в генератор, который правит текущий
+        код. REFINE_PATCH начинает с правки кода, REFINE_REDESIGN - со
+        спецификации. Без review после правки выполняется только статическая проверка.
+        """
+        refined = state.model_copy(deep=True)
+        refined.run_id = uuid.uuid4().hex
+        refined.timestamp = datetime.now()
+        refined.conversation_history.append({"role": "user", "content": follow_up})
+        refined.code_review = {"issues": [{"severity": "major", "description": f"Пожелание пользователя: {follow_up}"}]}
+        refined.code_reviewed = False
+        refined.static_review = None
+        refined.iteration_count = 0
+        refined.errors = []
+        refined.context = {
+            **{key: value for key, value in state.context.items() if key not in ("semantic_cache", "candidates")},
+            "refinement": {"route": route, "review": review},
+        }
+        completed_node = "analyze_requirements" if route == REFINE_REDESIGN else "design_component"
+        refined.current_stage = completed_node
+        return await self._execute(refined, completed_node)
+
+    async def _embed_request(self, user_input: str) -> Optional[List[float]]:
+        """Эмбеддинг запроса для кэша и библиотеки; None, если они выключены или модель недоступна."""
+        if self.semantic_cache is None and self.component_library is None:
+            return None
+        try:
+            return await self.ollama_service.embed(user_input)
+        except Exception as e:
+            # Без эмбеддинга прогон идёт полностью - кэш и примеры лишь ускоряют его
+            logger.warning(f"Workflow: эмбеддинг запроса не получен - {e}")
+            return None
+
+    async def _apply_cached_design(self, state: AgentState, value: Dict[str, Any], similarity: float) -> None:
+        """Заполняет состояние анализом и дизайном из семантического кэша."""
+        logger.info(f"Workflow: анализ и дизайн из семантического кэша (сходство {similarity:.3f})")
+        state.requirements = value.get("requirements")
+        state.requirements_analysis = value["requirements_analysis"]
+        state.requirements_complete = True
+        state.component_design = value["component_design"]
+        state.design_complete = True
+        state.current_stage = "design_component"
+        state.context["semantic_cache"] = {"similarity": similarity, "matched_input": value.get("user_input")}
+        await emit("semantic_cache_hit", stages=["analyze_requirements", "design_component"], similarity=similarity)
+
+    async def _remember(self, vector: List[float], state: AgentState) -> None:
+        """
+        Сохраняет итоги прогона: анализ и дизайн - в семантический кэш (если они
+        получены моделью, а не взяты из кэша), принятый ревью код - в библиотеку.
+        """
+        design = state.component_design if isinstance(state.component_design, dict) else None
+        try:
+            if (
+                self.semantic_cache is not None
+                and "semantic_cache" not in state.context
+                and state.requirements_analysis
+                and design
+            ):
+                await self.semantic_cache.add(vector, state.user_input, {
+                    "user_input": state.user_input,
+                    "requirements": state.requirements,
+                    "requirements_analysis": state.requirements_analysis,
+                    "component_design": design,
+                })
+
+            score = (state.code_review or {}).get("quality_score")
+            if self.component_library is not None and state.generated_code and isinstance(score, int):
+                props = (design or {}).get("props") or {}
+                await self.component_library.add(
+                    vector,
+                    name=state.component_name or (design or {}).get("name") or "Component",
+                    props=list(props) if isinstance(props, (dict, list)) else [],
+                    code=state.generated_code,
+                    score=score,
+                    user_input=state.user_input,
+                )
         except Exception as e:
-            logger.error(f"Workflow: ошибка выполнения - {e}")
-            raise
+            logger.warning(f"Workflow: не удалось сохранить итоги прогона в индексы - {e}")
+
+    async def _continue(
+        self,
+        state: AgentState,
+        completed_node: Optional[str],
+        vector: Optional[List[float]] = None
+    ):
+        """
+        Доводит прогон до конца, начиная с узла после completed_node.
+        vector - эмбеддинг запроса: по нему итоги прогона попадут в семантический кэш и библиотеку.
+        """
+        return (await self._execute(state, completed_node, vector))[1]
+
+    async def _execute(
+        self,
+        state: AgentState,
+        completed_node: Optional[str],
+        vector: Optional[List[float]] = None
+    ) -> Tuple[AgentState, Dict[str, Any]]:
+        """Выполнение графа (см. _continue); возвращает итоговое состояние и результат."""
+        if completed_node is not None:
+            logger.info(f"Workflow: продолжение прогона {state.run_id} после узла {completed_node}")
+
+        # Счётчики prompt_eval/eval всех вызовов модели и длительности этапов за прогон
+        started = time.perf_counter()
+        with usage_scope() as usage, stage_timings() as timings:
+            try:
+                # Запускаем граф; если прогон прервался после последнего узла, точка входа сразу завершает его
+                final_dict = await self.graph.ainvoke(state.dict())
+
+                # Преобразуем обратно в AgentState для форматирования
+                final_state = AgentState(**final_dict)
+
+            except Exception as e:
+                WORKFLOW_RUNS.inc(outcome="error")
+                logger.error(f"Workflow: ошибка выполнения - {e} (прогон {state.run_id} можно продолжить)")
+                raise
+        total = time.perf_counter() - started
+        WORKFLOW_RUN_SECONDS.observe(total)
+        WORKFLOW_ITERATIONS.observe(final_state.iteration_count)
+        WORKFLOW_RUNS.inc(outcome="failed" if final_state.errors else "success")
+
+        if self.checkpoint_store is not None and final_state.run_id:
+            await self.checkpoint_store.delete(final_state.run_id)
+        if vector is not None:
+            await self._remember(vector, final_state)
+
+        result = self._format_result(final_state)
+        result["usage"] = usage
+        result["timings"] = self._format_timings(timings, total)
+        return final_state, result
+
+    @staticmethod
+    def _format_timings(timings: List[Dict[str, Any]], total: float) -> Dict[str, Any]:
+        """Разбивка времени прогона: каждый запуск этапа и сумма по этапам."""
+        by_stage: Dict[str, float] = {}
+        for entry in timings:
+            by_stage[entry["stage"]] = round(by_stage.get(entry["stage"], 0.0) + entry["duration_ms"], 2)
+        return {"total_ms": round(total * 1000, 2), "by_stage": by_stage, "stages": timings}
+
+    async def stream(self, user_input: str, run_id: Optional[str] = None) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Потоковый запуск воркфлоу.
+        Отдаёт события stage_start / token / field / stage_complete от всех узлов
+        (field - законченное поле JSON-ответа этапа, раньше конца вызова),
+        а в конце - событие result с тем же содержимым, что и run().
+        """
+        async for event in self.stream_call(lambda: self.run(user_input, run_id=run_id)):
+            yield event
+
+    async def stream_call(self, call: Callable[[], Awaitable[Dict[str, Any]]]) -> AsyncGenerator[Dict[str, Any], None]:
+        """События любого запуска воркфлоу (прогон, уточнение); результат call - событием result."""
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def produce():
+            with event_sink(queue):
+                try:
+                    result = await call()
+                    await queue.put({"event": "result", "data": result})
+                except Exception as e:
+                    await queue.put({"event": "error", "detail": str(e)})
+
+        task = asyncio.create_task(produce())
+        try:
+            while True:
+                event = await queue.get()
+                yield event
+                if event["event"] in ("result", "error"):
+                    break
+        finally:
+            # Клиент мог отключиться раньше - не оставляем работу в фоне
+            if not task.done():
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
 
     def _format_result(self, state: AgentState) -> Dict[str, Any]:
         """Форматирует результат для API."""
         return {
             "success": len(state.errors) == 0,
+            "run_id": state.run_id,
             "errors": state.errors,
             "requirements": state.requirements_analysis if state.requirements_complete else None,
             "design": state.component_design if state.design_complete else None,
@@ -151,11 +601,21 @@ class MultiAgentWorkflow:
                 "component_name": state.component_name
             } if state.code_generated else None,
             "review": state.code_review if state.code_reviewed else None,
+            "static_review": state.static_review,
+            "semantic_cache": state.context.get("semantic_cache"),
+            "examples": [example["name"] for example in state.context.get("examples", [])],
+            "candidates": state.context.get("candidates"),
             "iteration_count": state.iteration_count,
             "timestamp": state.timestamp.isoformat() if hasattr(state.timestamp, 'isoformat') else str(state.timestamp)
         }
 
 
-def create_workflow(ollama_service):
+def create_workflow(
+    ollama_service,
+    checkpoint_store: Optional[CheckpointStore] = None,
+    semantic_cache: Optional[SemanticCache] = None,
+    component_library: Optional[ComponentLibrary] = None,
+    code_selection: Optional[str] = None
+):
     """Фабричная функция для создания воркфлоу"""
-    return MultiAgentWorkflow(ollama_service)
\ No newline at end of file
+    return MultiAgentWorkflow(ollama_service, checkpoint_store, semantic_cache, component_library, code_selection)
\ No newline at end of file
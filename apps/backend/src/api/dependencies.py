@@ -0,0 +1,78 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Зависимости FastAPI.
+Выдают общие для всего процесса объекты, созданные в lifespan приложения.
+"""
+
+from fastapi import HTTPException, Request, WebSocketException, status
+from starlette.requests import HTTPConnection
+
+from src.services.admission import AdmissionController
+from src.services.health import ReadinessProbe
+from src.services.job_runner import JobRunner
+from src.services.ollama_service import OllamaService
+from src.agents.sessions import SessionManager
+from src.agents.workflow import MultiAgentWorkflow
+
+
+def get_ollama_service(request: Request) -> OllamaService:
+    """Возвращает общий OllamaService приложения."""
+    service = getattr(request.app.state, "ollama_service", None)
+    if service is None:
+        raise HTTPException(status_code=503, detail="OllamaService не инициализирован")
+    return service
+
+
+def get_workflow(request: Request) -> MultiAgentWorkflow:
+    """Возвращает общий скомпилированный воркфлоу."""
+    workflow = getattr(request.app.state, "workflow", None)
+    if workflow is None:
+        raise HTTPException(status_code=503, detail="Воркфлоу не инициализирован")
+    return workflow
+
+
+def get_admission(request: Request) -> AdmissionController:
+    """Возвращает контроллер допуска процесса."""
+    admission = getattr(request.app.state, "admission", None)
+    if admission is None:
+        raise HTTPException(status_code=503, detail="Контроль допуска не инициализирован")
+    return admission
+
+
+def get_job_runner(request: Request) -> JobRunner:
+    """Возвращает пул фоновых воркеров задач."""
+    runner = getattr(request.app.state, "job_runner", None)
+    if runner is None:
+        raise HTTPException(status_code=503, detail="Очередь задач не инициализирована")
+    return runner
+
+
+def get_readiness(request: Request) -> ReadinessProbe:
+    """Возвращает пробу готовности приложения."""
+    readiness = getattr(request.app.state, "readiness", None)
+    if readiness is None:
+        raise HTTPException(status_code=503, detail="Приложение не инициализировано")
+    return readiness
+
+
+def get_sessions(connection: HTTPConnection) -> SessionManager:
+    """Возвращает хранилище сессий уточнений (для HTTP и WebSocket)."""
+    sessions = getattr(connection.app.state, "sessions", None)
+    if sessions is None:
+        if connection.scope["type"] == "websocket":
+            raise WebSocketException(code=status.WS_1013_TRY_AGAIN_LATER, reason="Сессии не инициализированы")
+        raise HTTPException(status_code=503, detail="Сессии не инициализированы")
+    return sessions
@@ -17,36 +17,122 @@
 Роутер для работы с мультиагентной системой AI.
 """
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Any, AsyncGenerator, Dict, List, Optional
+import json
+import logging
 import traceback
 
 # ✅ ПРАВИЛЬНЫЕ ИМПОРТЫ (абсолютные пути от корня src/)
+from src.agents.batch import create_batch_generator
+from src.agents.sessions import SessionManager
+from src.agents.workflow import MultiAgentWorkflow
+from src.core.config import settings
+from src.api.dependencies import get_admission, get_ollama_service, get_sessions, get_workflow
+from src.services.admission import AdmissionController, AdmissionError, Priority, QueueFullError, Ticket
 from src.services.ollama_service import OllamaService
-from src.agents.workflow import create_workflow
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 class GenerateRequest(BaseModel):
     prompt: str
     stream: bool = False
+    priority: Priority = Priority.INTERACTIVE
+    run_id: Optional[str] = None  # Продолжить прерванный прогон с последнего чекпоинта
+
+class BatchRequest(BaseModel):
+    prompts: List[str] = Field(..., min_length=1, max_length=settings.BATCH_MAX_ITEMS)
+    concurrency: Optional[int] = Field(None, ge=1)  # Не больше BATCH_CONCURRENCY
+    stream: bool = True
+    priority: Priority = Priority.BATCH
+
+def _admission_error(error: AdmissionError) -> HTTPException:
+    """429 при переполненной очереди, 503 при истечении ожидания; всегда с Retry-After."""
+    status_code = 429 if isinstance(error, QueueFullError) else 503
+    return HTTPException(
+        status_code=status_code,
+        detail={
+            "message": str(error),
+            "queue_position": error.queue_position,
+            "retry_after": error.retry_after,
+        },
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+def _format_sse(event: Dict[str, Any]) -> str:
+    """Сериализует событие воркфлоу в формат text/event-stream."""
+    data = json.dumps(event, ensure_ascii=False, default=str)
+    return f"event: {event['event']}\ndata: {data}\n\n"
+
+
+async def _sse_events(
+    workflow: MultiAgentWorkflow,
+    prompt: str,
+    admission: AdmissionController,
+    priority: Priority,
+    run_id: Optional[str] = None
+) -> AsyncGenerator[str, None]:
+    # Место в очереди берётся внутри генератора: если клиент отключился до начала
+    # отдачи тела, генератор не запустится и слот не останется занятым
+    try:
+        ticket = admission.enqueue(priority)
+    except QueueFullError as e:
+        yield _format_sse({
+            "event": "error", "detail": str(e), "status": 429,
+            "queue_position": e.queue_position, "retry_after": e.retry_after,
+        })
+        return
+
+    try:
+        if ticket.position:
+            yield _format_sse({"event": "queued", "queue_position": ticket.position})
+        try:
+            await ticket.wait()
+        except AdmissionError as e:
+            yield _format_sse({"event": "error", "detail": str(e), "retry_after": e.retry_after})
+            return
+
+        async for event in workflow.stream(prompt, run_id=run_id):
+            yield _format_sse(event)
+    finally:
+        ticket.release()
+
 
 @router.post("/generate")
-async def generate_component(request: GenerateRequest):
+async def generate_component(
+    request: GenerateRequest,
+    workflow: MultiAgentWorkflow = Depends(get_workflow),
+    admission: AdmissionController = Depends(get_admission)
+):
+    if request.stream:
+        # Первые байты уходят клиенту вместе с первым событием, а не после всего пайплайна
+        return StreamingResponse(
+            _sse_events(workflow, request.prompt, admission, request.priority, request.run_id),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    # Место в очереди резервируется сразу: при переполнении - быстрый отказ
     try:
-        print("🔍 Шаг 1: Создание OllamaService")
-        ollama_service = OllamaService()
-        print("✅ Шаг 1: Успешно")
+        ticket = admission.enqueue(request.priority)
+    except QueueFullError as e:
+        raise _admission_error(e)
 
-        print("🔍 Шаг 2: Создание workflow")
-        workflow = create_workflow(ollama_service)
-        print("✅ Шаг 2: Успешно")
+    try:
+        await ticket.wait()
+    except AdmissionError as e:
+        raise _admission_error(e)
 
-        print(f"🔍 Шаг 3: Запуск workflow с промптом: {request.prompt[:50]}...")
-        result = await workflow.run(request.prompt)
-        print("✅ Шаг 3: Успешно")
+    try:
+        # OllamaService и граф общие для процесса: создаются в lifespan (src/main.py)
+        logger.info(f"Запуск workflow с промптом: {request.prompt[:50]}...")
+        result = await workflow.run(request.prompt, run_id=request.run_id)
+        logger.info("Workflow завершён")
 
-        await ollama_service.close()
         return {"success": True, "data": result}
 
     except Exception as e:
@@ -54,4 +140,159 @@ async def generate_component(request: GenerateRequest):
         print(error_msg)
         print("Трейсбек:")
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=error_msg)
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=error_msg)
+
+    finally:
+        ticket.release()
+
+
+@router.post("/generate/batch")
+async def generate_batch(
+    request: BatchRequest,
+    workflow: MultiAgentWorkflow = Depends(get_workflow),
+    admission: AdmissionController = Depends(get_admission)
+):
+    """
+    Генерация набора компонентов. Анализы выполняются для всех запросов сразу,
+    совпадающие объединяются, остальные этапы идут с ограниченным параллелизмом.
+    При stream=true результаты элементов приходят SSE-событиями по готовности.
+    """
+    concurrency = min(request.concurrency or settings.BATCH_CONCURRENCY, settings.BATCH_CONCURRENCY)
+    batch = create_batch_generator(workflow, admission, concurrency, request.priority)
+    logger.info(f"Пакет: {len(request.prompts)} запросов, параллельно {concurrency}")
+
+    if request.stream:
+        return StreamingResponse(
+            (_format_sse(event) async for event in batch.stream(request.prompts)),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    items: List[Optional[Dict[str, Any]]] = [None] * len(request.prompts)
+    summary: Dict[str, Any] = {}
+    async for event in batch.stream(request.prompts):
+        if event["event"] in ("item", "item_error"):
+            items[event["index"]] = event
+        elif event["event"] == "batch_complete":
+            summary = event
+    return {"success": summary.get("failed", 0) == 0, "data": {"items": items, "summary": summary}}
+
+
+@router.post("/runs/{run_id}/resume")
+async def resume_run(
+    run_id: str,
+    workflow: MultiAgentWorkflow = Depends(get_workflow),
+    admission: AdmissionController = Depends(get_admission)
+):
+    """Продолжает прерванный прогон с последнего завершённого узла."""
+    try:
+        async with admission.admit(Priority.INTERACTIVE):
+            result = await workflow.resume(run_id)
+    except AdmissionError as e:
+        raise _admission_error(e)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+    return {"success": True, "data": result}
+
+
+@router.websocket("/sessions/ws")
+async def session_socket(
+    websocket: WebSocket,
+    session_id: Optional[str] = None,
+    sessions: SessionManager = Depends(get_sessions)
+):
+    """
+    Сессия уточнений. Клиент шлёт {"prompt": "..."}; первый запрос - полный
+    прогон, следующие («сделай кнопку круглой») начинаются с самого дешёвого
+    достаточного этапа. В ответ идут события воркфлоу и result.
+    С ?session_id= продолжается существующая сессия (после переподключения).
+    """
+    await websocket.accept()
+    session = sessions.open(session_id)
+    await websocket.send_json({"event": "session", "session_id": session.id, "turns": session.turns})
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except (ValueError, KeyError):  # Не JSON или бинарный кадр
+                await websocket.send_json({"event": "error", "detail": "Ожидается JSON вида {\"prompt\": \"...\"}"})
+                continue
+            prompt = message.get("prompt", "") if isinstance(message, dict) else ""
+            prompt = prompt.strip() if isinstance(prompt, str) else ""
+            if not prompt:
+                await websocket.send_json({"event": "error", "detail": "Пустой запрос"})
+                continue
+            logger.info(f"Сессия {session.id}: {prompt[:50]}...")
+            async for event in sessions.stream(session, prompt):
+                await websocket.send_text(json.dumps(event, ensure_ascii=False, default=str))
+    except WebSocketDisconnect:
+        logger.info(f"Сессия {session.id}: клиент отключился")
+
+
+@router.get("/sessions/stats")
+async def sessions_stats(sessions: SessionManager = Depends(get_sessions)):
+    """Сессии уточнений: активные, вытесненные, занятая память, маршруты запросов."""
+    return sessions.snapshot()
+
+
+@router.get("/cache/stats")
+async def cache_stats(ollama_service: OllamaService = Depends(get_ollama_service)):
+    """Счётчики попаданий и промахов кэша ответов LLM."""
+    return ollama_service.cache_stats()
+
+
+@router.get("/semantic_cache/stats")
+async def semantic_cache_stats(workflow: MultiAgentWorkflow = Depends(get_workflow)):
+    """Семантический кэш анализа и дизайна: доля попаданий, число записей и вытеснений."""
+    if workflow.semantic_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **workflow.semantic_cache.snapshot()}
+
+
+@router.get("/component_library/stats")
+async def component_library_stats(workflow: MultiAgentWorkflow = Depends(get_workflow)):
+    """Библиотека принятых компонентов: размер, число проиндексированных и выданных примеров."""
+    if workflow.component_library is None:
+        return {"enabled": False}
+    return {"enabled": True, **workflow.component_library.snapshot()}
+
+
+@router.get("/usage/stats")
+async def usage_stats(ollama_service: OllamaService = Depends(get_ollama_service)):
+    """Вычисления Ollama по моделям: prompt_eval_count/duration и eval_count/duration."""
+    return ollama_service.usage_snapshot()
+
+
+@router.get("/token_budget/stats")
+async def token_budget_stats(ollama_service: OllamaService = Depends(get_ollama_service)):
+    """Бюджет токенов: num_ctx по моделям, сокращённые num_predict и переполнения контекста."""
+    return ollama_service.budget_stats()
+
+
+@router.get("/scheduler/stats")
+async def scheduler_stats(ollama_service: OllamaService = Depends(get_ollama_service)):
+    """Состояние планировщика моделей: активные модели, очереди, число загрузок."""
+    if ollama_service.scheduler is None:
+        return {"enabled": False}
+    return {"enabled": True, **ollama_service.scheduler.snapshot()}
+
+
+@router.get("/hosts/stats")
+async def hosts_stats(ollama_service: OllamaService = Depends(get_ollama_service)):
+    """Узлы Ollama: доступность, незавершённые запросы, загруженные модели."""
+    return ollama_service.pool.snapshot()
+
+
+@router.get("/static_review/stats")
+async def static_review_stats(workflow: MultiAgentWorkflow = Depends(get_workflow)):
+    """Статическая проверка кода: сколько LLM-вызовов ревьюера сэкономлено."""
+    if workflow.static_reviewer is None:
+        return {"enabled": False}
+    return {"enabled": True, **workflow.static_reviewer.snapshot()}
+
+
+@router.get("/admission/stats")
+async def admission_stats(admission: AdmissionController = Depends(get_admission)):
+    """Загрузка процесса: выполняемые пайплайны и длина очередей по приоритетам."""
+    return admission.snapshot()
\ No newline at end of file
@@ -0,0 +1,40 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# src/api/routers/health.py
+"""
+Проверки для оркестратора: живость процесса и готовность принимать запросы.
+Ни одна из них не вызывает LLM.
+"""
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+
+from src.api.dependencies import get_readiness
+from src.services.health import ReadinessProbe
+
+router = APIRouter()
+
+
+@router.get("/health/live")
+async def live():
+    """Процесс отвечает; Ollama не проверяется."""
+    return {"status": "alive"}
+
+
+@router.get("/health/ready")
+async def ready(readiness: ReadinessProbe = Depends(get_readiness)):
+    """200 - прогрев завершён, Ollama отвечает и модели установлены; иначе 503."""
+    result = await readiness.check()
+    return JSONResponse(status_code=200 if result["ready"] else 503, content=result)
@@ -0,0 +1,89 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Роутер асинхронных задач генерации.
+Задача ставится в очередь и сразу возвращает id; статус и результат
+запрашиваются отдельно, с поддержкой long-poll.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from src.api.dependencies import get_job_runner
+from src.core.config import settings
+from src.services.admission import Priority
+from src.services.job_runner import JobRunner
+from src.services.job_store import JobStatus
+
+router = APIRouter()
+
+
+class JobRequest(BaseModel):
+    prompt: str
+    priority: Priority = Priority.BATCH
+
+
+@router.post("/jobs", status_code=202)
+async def submit_job(request: JobRequest, runner: JobRunner = Depends(get_job_runner)):
+    """Ставит генерацию в очередь и сразу возвращает id задачи."""
+    job = await runner.submit(request.prompt, request.priority)
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/ai/jobs/{job.id}",
+        "result_url": f"/api/ai/jobs/{job.id}/result",
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, description="Ждать завершения до N секунд (long-poll)"),
+    runner: JobRunner = Depends(get_job_runner)
+):
+    """Статус задачи; с wait > 0 ответ приходит при завершении или по истечении wait."""
+    if wait:
+        job = await runner.wait(job_id, min(wait, settings.JOB_MAX_WAIT))
+    else:
+        job = await runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    return job.to_dict(include_result=False)
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(
+    job_id: str,
+    wait: float = Query(0, ge=0),
+    runner: JobRunner = Depends(get_job_runner)
+):
+    """Результат задачи: 200 - готово, 202 - ещё выполняется."""
+    job = await runner.wait(job_id, min(wait, settings.JOB_MAX_WAIT)) if wait else await runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    if job.status in (JobStatus.QUEUED.value, JobStatus.RUNNING.value):
+        return JSONResponse(status_code=202, content=job.to_dict(include_result=False))
+    return job.to_dict()
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str, runner: JobRunner = Depends(get_job_runner)):
+    """Отменяет задачу, которая ещё ждёт в очереди."""
+    if await runner.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    if not await runner.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Задачу нельзя отменить: она уже выполняется или завершена")
+    return {"job_id": job_id, "status": JobStatus.CANCELLED.value}
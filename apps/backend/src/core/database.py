@@ -0,0 +1,73 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Подключение к базе данных через SQLAlchemy.
+По умолчанию используется локальный SQLite; PostgreSQL подключается через DATABASE_URL.
+"""
+
+import os
+
+from sqlalchemy import Table, create_engine, event, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import DeclarativeBase, sessionmaker
+
+
+class Base(DeclarativeBase):
+    """Базовый класс ORM-моделей."""
+
+
+def create_db_engine(url: str) -> Engine:
+    """Создаёт движок; для SQLite - каталог файла, WAL и доступ из потоков."""
+    if url.startswith("sqlite"):
+        path = url.split("///", 1)[-1]
+        directory = os.path.dirname(path)
+        if path and path != ":memory:" and directory:
+            os.makedirs(directory, exist_ok=True)
+
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+
+        @event.listens_for(engine, "connect")
+        def _sqlite_pragmas(dbapi_connection, _record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+        # Режим WAL хранится в файле базы - включаем один раз, пока нет других соединений,
+        # иначе смена режима из параллельных потоков даёт "database is locked"
+        with engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+
+        return engine
+
+    return create_engine(url, pool_pre_ping=True)
+
+
+def create_session_factory(engine: Engine) -> sessionmaker:
+    return sessionmaker(bind=engine, expire_on_commit=False)
+
+
+def add_missing_columns(engine: Engine, table: Table) -> None:
+    """
+    Добавляет в существующую таблицу столбцы, появившиеся в модели позже
+    (только nullable): create_all не меняет уже созданные таблицы.
+    """
+    existing = {column["name"] for column in inspect(engine).get_columns(table.name)}
+    missing = [column for column in table.columns if column.name not in existing]
+    if not missing:
+        return
+    with engine.begin() as connection:
+        for column in missing:
+            column_type = column.type.compile(dialect=engine.dialect)
+            connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
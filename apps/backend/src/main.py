@@ -19,11 +19,24 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 import logging
 
-from .api.routers import ai
+from .api.routers import ai, health, jobs
 from .core.config import settings
+from .core.metrics import REGISTRY
+from .services.ollama_service import OllamaService, OllamaConfig
+from .services.admission import AdmissionController
+from .services.health import ReadinessProbe, create_model_warmup
+from .services.job_runner import JobRunner
+from .services.job_store import JobStore
+from .services.checkpoint_store import SqlCheckpointStore
+from .services.component_library import ComponentLibrary
+from .services.semantic_cache import SemanticCache
+from .core.database import create_db_engine
+from .agents.sessions import create_session_manager
+from .agents.workflow import create_workflow
 
 # Настройка логирования
 logging.basicConfig(
@@ -38,12 +51,96 @@ async def lifespan(app: FastAPI):
     """Управление жизненным циклом приложения."""
     logger.info("🚀 Запуск Local AI Studio Backend...")
 
-    # Проверка подключения к Ollama можно добавить здесь
+    # Один пул соединений и один скомпилированный граф на весь процесс
+    ollama_service = OllamaService(OllamaConfig.from_settings(settings))
+    await ollama_service.start()
+    app.state.ollama_service = ollama_service
 
-    yield
+    # База хранит очередь задач и чекпоинты: прерванная работа продолжается после перезапуска
+    engine = create_db_engine(settings.DATABASE_URL)
+    checkpoint_store = None
+    if settings.WORKFLOW_CHECKPOINTS:
+        checkpoint_store = SqlCheckpointStore(engine, ttl=settings.WORKFLOW_CHECKPOINT_TTL)
+    semantic_cache = None
+    if settings.SEMANTIC_CACHE_ENABLED:
+        semantic_cache = SemanticCache(
+            path=settings.SEMANTIC_CACHE_PATH,
+            threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+            max_items=settings.SEMANTIC_CACHE_MAX_ITEMS,
+            ttl=settings.SEMANTIC_CACHE_TTL,
+            model=settings.OLLAMA_MODEL_EMBEDDING,
+            save_every=settings.VECTOR_INDEX_SAVE_EVERY,
+            save_interval=settings.VECTOR_INDEX_SAVE_INTERVAL,
+        )
+    component_library = None
+    if settings.COMPONENT_LIBRARY_ENABLED:
+        component_library = ComponentLibrary(
+            path=settings.COMPONENT_LIBRARY_PATH,
+            max_items=settings.COMPONENT_LIBRARY_MAX_ITEMS,
+            min_score=settings.COMPONENT_LIBRARY_MIN_SCORE,
+            top_k=settings.COMPONENT_LIBRARY_TOP_K,
+            min_similarity=settings.COMPONENT_LIBRARY_MIN_SIMILARITY,
+            max_example_chars=settings.COMPONENT_LIBRARY_MAX_EXAMPLE_CHARS,
+            model=settings.OLLAMA_MODEL_EMBEDDING,
+            save_every=settings.VECTOR_INDEX_SAVE_EVERY,
+            save_interval=settings.VECTOR_INDEX_SAVE_INTERVAL,
+        )
+    app.state.workflow = create_workflow(ollama_service, checkpoint_store, semantic_cache, component_library)
+    app.state.admission = AdmissionController.from_settings(settings)
+    app.state.sessions = create_session_manager(
+        app.state.workflow,
+        app.state.admission,
+        max_sessions=settings.SESSION_MAX_SESSIONS,
+        max_bytes=settings.SESSION_MAX_BYTES,
+        idle_timeout=settings.SESSION_IDLE_TIMEOUT,
+        review_refinements=settings.SESSION_REVIEW_REFINEMENTS,
+    )
 
-    # Очистка при завершении
-    logger.info("👋 Backend остановлен")
+    job_runner = JobRunner(
+        JobStore(engine, lease_seconds=settings.JOB_LEASE_SECONDS, max_attempts=settings.JOB_MAX_ATTEMPTS),
+        app.state.workflow,
+        admission=app.state.admission,
+        workers=settings.JOB_WORKERS,
+        poll_interval=settings.JOB_POLL_INTERVAL,
+    )
+    await job_runner.start()
+    app.state.job_runner = job_runner
+
+    # Модели этапов (и эмбеддинговая, если она нужна кэшу или библиотеке) загружаются
+    # в фоне: /health/ready отвечает 503, пока прогрев не закончится. Эмбеддинговая
+    # готовность не определяет: без неё кэш и библиотека просто не работают
+    models = ollama_service.stage_models()
+    optional_models = []
+    if semantic_cache is not None or component_library is not None:
+        optional_models.append(settings.OLLAMA_MODEL_EMBEDDING)
+    warmup = None
+    if settings.OLLAMA_WARMUP_ENABLED:
+        warmup = create_model_warmup(ollama_service, models + optional_models, timeout=settings.OLLAMA_WARMUP_TIMEOUT)
+        warmup.start()
+    app.state.readiness = ReadinessProbe(
+        ollama_service, models, warmup, ttl=settings.HEALTH_PROBE_TTL, optional_models=optional_models
+    )
+
+    try:
+        yield
+    finally:
+        # Очистка при завершении
+        if warmup is not None:
+            await warmup.close()
+        await job_runner.stop()
+        # Прогоны остановлены - дописываем изменения индексов, не попавшие в очередное сохранение
+        for index in (semantic_cache, component_library):
+            if index is not None:
+                await index.close()
+        engine.dispose()
+        await ollama_service.close()
+        app.state.workflow = None
+        app.state.admission = None
+        app.state.sessions = None
+        app.state.job_runner = None
+        app.state.ollama_service = None
+        app.state.readiness = None
+        logger.info("👋 Backend остановлен")
 
 
 app = FastAPI(
@@ -64,6 +161,8 @@ app.add_middleware(
 
 # Подключение роутеров
 app.include_router(ai.router, prefix="/api/ai", tags=["AI"])
+app.include_router(jobs.router, prefix="/api/ai", tags=["Jobs"])
+app.include_router(health.router, tags=["Health"])
 
 
 @app.get("/")
@@ -73,4 +172,21 @@ async def root():
         "message": "Local AI Studio API",
         "version": "0.1.0",
         "docs": "/docs"
-    }
\ No newline at end of file
+    }
+
+
+# Гауги текущего состояния обновляются при каждом сборе метрик
+ADMISSION_RUNNING = REGISTRY.gauge("admission_running", "Выполняемые сейчас прогоны воркфлоу")
+ADMISSION_QUEUED = REGISTRY.gauge("admission_queued", "Прогоны в очереди допуска", ("priority",))
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Метрики процесса в текстовом формате Prometheus."""
+    admission = getattr(app.state, "admission", None)
+    if admission is not None:
+        snapshot = admission.snapshot()
+        ADMISSION_RUNNING.set(snapshot["running"])
+        for priority, queued in snapshot["queued"].items():
+            ADMISSION_QUEUED.set(queued, priority=priority)
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
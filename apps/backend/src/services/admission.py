@@ -0,0 +1,241 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Контроль допуска запусков воркфлоу.
+Ограничивает число одновременно выполняемых пайплайнов в процессе и держит
+ограниченную очередь ожидания с приоритетами (интерактивные запросы и пакетные
+задачи). Если очередь заполнена, запрос отклоняется сразу, с оценкой
+Retry-After, а не принимается в работу, которую процесс не успеет выполнить.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from ..core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "admission_queue_wait_seconds", "Ожидание допуска к запуску воркфлоу", ("priority",),
+    buckets=(0.001, 0.01, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+
+
+class Priority(str, Enum):
+    """Полосы очереди допуска."""
+    INTERACTIVE = "interactive"  # Пользователь ждёт ответа в UI
+    BATCH = "batch"              # Фоновые и пакетные задачи
+
+
+class AdmissionError(Exception):
+    """Запуск не допущен. retry_after - рекомендуемая пауза в секундах."""
+
+    def __init__(self, message: str, retry_after: int, queue_position: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.queue_position = queue_position
+
+
+class QueueFullError(AdmissionError):
+    """Очередь ожидания заполнена - запрос отклонён без ожидания."""
+
+
+class QueueTimeoutError(AdmissionError):
+    """Запрос простоял в очереди дольше допустимого."""
+
+
+class Ticket:
+    """Место в очереди допуска. После wait() держит слот до release()."""
+
+    def __init__(self, controller: "AdmissionController", priority: Priority):
+        self.controller = controller
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.admitted_at: Optional[float] = None
+        self._future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._released = False
+
+    @property
+    def position(self) -> int:
+        """Позиция в очереди (1 - следующий), 0 - уже допущен."""
+        return self.controller._position(self)
+
+    async def wait(self) -> None:
+        """Ждёт допуска не дольше queue_timeout контроллера."""
+        try:
+            await asyncio.wait_for(asyncio.shield(self._future), self.controller.queue_timeout)
+        except asyncio.TimeoutError:
+            position = self.position
+            self.release()
+            raise QueueTimeoutError(
+                "Превышено время ожидания в очереди",
+                retry_after=self.controller.estimate_wait(position),
+                queue_position=position,
+            )
+        except asyncio.CancelledError:
+            self.release()
+            raise
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self.controller._release(self)
+
+
+class AdmissionController:
+    """
+    Ограничение одновременных запусков с ограниченной очередью и приоритетами.
+    Особенности:
+    - Не больше max_concurrent пайплайнов выполняется одновременно
+    - Интерактивная полоса обслуживается первой, но каждый batch_every-й слот
+      отдаётся пакетной полосе, чтобы она не голодала
+    - Ёмкость очереди ограничена по полосам; при переполнении - QueueFullError
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 2,
+        max_queue: int = 16,
+        max_batch_queue: int = 64,
+        queue_timeout: float = 300.0,
+        batch_every: int = 4
+    ):
+        self.max_concurrent = max_concurrent
+        self.limits = {Priority.INTERACTIVE: max_queue, Priority.BATCH: max_batch_queue}
+        self.queue_timeout = queue_timeout
+        self.batch_every = batch_every
+
+        self._queues: Dict[Priority, Deque[Ticket]] = {p: deque() for p in Priority}
+        self._running = 0
+        self._interactive_streak = 0
+        # Скользящее среднее длительности запуска для оценки Retry-After
+        self._avg_run_time = 60.0
+
+        self.stats: Dict[str, int] = {"admitted": 0, "rejected": 0, "abandoned": 0}
+
+    @classmethod
+    def from_settings(cls, settings) -> "AdmissionController":
+        return cls(
+            max_concurrent=settings.ADMISSION_MAX_CONCURRENT,
+            max_queue=settings.ADMISSION_MAX_QUEUE,
+            max_batch_queue=settings.ADMISSION_MAX_BATCH_QUEUE,
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+        )
+
+    def enqueue(self, priority: Priority = Priority.INTERACTIVE) -> Ticket:
+        """Ставит запрос в очередь или сразу отклоняет, если места нет."""
+        priority = Priority(priority)
+        ticket = Ticket(self, priority)
+        if self._running < self.max_concurrent and not any(self._queues.values()):
+            self._admit(ticket)
+            return ticket
+
+        queue = self._queues[priority]
+        if len(queue) >= self.limits[priority]:
+            self.stats["rejected"] += 1
+            position = self._waiting_ahead(priority) + 1
+            raise QueueFullError(
+                f"Очередь {priority.value} заполнена",
+                retry_after=self.estimate_wait(position),
+                queue_position=position,
+            )
+        queue.append(ticket)
+        return ticket
+
+    @asynccontextmanager
+    async def admit(self, priority: Priority = Priority.INTERACTIVE) -> AsyncIterator[Ticket]:
+        """Удерживает слот выполнения на время блока."""
+        ticket = self.enqueue(priority)
+        try:
+            await ticket.wait()
+            yield ticket
+        finally:
+            ticket.release()
+
+    def estimate_wait(self, position: int) -> int:
+        """Оценка ожидания (с) для позиции в очереди по средней длительности запуска."""
+        rounds = math.ceil(max(position, 1) / max(self.max_concurrent, 1))
+        return max(1, int(rounds * self._avg_run_time))
+
+    def _waiting_ahead(self, priority: Priority) -> int:
+        if priority == Priority.INTERACTIVE:
+            return len(self._queues[Priority.INTERACTIVE])
+        return sum(len(q) for q in self._queues.values())
+
+    def _position(self, ticket: Ticket) -> int:
+        if ticket.admitted_at is not None:
+            return 0
+        queue = self._queues[ticket.priority]
+        if ticket not in queue:
+            return 0
+        index = queue.index(ticket) + 1
+        if ticket.priority == Priority.BATCH:
+            index += len(self._queues[Priority.INTERACTIVE])
+        return index
+
+    def _admit(self, ticket: Ticket) -> None:
+        self._running += 1
+        ticket.admitted_at = time.monotonic()
+        ADMISSION_QUEUE_WAIT_SECONDS.observe(ticket.admitted_at - ticket.enqueued_at, priority=ticket.priority.value)
+        self.stats["admitted"] += 1
+        if not ticket._future.done():
+            ticket._future.set_result(None)
+
+    def _release(self, ticket: Ticket) -> None:
+        if ticket.admitted_at is None:
+            # Ушёл из очереди, не дождавшись слота
+            queue = self._queues[ticket.priority]
+            if ticket in queue:
+                queue.remove(ticket)
+                self.stats["abandoned"] += 1
+            return
+
+        self._running -= 1
+        duration = time.monotonic() - ticket.admitted_at
+        self._avg_run_time = 0.8 * self._avg_run_time + 0.2 * duration
+        self._dispatch()
+
+    def _next_ticket(self) -> Optional[Ticket]:
+        interactive = self._queues[Priority.INTERACTIVE]
+        batch = self._queues[Priority.BATCH]
+        if batch and (not interactive or self._interactive_streak >= self.batch_every):
+            self._interactive_streak = 0
+            return batch.popleft()
+        if interactive:
+            self._interactive_streak += 1
+            return interactive.popleft()
+        return None
+
+    def _dispatch(self) -> None:
+        while self._running < self.max_concurrent:
+            ticket = self._next_ticket()
+            if ticket is None:
+                return
+            self._admit(ticket)
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            **self.stats,
+            "running": self._running,
+            "max_concurrent": self.max_concurrent,
+            "queued": {p.value: len(q) for p, q in self._queues.items()},
+            "avg_run_time": round(self._avg_run_time, 2),
+        }
@@ -0,0 +1,167 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Хранилища чекпоинтов воркфлоу.
+После каждого узла графа сохраняется состояние прогона, чтобы после сбоя
+или перезапуска продолжить с последнего завершённого этапа. Для прогона
+хранится только последний чекпоинт, после успешного завершения он удаляется.
+Чекпоинты упавших и брошенных прогонов удаляются по TTL.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+from sqlalchemy import DateTime, String, Text, delete
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..core.database import Base, create_session_factory
+
+logger = logging.getLogger(__name__)
+
+
+class Checkpoint(BaseModel):
+    """Состояние прогона после завершённого узла."""
+    run_id: str
+    node: str
+    state: Dict[str, Any]
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+
+class CheckpointStore(ABC):
+    """
+    Базовый интерфейс хранилища чекпоинтов. Хранилище, в котором не
+    реализован один из методов, не создаётся (TypeError при конструировании).
+    """
+
+    @abstractmethod
+    async def save(self, run_id: str, node: str, state: Dict[str, Any]) -> None:
+        """Сохраняет состояние после узла node, заменяя прежний чекпоинт прогона."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def load(self, run_id: str) -> Optional[Checkpoint]:
+        """Последний чекпоинт прогона или None."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def delete(self, run_id: str) -> None:
+        """Удаляет чекпоинт прогона (если он есть)."""
+        raise NotImplementedError()
+
+
+class InMemoryCheckpointStore(CheckpointStore):
+    """Чекпоинты в памяти процесса - для тестов и запуска без базы."""
+
+    def __init__(self):
+        self._checkpoints: Dict[str, Checkpoint] = {}
+
+    async def save(self, run_id: str, node: str, state: Dict[str, Any]) -> None:
+        # Копия через JSON: дальнейшие изменения состояния не портят чекпоинт
+        state = json.loads(json.dumps(state, ensure_ascii=False, default=str))
+        self._checkpoints[run_id] = Checkpoint(run_id=run_id, node=node, state=state)
+
+    async def load(self, run_id: str) -> Optional[Checkpoint]:
+        return self._checkpoints.get(run_id)
+
+    async def delete(self, run_id: str) -> None:
+        self._checkpoints.pop(run_id, None)
+
+
+class CheckpointRecord(Base):
+    """Последний чекпоинт прогона."""
+    __tablename__ = "workflow_checkpoints"
+
+    run_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    node: Mapped[str] = mapped_column(String(64))
+    state: Mapped[str] = mapped_column(Text)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+
+class SqlCheckpointStore(CheckpointStore):
+    """
+    Чекпоинты в базе через SQLAlchemy (по умолчанию - локальный SQLite).
+    Запись перезаписывает предыдущий чекпоинт прогона, поэтому на прогон
+    приходится одна строка. Строки, не обновлявшиеся дольше ttl секунд,
+    удаляются при открытии и затем не чаще раза в purge_interval при записи;
+    устаревший чекпоинт не продолжается.
+    """
+
+    def __init__(self, engine: Engine, ttl: Optional[float] = None, purge_interval: float = 3600.0):
+        self._sessions = create_session_factory(engine)
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._purged_at = time.monotonic()
+        Base.metadata.create_all(engine, tables=[CheckpointRecord.__table__])
+        if ttl is not None:
+            purged = self.purge_expired()
+            if purged:
+                logger.info(f"Удалено устаревших чекпоинтов: {purged}")
+
+    async def save(self, run_id: str, node: str, state: Dict[str, Any]) -> None:
+        payload = json.dumps(state, ensure_ascii=False, default=str)
+        await asyncio.to_thread(self._save, run_id, node, payload)
+        if self.ttl is not None and time.monotonic() - self._purged_at >= self.purge_interval:
+            self._purged_at = time.monotonic()
+            await asyncio.to_thread(self.purge_expired)
+
+    async def load(self, run_id: str) -> Optional[Checkpoint]:
+        record = await asyncio.to_thread(self._load, run_id)
+        if record is None or self._expired(record.updated_at):
+            return None
+        return Checkpoint(
+            run_id=record.run_id,
+            node=record.node,
+            state=json.loads(record.state),
+            updated_at=record.updated_at,
+        )
+
+    async def delete(self, run_id: str) -> None:
+        await asyncio.to_thread(self._delete, run_id)
+
+    def purge_expired(self) -> int:
+        """Удаляет чекпоинты старше ttl; возвращает число удалённых."""
+        if self.ttl is None:
+            return 0
+        with self._sessions() as session:
+            result = session.execute(delete(CheckpointRecord).where(CheckpointRecord.updated_at < self._cutoff()))
+            session.commit()
+            return result.rowcount or 0
+
+    def _cutoff(self) -> datetime:
+        return datetime.now() - timedelta(seconds=self.ttl)
+
+    def _expired(self, updated_at: datetime) -> bool:
+        return self.ttl is not None and updated_at < self._cutoff()
+
+    def _save(self, run_id: str, node: str, payload: str) -> None:
+        with self._sessions() as session:
+            session.merge(CheckpointRecord(run_id=run_id, node=node, state=payload, updated_at=datetime.now()))
+            session.commit()
+
+    def _load(self, run_id: str) -> Optional[CheckpointRecord]:
+        with self._sessions() as session:
+            return session.get(CheckpointRecord, run_id)
+
+    def _delete(self, run_id: str) -> None:
+        with self._sessions() as session:
+            session.execute(delete(CheckpointRecord).where(CheckpointRecord.run_id == run_id))
+            session.commit()
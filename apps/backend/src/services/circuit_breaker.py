@@ -0,0 +1,101 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Автомат защиты (circuit breaker) узла Ollama.
+Пока узел лежит, каждый вызов ждёт таймаута соединения, а воркфлоу тратит
+на это минуты. После серии ошибок автомат размыкается и вызовы сразу
+получают CircuitOpenError; через reset_timeout пропускается один пробный
+вызов (полуоткрытое состояние), и его исход замыкает или снова размыкает цепь.
+"""
+
+import time
+from enum import Enum
+from typing import Callable, Dict
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"        # Вызовы идут
+    OPEN = "open"            # Отказ без вызова
+    HALF_OPEN = "half_open"  # Один пробный вызов
+
+
+class CircuitOpenError(Exception):
+    """Все узлы Ollama недоступны - вызов отклонён без обращения к ним."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Счётчик ошибок подряд с размыканием на reset_timeout секунд."""
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> CircuitState:
+        if self._opened_at is None:
+            return CircuitState.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return CircuitState.HALF_OPEN
+        return CircuitState.OPEN
+
+    def available(self) -> bool:
+        """Можно ли отправить вызов: цепь замкнута или пробный вызов ещё не занят."""
+        state = self.state
+        return state is CircuitState.CLOSED or (state is CircuitState.HALF_OPEN and not self._trial_in_flight)
+
+    def begin(self) -> bool:
+        """Отмечает начало вызова; True - это пробный вызов полуоткрытой цепи."""
+        if self.state is CircuitState.HALF_OPEN:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def end_trial(self) -> None:
+        """Пробный вызов завершён (в том числе отменён) - следующий может стать пробным."""
+        self._trial_in_flight = False
+
+    def record_success(self) -> bool:
+        """Успех замыкает цепь. True - цепь была разомкнута."""
+        was_open = self._opened_at is not None
+        self.failures = 0
+        self._opened_at = None
+        return was_open
+
+    def record_failure(self) -> bool:
+        """Ошибка; True - цепь только что разомкнулась."""
+        self.failures += 1
+        if self.state is CircuitState.HALF_OPEN or (
+            self._opened_at is None and self.failures >= self.failure_threshold
+        ):
+            self._opened_at = self._clock()
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        """Сколько секунд до пробного вызова."""
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - self._clock())
+
+    def snapshot(self) -> Dict[str, object]:
+        return {"state": self.state.value, "failures": self.failures, "retry_after": round(self.retry_after(), 1)}
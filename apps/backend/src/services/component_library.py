@@ -0,0 +1,118 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Локальная библиотека принятых компонентов.
+Компоненты, получившие на ревью оценку не ниже порога, индексируются по
+имени, пропсам и эмбеддингу запроса. Для нового запроса ближайшие из них
+подставляются в промпты дизайнера и генератора как примеры (few-shot).
+"""
+
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .vector_index import VectorIndex
+
+
+class ComponentLibrary:
+    """
+    Индекс принятых компонентов.
+    Особенности:
+    - Пополняется по одному компоненту после каждого успешного прогона
+    - Один компонент (имя + набор пропсов) хранится в одном экземпляре - с лучшей оценкой
+    - Размер ограничен max_items и max_example_chars на пример
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_items: int = 512,
+        min_score: int = 7,
+        top_k: int = 2,
+        min_similarity: float = 0.5,
+        max_example_chars: int = 4000,
+        model: str = "",
+        save_every: int = 32,
+        save_interval: float = 60.0
+    ):
+        self.min_score = min_score
+        self.top_k = top_k
+        self.min_similarity = min_similarity
+        self.max_example_chars = max_example_chars
+        self.index = VectorIndex(
+            path=path, max_items=max_items, model=model, save_every=save_every, save_interval=save_interval
+        )
+        self.stats: Dict[str, int] = {"searches": 0, "examples_served": 0, "indexed": 0, "rejected": 0}
+
+    @staticmethod
+    def make_key(name: str, props: Iterable[str]) -> str:
+        return f"{name}({','.join(sorted(props))})"
+
+    def search(self, vector: Sequence[float]) -> List[Dict[str, Any]]:
+        """До top_k ближайших принятых компонентов, достаточно похожих на запрос."""
+        self.stats["searches"] += 1
+        found = self.index.search(vector, k=self.top_k, min_similarity=self.min_similarity)
+        self.stats["examples_served"] += len(found)
+        return [
+            {
+                "name": entry["name"],
+                "props": entry["props"],
+                "code": entry["code"],
+                "score": entry["score"],
+                "similarity": round(similarity, 4),
+            }
+            for entry, similarity in found
+        ]
+
+    async def add(
+        self,
+        vector: Sequence[float],
+        name: str,
+        props: List[str],
+        code: str,
+        score: int,
+        user_input: str = ""
+    ) -> bool:
+        """Индексирует компонент, если оценка не ниже порога и лучше уже сохранённой."""
+        key = self.make_key(name, props)
+        existing = self.index.get(key)
+        if score < self.min_score or len(code) > self.max_example_chars or (
+            existing is not None and existing["score"] > score
+        ):
+            self.stats["rejected"] += 1
+            return False
+
+        self.index.add(
+            vector,
+            {"name": name, "props": sorted(props), "code": code, "score": score, "user_input": user_input},
+            key=key,
+        )
+        self.stats["indexed"] += 1
+        if self.index.save_due():
+            await asyncio.to_thread(self.index.save)
+        return True
+
+    async def close(self) -> None:
+        """Записывает на диск изменения, не попавшие в очередное сохранение."""
+        await asyncio.to_thread(self.index.flush)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Счётчики и размер библиотеки для мониторинга."""
+        return {
+            **self.stats,
+            "items": len(self.index),
+            "evictions": self.index.evictions,
+            "min_score": self.min_score,
+            "top_k": self.top_k,
+        }
@@ -0,0 +1,215 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Прогрев моделей при старте и проверка готовности.
+Без прогрева первый пользователь после деплоя ждёт загрузки моделей в память.
+ModelWarmup проверяет по /api/tags, что модели этапов установлены, и
+загружает их пустым запросом с keep_alive. ReadinessProbe отвечает оркестратору
+по /api/tags и /api/ps (без вызовов LLM), результат кэшируется на ttl секунд,
+и одновременные проверки ждут одной пробы.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional
+
+from .host_pool import OllamaHost, model_name
+from .ollama_service import OllamaError, OllamaService
+
+logger = logging.getLogger(__name__)
+
+
+def missing_models(models: List[str], hosts: List[OllamaHost]) -> List[str]:
+    """Модели, которых нет ни на одном из ответивших узлов."""
+    return [model for model in models if not any(model_name(model) in (host.available or ()) for host in hosts)]
+
+
+async def probe_hosts(service: OllamaService) -> List[OllamaHost]:
+    """Обновляет сведения узлов пробой; возвращает ответившие. Автоматы узлов не меняются."""
+    pool = service.pool
+    results = await asyncio.gather(*(pool.probe(host, record_outcome=False) for host in pool.hosts))
+    return [host for host, ok in zip(pool.hosts, results) if ok]
+
+
+class ModelWarmup:
+    """
+    Прогрев моделей. Загружается не больше preload моделей (по порядку этапов):
+    лишняя модель только вытеснила бы предыдущую.
+    Выполняется фоновой задачей - старт приложения не ждёт загрузки.
+    """
+
+    def __init__(
+        self,
+        service: OllamaService,
+        models: List[str],
+        preload: int,
+        embedding_models: Optional[List[str]] = None,
+        timeout: float = 600.0
+    ):
+        self.service = service
+        self.models = models
+        self.preload = preload
+        self.embedding_models = set(embedding_models or ())
+        self.timeout = timeout
+        self.state = "pending"  # pending -> running -> done | failed
+        self.missing: List[str] = []
+        self.preloaded: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.duration: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("done", "failed")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def run(self) -> None:
+        self.state = "running"
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._warm_up(), self.timeout)
+            self.state = "done"
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e) or type(e).__name__
+            logger.warning(f"Прогрев моделей не выполнен: {self.error}")
+        finally:
+            self.duration = time.perf_counter() - started
+
+    async def _warm_up(self) -> None:
+        hosts = await probe_hosts(self.service)
+        if not hosts:
+            raise OllamaError("ни один узел Ollama не ответил на /api/tags")
+        self.missing = missing_models(self.models, hosts)
+        if self.missing:
+            logger.error(f"Модели не установлены в Ollama: {', '.join(self.missing)} (нужен ollama pull)")
+        models = [model for model in self.models if model not in self.missing][:self.preload]
+        await asyncio.gather(*(self._preload_host(host, models) for host in hosts))
+        logger.info(f"🔥 Прогрев завершён: {len(self.preloaded)} загрузок")
+
+    async def _preload_host(self, host: OllamaHost, models: List[str]) -> None:
+        for model in models:
+            if not host.has_model(model) or model_name(model) in host.loaded:
+                continue
+            started = time.perf_counter()
+            try:
+                slot = nullcontext() if host.scheduler is None else host.scheduler.slot(model)
+                async with slot:
+                    path, payload = self._preload_request(model)
+                    response = await host.client.post(path, json=payload)
+                    response.raise_for_status()
+            except Exception as e:
+                logger.warning(f"Не удалось загрузить модель {model} на {host.url}: {e}")
+                continue
+            host.loaded.add(model_name(model))
+            seconds = time.perf_counter() - started
+            self.preloaded.append({"host": host.url, "model": model, "seconds": round(seconds, 3)})
+            logger.info(f"Модель {model} загружена на {host.url} за {seconds:.1f} с")
+
+    def _preload_request(self, model: str) -> tuple:
+        """Запрос без промпта только загружает модель; эмбеддинговые не поддерживают /api/generate."""
+        payload: Dict[str, Any] = {"model": model}
+        if self.service.config.keep_alive:
+            payload["keep_alive"] = self.service.config.keep_alive
+        if model in self.embedding_models:
+            return "/api/embed", {**payload, "input": "warmup"}
+        return "/api/generate", payload
+
+    async def close(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "models": self.models,
+            "missing": self.missing,
+            "preloaded": self.preloaded,
+            "error": self.error,
+            "duration": self.duration,
+        }
+
+
+class ReadinessProbe:
+    """
+    Готовность: прогрев завершён, есть ответивший узел с замкнутым автоматом
+    и все модели этапов установлены. Проба - /api/tags и /api/ps.
+    optional_models (модель эмбеддингов семантического кэша и библиотеки)
+    только попадают в ответ: без них кэш и библиотека отключаются, а генерация работает.
+    """
+
+    def __init__(
+        self,
+        service: OllamaService,
+        models: List[str],
+        warmup: Optional[ModelWarmup] = None,
+        ttl: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+        optional_models: Optional[List[str]] = None
+    ):
+        self.service = service
+        self.models = models
+        self.optional_models = list(optional_models or ())
+        self.warmup = warmup
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = asyncio.Lock()
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self.stats: Dict[str, int] = {"checks": 0, "probes": 0}
+
+    def _fresh(self) -> bool:
+        return self._result is not None and self._clock() - self._checked_at < self.ttl
+
+    async def check(self) -> Dict[str, Any]:
+        self.stats["checks"] += 1
+        if not self._fresh():
+            async with self._lock:
+                if not self._fresh():
+                    self._result = await self._probe()
+                    self._checked_at = self._clock()
+        return self._result
+
+    async def _probe(self) -> Dict[str, Any]:
+        self.stats["probes"] += 1
+        hosts = await probe_hosts(self.service)
+        missing = missing_models(self.models, hosts)
+        warming = self.warmup is not None and not self.warmup.finished
+        return {
+            "ready": bool(hosts) and not missing and not warming and self.service.available,
+            "reachable_hosts": [host.url for host in hosts],
+            "missing_models": missing,
+            "missing_optional_models": missing_models(self.optional_models, hosts),
+            "warmup": None if self.warmup is None else self.warmup.snapshot(),
+        }
+
+
+def create_model_warmup(service: OllamaService, models: List[str], timeout: float = 600.0) -> ModelWarmup:
+    """
+    С планировщиком прогревается только модель первого этапа: при переключении
+    он выгружает простаивающие модели, и следующая загрузка вытеснила бы её.
+    """
+    config = service.config
+    preload = 1 if config.scheduler_enabled else len(models)
+    return ModelWarmup(service, models, preload, embedding_models=[config.model_embedding], timeout=timeout)
@@ -0,0 +1,258 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Пул узлов Ollama.
+Один base_url ограничивает сервис одной машиной; пул распределяет вызовы
+агентов по нескольким узлам. Узел выбирается так, чтобы не загружать модель
+заново: предпочтение узлам, где нужная модель уже в памяти (/api/ps) или
+уже выполняется, среди них - с наименьшим числом незавершённых запросов.
+Холодный узел выбирается, только если очередь тёплых длиннее стоимости
+загрузки модели (cold_penalty запросов). Периодические пробы /api/tags и
+/api/ps обновляют сведения об узлах. Узел после серии ошибок выводится из
+ротации автоматом защиты (см. CircuitBreaker) и возвращается после успешной
+пробы или пробного вызова; если выведены все узлы, вызовы отклоняются сразу.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Collection, Dict, List, Optional, Set
+
+import httpx
+
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+from .model_scheduler import ModelScheduler
+from ..core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_HOST_REQUESTS = REGISTRY.counter(
+    "ollama_host_requests_total", "Вызовы по узлам: warm - модель уже была загружена на узле", ("host", "route")
+)
+OLLAMA_HOST_EJECTIONS = REGISTRY.counter(
+    "ollama_host_ejections_total", "Выводы узла из ротации после ошибок", ("host",)
+)
+OLLAMA_HOST_HEALTHY = REGISTRY.gauge("ollama_host_healthy", "Узел в ротации (1) или выведен (0)", ("host",))
+
+
+def model_name(name: str) -> str:
+    """Имя модели как в /api/tags: без тега подразумевается :latest."""
+    return name if ":" in name else f"{name}:latest"
+
+
+class OllamaHost:
+    """Узел пула: свой клиент, свой планировщик моделей и сведения из проб."""
+
+    def __init__(
+        self,
+        url: str,
+        client: httpx.AsyncClient,
+        scheduler: Optional[ModelScheduler] = None,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.url = url
+        self.client = client
+        # Память у каждой машины своя, поэтому и планировщик моделей - на узел
+        self.scheduler = scheduler
+        self.breaker = breaker or CircuitBreaker()
+        self.outstanding = 0
+        self.outstanding_by_model: Dict[str, int] = {}
+        # Модели узла по /api/tags; None - пробы ещё не было, считаем что есть любые
+        self.available: Optional[Set[str]] = None
+        # Модели в памяти по /api/ps, между пробами дополняются успешными вызовами
+        self.loaded: Set[str] = set()
+        self.stats: Dict[str, int] = {"requests": 0, "warm": 0, "failures": 0, "ejections": 0, "probes": 0}
+
+    @property
+    def healthy(self) -> bool:
+        return self.breaker.state is not CircuitState.OPEN
+
+    def has_model(self, model: str) -> bool:
+        return self.available is None or model_name(model) in self.available
+
+    def is_warm(self, model: str) -> bool:
+        """Модель в памяти или загружается сейчас: вызовы к ней на узле уже идут."""
+        name = model_name(model)
+        return name in self.loaded or self.outstanding_by_model.get(name, 0) > 0
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "circuit": self.breaker.snapshot(),
+            "outstanding": self.outstanding,
+            "loaded": sorted(self.loaded),
+            "available": None if self.available is None else sorted(self.available),
+            **self.stats,
+            **({"scheduler": self.scheduler.snapshot()} if self.scheduler is not None else {}),
+        }
+
+
+class HostPool:
+    """
+    Маршрутизация вызовов Ollama по узлам.
+    Особенности:
+    - Только узлы, где модель установлена (по /api/tags)
+    - Наименьшее число незавершённых запросов; холодному узлу (модель не
+      загружена) добавляется cold_penalty - загрузка стоит нескольких вызовов
+    - max_failures ошибок подряд (соединение, 5xx, проба) размыкают автомат узла
+      на eject_seconds; затем его замыкает успешная проба или пробный вызов
+    - Если разомкнуты все автоматы, вызов сразу получает CircuitOpenError
+    """
+
+    def __init__(
+        self,
+        hosts: List[OllamaHost],
+        probe_interval: float = 10.0,
+        probe_timeout: float = 5.0,
+        max_failures: int = 3,
+        eject_seconds: float = 30.0,
+        cold_penalty: int = 2
+    ):
+        if not hosts:
+            raise ValueError("Пул узлов Ollama пуст")
+        self.hosts = hosts
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.cold_penalty = cold_penalty
+        self._probe_task: Optional[asyncio.Task] = None
+        for host in hosts:
+            host.breaker.failure_threshold = max_failures
+            host.breaker.reset_timeout = eject_seconds
+            OLLAMA_HOST_HEALTHY.set(1, host=host.url)
+
+    def available(self) -> bool:
+        """Есть ли узел, которому можно отправить вызов."""
+        return any(host.breaker.available() for host in self.hosts)
+
+    def select(self, model: str, exclude: Collection[OllamaHost] = ()) -> OllamaHost:
+        """
+        Узел для вызова модели (см. описание класса). Узлы из exclude (уже
+        ответившие ошибкой или занятые основным вызовом) - только если других нет.
+        """
+        candidates = [h for h in self.hosts if h.breaker.available()]
+        if not candidates:
+            retry_after = min(h.breaker.retry_after() for h in self.hosts)
+            raise CircuitOpenError("Ollama недоступен: автоматы всех узлов разомкнуты", retry_after)
+        candidates = [h for h in candidates if h not in exclude] or candidates
+        candidates = [h for h in candidates if h.has_model(model)] or candidates
+
+        def cost(host: OllamaHost):
+            warm = host.is_warm(model)
+            # При равной цене - тёплый узел, затем узел с меньшим числом моделей в памяти
+            return (host.outstanding + (0 if warm else self.cold_penalty), not warm, len(host.loaded))
+
+        return min(candidates, key=cost)
+
+    @asynccontextmanager
+    async def acquire(self, model: str, exclude: Collection[OllamaHost] = ()) -> AsyncIterator[OllamaHost]:
+        """Держит узел на время вызова и учитывает его исход."""
+        host = self.select(model, exclude)
+        trial = host.breaker.begin()
+        route = "warm" if host.is_warm(model) else "cold"
+        name = model_name(model)
+        host.outstanding += 1
+        host.outstanding_by_model[name] = host.outstanding_by_model.get(name, 0) + 1
+        host.stats["requests"] += 1
+        if route == "warm":
+            host.stats["warm"] += 1
+        OLLAMA_HOST_REQUESTS.inc(host=host.url, route=route)
+        try:
+            yield host
+        except httpx.TransportError as e:
+            self._record_failure(host, f"{type(e).__name__}: {e}")
+            raise
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code >= 500:
+                self._record_failure(host, f"HTTP {e.response.status_code}")
+            raise
+        else:
+            self._record_success(host)
+            host.loaded.add(name)
+        finally:
+            host.outstanding -= 1
+            if trial:
+                host.breaker.end_trial()
+            host.outstanding_by_model[name] -= 1
+
+    def _record_success(self, host: OllamaHost) -> None:
+        if host.breaker.record_success():
+            OLLAMA_HOST_HEALTHY.set(1, host=host.url)
+            logger.info(f"Узел Ollama {host.url} возвращён в ротацию")
+
+    def _record_failure(self, host: OllamaHost, reason: str) -> None:
+        host.stats["failures"] += 1
+        if host.breaker.record_failure():
+            host.stats["ejections"] += 1
+            OLLAMA_HOST_EJECTIONS.inc(host=host.url)
+            OLLAMA_HOST_HEALTHY.set(0, host=host.url)
+            logger.warning(f"Узел Ollama {host.url} выведен из ротации: {reason}")
+
+    async def probe(self, host: OllamaHost, record_outcome: bool = True) -> bool:
+        """
+        Обновляет модели узла по /api/tags и /api/ps; False - узел не ответил.
+        Счётчик ошибок автомата проба не сбрасывает: /api/tags может отвечать,
+        пока падает каждый /api/chat. Успех замыкает цепь только как пробный
+        вызов полуоткрытого автомата. С record_outcome=False автомат не трогается.
+        """
+        host.stats["probes"] += 1
+        try:
+            tags = await host.client.get("/api/tags", timeout=self.probe_timeout)
+            tags.raise_for_status()
+            ps = await host.client.get("/api/ps", timeout=self.probe_timeout)
+            ps.raise_for_status()
+        except Exception as e:
+            if record_outcome:
+                self._record_failure(host, f"проба: {e}")
+            return False
+
+        host.available = {model_name(m.get("name") or m.get("model")) for m in tags.json().get("models", [])}
+        host.loaded = {model_name(m.get("name") or m.get("model")) for m in ps.json().get("models", [])}
+        if record_outcome and host.breaker.state is CircuitState.HALF_OPEN:
+            self._record_success(host)
+        return True
+
+    async def probe_all(self) -> None:
+        await asyncio.gather(*(self.probe(host) for host in self.hosts))
+
+    async def _probe_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            await self.probe_all()
+
+    async def start(self) -> None:
+        """Первая проба и фоновые пробы. Для одного узла не нужны: выбирать не из чего."""
+        if len(self.hosts) < 2 or self._probe_task is not None:
+            return
+        await self.probe_all()
+        if self.probe_interval > 0:
+            self._probe_task = asyncio.create_task(self._probe_loop())
+
+    async def close(self) -> None:
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+        for host in self.hosts:
+            await host.client.aclose()
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "hosts": [host.snapshot() for host in self.hosts],
+            "healthy": sum(1 for host in self.hosts if host.healthy),
+        }
@@ -0,0 +1,200 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Фоновое выполнение задач генерации.
+Воркеры забирают задачи из JobStore и запускают MultiAgentWorkflow.run,
+соблюдая общий для процесса контроль допуска.
+"""
+
+import asyncio
+import contextlib
+import logging
+import uuid
+from typing import Dict, List, Optional
+
+from .admission import AdmissionController, AdmissionError, Priority
+from .job_store import FINISHED_STATUSES, JobRecord, JobStatus, JobStore
+
+logger = logging.getLogger(__name__)
+
+
+class JobRunner:
+    """
+    Пул фоновых воркеров для задач генерации.
+    Особенности:
+    - Выполняемая задача арендована воркером этого процесса и продлевается
+      фоном; задачи упавших процессов возвращаются в очередь по истечении
+      аренды, а не при старте соседа (несколько процессов на одной базе)
+    - Воркеры просыпаются по сигналу о новой задаче, а не только по опросу
+    - Ожидание результата (long-poll) без постоянных запросов к базе
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        workflow,
+        admission: Optional[AdmissionController] = None,
+        workers: int = 2,
+        poll_interval: float = 5.0
+    ):
+        self.store = store
+        self.workflow = workflow
+        self.admission = admission
+        self.workers = workers
+        self.poll_interval = poll_interval
+
+        self.owner = uuid.uuid4().hex  # Владелец аренды задач этого процесса
+        self._wakeup = asyncio.Event()
+        self._finished: Dict[str, asyncio.Event] = {}
+        self._waiters: Dict[str, int] = {}  # Сколько long-poll запросов ждут событие задачи
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        await asyncio.to_thread(self.store.requeue_expired)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._wakeup.set()
+        logger.info(f"JobRunner запущен, воркеров: {self.workers}")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+        logger.info("JobRunner остановлен")
+
+    async def submit(self, prompt: str, priority: Priority = Priority.BATCH) -> JobRecord:
+        job = await asyncio.to_thread(self.store.create, prompt, Priority(priority).value)
+        self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[JobRecord]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def cancel(self, job_id: str) -> bool:
+        cancelled = await asyncio.to_thread(self.store.cancel, job_id)
+        if cancelled:
+            self._notify(job_id)
+        return cancelled
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[JobRecord]:
+        """Long-poll: ждёт завершения задачи не дольше timeout и возвращает её."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        job = await self.get(job_id)
+        # Событие заводится только для существующей незавершённой задачи
+        if job is None or JobStatus(job.status) in FINISHED_STATUSES or timeout <= 0:
+            return job
+        event = self._finished.setdefault(job_id, asyncio.Event())
+        self._waiters[job_id] = self._waiters.get(job_id, 0) + 1
+        try:
+            while True:
+                # Проверка после регистрации события: завершение между первым get()
+                # и setdefault() не будет пропущено
+                job = await self.get(job_id)
+                remaining = deadline - loop.time()
+                if job is None or JobStatus(job.status) in FINISHED_STATUSES or remaining <= 0:
+                    return job
+                # Задачу может выполнять другой процесс - поэтому ждём с периодической проверкой
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(event.wait(), min(remaining, self.poll_interval))
+        finally:
+            self._waiters[job_id] -= 1
+            if not self._waiters[job_id]:
+                del self._waiters[job_id]
+                self._finished.pop(job_id, None)
+
+    def _notify(self, job_id: str) -> None:
+        event = self._finished.get(job_id)
+        if event is not None:
+            event.set()
+
+    async def _next_job(self) -> JobRecord:
+        while True:
+            # Сигнал сбрасывается до проверки очереди: задача, поставленная во время
+            # claim_next, снова взведёт его, и воркер не проспит poll_interval
+            self._wakeup.clear()
+            job = await asyncio.to_thread(self.store.claim_next, self.owner)
+            if job is not None:
+                return job
+            if await asyncio.to_thread(self.store.requeue_expired):
+                continue
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            try:
+                job = await self._next_job()
+                # Сразу будим соседей: в очереди могут быть ещё задачи
+                self._wakeup.set()
+                logger.info(f"Воркер {index}: задача {job.id}")
+                await self._execute(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Ошибка базы не должна останавливать воркер; незавершённая задача
+                # вернётся в очередь при следующем старте
+                logger.error(f"Воркер {index}: ошибка очереди задач: {e}")
+                await asyncio.sleep(min(1.0, self.poll_interval))
+
+    async def _execute(self, job: JobRecord) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            if self.admission is not None:
+                result = await self._run_admitted(job)
+            else:
+                result = await self.workflow.run(job.prompt, run_id=job.id)
+            finished = await asyncio.to_thread(
+                self.store.finish, job.id, JobStatus.SUCCEEDED, result, None, self.owner
+            )
+        except asyncio.CancelledError:
+            # Остановка процесса: задача сразу возвращается в очередь, не дожидаясь истечения аренды
+            await asyncio.to_thread(self.store.release, job.id, self.owner)
+            raise
+        except Exception as e:
+            logger.error(f"Задача {job.id} завершилась ошибкой: {e}")
+            finished = await asyncio.to_thread(
+                self.store.finish, job.id, JobStatus.FAILED, None, str(e), self.owner
+            )
+        finally:
+            heartbeat.cancel()
+        if not finished:
+            logger.warning(f"Задача {job.id}: аренда потеряна, результат не записан")
+        self._notify(job.id)
+
+    async def _heartbeat(self, job_id: str) -> None:
+        """Продлевает аренду задачи втрое чаще её срока."""
+        while True:
+            await asyncio.sleep(self.store.lease_seconds / 3)
+            try:
+                if not await asyncio.to_thread(self.store.renew_lease, job_id, self.owner):
+                    logger.warning(f"Задача {job_id}: аренду перехватил другой воркер")
+                    return
+            except Exception as e:
+                logger.error(f"Задача {job_id}: не удалось продлить аренду: {e}")
+
+    async def _run_admitted(self, job: JobRecord):
+        """Запуск через контроль допуска; при переполнении - ждём и пробуем снова."""
+        while True:
+            try:
+                async with self.admission.admit(Priority(job.priority)):
+                    return await self.workflow.run(job.prompt, run_id=job.id)
+            except AdmissionError as e:
+                await asyncio.sleep(min(e.retry_after, self.poll_interval))
+
+    async def snapshot(self) -> Dict[str, object]:
+        return {"workers": self.workers, "jobs": await asyncio.to_thread(self.store.counts)}
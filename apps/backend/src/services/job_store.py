@@ -0,0 +1,245 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Хранилище задач генерации.
+Задачи сохраняются в базе через SQLAlchemy, поэтому очередь переживает
+перезапуск процесса. Выполняемая задача принадлежит воркеру-владельцу,
+пока он продлевает аренду (lease); задачи с истёкшей арендой возвращаются
+в очередь, а после max_attempts попыток помечаются failed. Методы синхронные;
+асинхронный код вызывает их через asyncio.to_thread.
+"""
+
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from sqlalchemy import DateTime, Integer, String, Text, case, func, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..core.database import Base, add_missing_columns, create_session_factory
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+FINISHED_STATUSES = {JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+
+class JobRecord(Base):
+    """Задача генерации компонента."""
+    __tablename__ = "generation_jobs"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    status: Mapped[str] = mapped_column(String(16), index=True, default=JobStatus.QUEUED.value)
+    priority: Mapped[str] = mapped_column(String(16), default="batch")
+    prompt: Mapped[str] = mapped_column(Text)
+    result: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    # Аренда выполняемой задачи: владелец продлевает её, пока работает
+    owner: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "priority": self.priority,
+            "attempts": self.attempts,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if include_result:
+            data["result"] = json.loads(self.result) if self.result else None
+        return data
+
+
+class JobStore:
+    """Операции над задачами в базе данных."""
+
+    def __init__(self, engine: Engine, lease_seconds: float = 60.0, max_attempts: int = 3):
+        self.engine = engine
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._sessions = create_session_factory(engine)
+        Base.metadata.create_all(engine, tables=[JobRecord.__table__])
+        add_missing_columns(engine, JobRecord.__table__)
+
+    def _lease_deadline(self) -> datetime:
+        return datetime.now() + timedelta(seconds=self.lease_seconds)
+
+    def create(self, prompt: str, priority: str = "batch") -> JobRecord:
+        job = JobRecord(id=uuid.uuid4().hex, prompt=prompt, priority=priority, status=JobStatus.QUEUED.value)
+        with self._sessions() as session:
+            session.add(job)
+            session.commit()
+        return job
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        with self._sessions() as session:
+            return session.get(JobRecord, job_id)
+
+    def claim_next(self, owner: Optional[str] = None) -> Optional[JobRecord]:
+        """Атомарно переводит самую приоритетную из ожидающих задач в running под аренду owner."""
+        order = case((JobRecord.priority == "interactive", 0), else_=1)
+        with self._sessions() as session:
+            while True:
+                job_id = session.execute(
+                    select(JobRecord.id)
+                    .where(JobRecord.status == JobStatus.QUEUED.value)
+                    .order_by(order, JobRecord.created_at)
+                    .limit(1)
+                ).scalar_one_or_none()
+                if job_id is None:
+                    return None
+                claimed = session.execute(
+                    update(JobRecord)
+                    .where(JobRecord.id == job_id, JobRecord.status == JobStatus.QUEUED.value)
+                    .values(
+                        status=JobStatus.RUNNING.value,
+                        started_at=datetime.now(),
+                        attempts=JobRecord.attempts + 1,
+                        owner=owner,
+                        lease_expires_at=self._lease_deadline(),
+                    )
+                )
+                session.commit()
+                # Задачу мог забрать другой воркер - пробуем следующую
+                if claimed.rowcount == 1:
+                    return session.get(JobRecord, job_id, populate_existing=True)
+
+    def renew_lease(self, job_id: str, owner: Optional[str]) -> bool:
+        """Продлевает аренду; False - задача больше не принадлежит owner."""
+        with self._sessions() as session:
+            renewed = session.execute(
+                update(JobRecord)
+                .where(JobRecord.id == job_id, JobRecord.owner == owner, JobRecord.status == JobStatus.RUNNING.value)
+                .values(lease_expires_at=self._lease_deadline())
+            )
+            session.commit()
+            return renewed.rowcount == 1
+
+    def release(self, job_id: str, owner: Optional[str]) -> bool:
+        """Возвращает задачу в очередь при штатной остановке владельца; попытка не засчитывается."""
+        with self._sessions() as session:
+            released = session.execute(
+                update(JobRecord)
+                .where(JobRecord.id == job_id, JobRecord.owner == owner, JobRecord.status == JobStatus.RUNNING.value)
+                .values(
+                    status=JobStatus.QUEUED.value,
+                    started_at=None,
+                    attempts=JobRecord.attempts - 1,
+                    owner=None,
+                    lease_expires_at=None,
+                )
+            )
+            session.commit()
+            return released.rowcount == 1
+
+    def finish(
+        self,
+        job_id: str,
+        status: JobStatus,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+        owner: Optional[str] = None
+    ) -> bool:
+        """Завершает задачу; с owner - только если аренда всё ещё его."""
+        condition = [JobRecord.id == job_id]
+        if owner is not None:
+            condition += [JobRecord.owner == owner, JobRecord.status == JobStatus.RUNNING.value]
+        with self._sessions() as session:
+            finished = session.execute(
+                update(JobRecord)
+                .where(*condition)
+                .values(
+                    status=status.value,
+                    result=json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+                    error=error,
+                    finished_at=datetime.now(),
+                    lease_expires_at=None,
+                )
+            )
+            session.commit()
+            return finished.rowcount == 1
+
+    def cancel(self, job_id: str) -> bool:
+        """Отменяет задачу, которая ещё не начала выполняться."""
+        with self._sessions() as session:
+            cancelled = session.execute(
+                update(JobRecord)
+                .where(JobRecord.id == job_id, JobRecord.status == JobStatus.QUEUED.value)
+                .values(status=JobStatus.CANCELLED.value, finished_at=datetime.now())
+            )
+            session.commit()
+            return cancelled.rowcount == 1
+
+    def requeue_expired(self) -> int:
+        """
+        Возвращает в очередь задачи, чей владелец перестал продлевать аренду
+        (процесс упал или завис). Задачи, исчерпавшие max_attempts, - в failed:
+        задача, роняющая воркер, не должна перезапускаться бесконечно.
+        """
+        now = datetime.now()
+        expired = [
+            JobRecord.status == JobStatus.RUNNING.value,
+            or_(JobRecord.lease_expires_at.is_(None), JobRecord.lease_expires_at < now),
+        ]
+        with self._sessions() as session:
+            failed = session.execute(
+                update(JobRecord)
+                .where(*expired, JobRecord.attempts >= self.max_attempts)
+                .values(
+                    status=JobStatus.FAILED.value,
+                    error=f"Задача прервана {self.max_attempts} раз подряд",
+                    finished_at=now,
+                    owner=None,
+                    lease_expires_at=None,
+                )
+            )
+            requeued = session.execute(
+                update(JobRecord)
+                .where(*expired)
+                .values(status=JobStatus.QUEUED.value, started_at=None, owner=None, lease_expires_at=None)
+            )
+            session.commit()
+        if requeued.rowcount:
+            logger.info(f"Возвращено в очередь задач с истёкшей арендой: {requeued.rowcount}")
+        if failed.rowcount:
+            logger.warning(f"Задач, исчерпавших попытки: {failed.rowcount}")
+        return requeued.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._sessions() as session:
+            rows = session.execute(
+                select(JobRecord.status, func.count()).group_by(JobRecord.status)
+            ).all()
+        return {status: count for status, count in rows}
@@ -0,0 +1,125 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Инкрементальный разбор JSON-ответа по мере стриминга.
+Модель нередко продолжает генерацию после закрывающей скобки: с format -
+пробелами и переводами строк (грамматика их допускает), без него - пояснениями
+до num_predict. Парсер видит момент, когда верхнеуровневый объект закрыт,
+и вызов можно оборвать; законченные поля верхнего уровня отдаются сразу.
+Текст до первой { (пояснения, ```json) пропускается.
+"""
+
+import json
+from typing import Any, List, Optional, Tuple
+
+
+class JsonStreamParser:
+    """
+    Сканер фрагментов: глубина вложенности, строки и экранирование.
+    Каждый символ просматривается один раз, значения полей разбираются
+    json.loads только по завершении.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._end: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self.fields: List[str] = []
+
+    @property
+    def complete(self) -> bool:
+        """Верхнеуровневый объект закрыт."""
+        return self._end is not None
+
+    @property
+    def document(self) -> Optional[str]:
+        """Текст объекта от { до } без окружающих пояснений и ограждений."""
+        if self._end is None:
+            return None
+        return self._buffer[self._start:self._end]
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Добавляет фрагмент; возвращает поля верхнего уровня, законченные в нём."""
+        if self._end is not None:
+            return []
+        self._buffer += chunk
+        completed: List[Tuple[str, Any]] = []
+        buffer = self._buffer
+        while self._pos < len(buffer):
+            i = self._pos
+            char = buffer[i]
+            self._pos += 1
+            if self._start is None:
+                if char == "{":
+                    self._start = i
+                    self._depth = 1
+                    self._expect_key = True
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect_key:
+                        self._key = self._decode(buffer[self._string_start:i + 1])
+                continue
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._close_field(buffer, i, completed)
+                    self._end = i + 1
+                    break
+            elif self._depth == 1:
+                if char == ":":
+                    self._expect_key = False
+                    self._value_start = i + 1
+                elif char == ",":
+                    self._close_field(buffer, i, completed)
+                    self._expect_key = True
+        return completed
+
+    def _close_field(self, buffer: str, end: int, completed: List[Tuple[str, Any]]) -> None:
+        key, start = self._key, self._value_start
+        self._key = None
+        self._value_start = None
+        if key is None or start is None:
+            return
+        try:
+            completed.append((key, json.loads(buffer[start:end])))
+            self.fields.append(key)
+        except json.JSONDecodeError:
+            pass
+
+    @staticmethod
+    def _decode(literal: str) -> Optional[str]:
+        try:
+            return json.loads(literal)
+        except json.JSONDecodeError:
+            return None
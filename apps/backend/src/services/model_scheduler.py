@@ -0,0 +1,222 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Планировщик вызовов LLM с учётом резидентности моделей.
+На машинах с 8 ГБ ОЗУ в памяти помещается одна модель, и каждое переключение
+между qwen2.5:3b и qwen2.5-coder:3b стоит секунды загрузки. Планировщик ставит
+вызовы этапов из всех одновременно идущих воркфлоу в очереди по моделям и
+выполняет их группами: пока активна одна модель, вызовы к другой ждут.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Collection, Deque, Dict, List, Optional, Set
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class ModelScheduler:
+    """
+    Группирует вызовы по модели, чтобы Ollama не выгружала и не загружала модели
+    на каждом запросе.
+    Особенности:
+    - Не больше max_loaded_models моделей активны одновременно
+    - Не больше max_parallel одновременных вызовов к одной модели
+      (для отдельных моделей - model_limits)
+    - После max_batch выдач подряд модель уступает очередь другим (без голодания)
+    - Загруженные модели узнаются через /api/ps, ненужные выгружаются явно (keep_alive=0)
+    - Закреплённые модели (pinned_models, например модель эмбеддингов) малы и всегда
+      остаются в памяти рядом с активной: их вызовы не ждут слота, не считаются
+      в max_loaded_models и не вызывают выгрузку других моделей
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        max_loaded_models: int = 1,
+        max_parallel: int = 1,
+        max_batch: int = 8,
+        unload_on_switch: bool = True,
+        model_limits: Optional[Dict[str, int]] = None,
+        pinned_models: Collection[str] = ()
+    ):
+        self.client = client
+        self.pinned_models = set(pinned_models)
+        self.max_loaded_models = max_loaded_models
+        self.max_parallel = max_parallel
+        self.model_limits = dict(model_limits or {})
+        self.max_batch = max_batch
+        self.unload_on_switch = unload_on_switch
+
+        self._running: Dict[str, int] = {}
+        # Серия выдач подряд одной модели - для лимита пакета
+        self._streak_model: Optional[str] = None
+        self._streak = 0
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {}
+        self._resident: Set[str] = set()
+        self._yielded: Optional[str] = None
+        self._switch_lock = asyncio.Lock()
+
+        self.stats: Dict[str, int] = {"grants": 0, "queued": 0, "switches": 0, "model_loads": 0, "pinned_calls": 0}
+
+    @asynccontextmanager
+    async def slot(self, model: str) -> AsyncIterator[None]:
+        """Держит слот модели на время одного HTTP-вызова к Ollama."""
+        if model in self.pinned_models:
+            self.stats["pinned_calls"] += 1
+            yield
+            return
+        activated = await self._acquire(model)
+        try:
+            if activated:
+                await self._on_activate(model)
+            yield
+        finally:
+            self._release(model)
+
+    def waiting(self, model: Optional[str] = None) -> int:
+        """Число ожидающих вызовов (для модели или всего)."""
+        if model is not None:
+            return len(self._waiters.get(model, ()))
+        return sum(len(q) for q in self._waiters.values())
+
+    async def loaded_models(self) -> List[str]:
+        """Модели, загруженные в Ollama сейчас (по /api/ps)."""
+        try:
+            response = await self.client.get("/api/ps")
+            response.raise_for_status()
+            return [m.get("name") or m.get("model") for m in response.json().get("models", [])]
+        except Exception as e:
+            logger.warning(f"Планировщик: не удалось получить /api/ps - {e}")
+            return list(self._resident)
+
+    async def _acquire(self, model: str) -> bool:
+        """Ждёт разрешения на вызов. Возвращает True, если модель только что стала активной."""
+        if self._can_grant(model):
+            return self._grant(model)
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(model, deque()).append(future)
+        self.stats["queued"] += 1
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Слот уже выдан - возвращаем его, иначе он потеряется
+                self._release(model)
+            else:
+                queue = self._waiters.get(model)
+                if queue and future in queue:
+                    queue.remove(future)
+                    if not queue:
+                        del self._waiters[model]
+            raise
+
+    def _others_waiting(self, model: str) -> bool:
+        return any(q for m, q in self._waiters.items() if m != model)
+
+    def _batch_exhausted(self, model: str) -> bool:
+        return model == self._streak_model and self._streak >= self.max_batch
+
+    def _can_grant(self, model: str, queued: bool = False) -> bool:
+        if self._batch_exhausted(model) and self._others_waiting(model):
+            return False
+        if model in self._running:
+            return self._running[model] < self.model_limits.get(model, self.max_parallel)
+        # Новая модель стартует, только если есть свободное место;
+        # вызов «с улицы» не обгоняет уже стоящих в очереди к этой модели
+        if len(self._running) >= self.max_loaded_models:
+            return False
+        return queued or not self._waiters.get(model)
+
+    def _grant(self, model: str) -> bool:
+        if model not in self._running:
+            self._running[model] = 0
+        if model != self._streak_model:
+            self._streak_model = model
+            self._streak = 0
+        self._streak += 1
+        # Переключение - только если модели нет среди резидентных
+        activated = model not in self._resident
+        self._resident.add(model)
+        self._running[model] += 1
+        self.stats["grants"] += 1
+        return activated
+
+    def _release(self, model: str) -> None:
+        self._running[model] -= 1
+        if self._running[model] == 0:
+            del self._running[model]
+            # Модель, исчерпавшая лимит пакета, пропускает вперёд остальных
+            self._yielded = model if self._batch_exhausted(model) else None
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Выдаёт слоты ожидающим: сначала активным моделям, затем по длине очереди."""
+        candidates = sorted(
+            (m for m, q in self._waiters.items() if q),
+            key=lambda m: (
+                m not in self._running,
+                m == self._yielded,
+                m not in self._resident,
+                -len(self._waiters[m]),
+            ),
+        )
+        for model in candidates:
+            queue = self._waiters[model]
+            while queue and self._can_grant(model, queued=True):
+                future = queue.popleft()
+                if future.cancelled():
+                    continue
+                future.set_result(self._grant(model))
+            if not queue:
+                del self._waiters[model]
+
+    async def _on_activate(self, model: str) -> None:
+        """Сверяется с /api/ps и выгружает модели, которые больше не нужны."""
+        async with self._switch_lock:
+            loaded = set(await self.loaded_models())
+            self.stats["switches"] += 1
+            if model not in loaded:
+                self.stats["model_loads"] += 1
+                logger.info(f"Планировщик: загрузка модели {model} (в памяти: {sorted(loaded) or '-'})")
+
+            if self.unload_on_switch:
+                for other in loaded - {model} - self.pinned_models:
+                    if other not in self._running and not self._waiters.get(other):
+                        await self._unload(other)
+                        loaded.discard(other)
+            self._resident = loaded | {model}
+
+    async def _unload(self, model: str) -> None:
+        """Явно выгружает модель, чтобы освободить память под следующую."""
+        try:
+            response = await self.client.post("/api/generate", json={"model": model, "keep_alive": 0})
+            response.raise_for_status()
+            logger.info(f"Планировщик: модель {model} выгружена")
+        except Exception as e:
+            logger.warning(f"Планировщик: не удалось выгрузить {model} - {e}")
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            **self.stats,
+            "active": dict(self._running),
+            "waiting": {m: len(q) for m, q in self._waiters.items()},
+            "resident": sorted(self._resident),
+        }
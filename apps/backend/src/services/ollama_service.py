@@ -18,17 +18,130 @@ Ollama Service - централизованный сервис для работ
 Оптимизирован для работы с 8 ГБ ОЗУ (только одна модель в памяти).
 """
 
+import asyncio
 import httpx
 import json
 import logging
-from typing import AsyncGenerator, List, Dict, Any, Optional
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import AsyncGenerator, Awaitable, Callable, Iterator, List, Dict, Any, Optional, Type, TypeVar
 from enum import Enum
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
+
+from .response_cache import ResponseCache
+from .model_scheduler import ModelScheduler
+from .circuit_breaker import CircuitOpenError
+from .host_pool import HostPool, OllamaHost
+from .json_stream import JsonStreamParser
+from .token_budget import TokenBudget
+from ..core.metrics import REGISTRY, current_agent
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Колбэк для потоковой выдачи фрагментов ответа
+TokenCallback = Callable[[str], Awaitable[None]]
+# Колбэк для законченных полей верхнего уровня JSON-ответа (имя, значение)
+FieldCallback = Callable[[str, Any], Awaitable[None]]
+# Фрагментов после закрытия JSON-объекта, которые ждём до обрыва генерации
+JSON_STOP_GRACE = 3
+
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
+T = TypeVar("T")
+
+
+class StructuredOutputError(Exception):
+    """Ответ модели не удалось разобрать в ожидаемую структуру."""
+
+    def __init__(self, message: str, raw_response: str = ""):
+        super().__init__(message)
+        self.raw_response = raw_response
+
+
+class OllamaError(Exception):
+    """Вызов Ollama не удался (после всех повторов)."""
+
+
+# Счётчики вычислений Ollama по вызову; durations в ответе - в наносекундах
+USAGE_FIELDS = (
+    "prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration", "load_duration", "total_duration"
+)
+
+# Накопитель использования для текущего прогона воркфлоу (см. usage_scope)
+_usage_scope: ContextVar[Optional[Dict[str, float]]] = ContextVar("ollama_usage_scope", default=None)
+
+
+# Метрики вызовов Ollama (экспортируются на /metrics)
+CALL_LABELS = ("model", "task_type", "agent")
+OLLAMA_REQUESTS = REGISTRY.counter(
+    "ollama_requests_total", "Вызовы Ollama по исходу: ok, cached, error", CALL_LABELS + ("outcome",)
+)
+OLLAMA_REQUEST_SECONDS = REGISTRY.histogram(
+    "ollama_request_duration_seconds", "Длительность вызова Ollama на стороне клиента, включая ожидание слота", CALL_LABELS
+)
+OLLAMA_PROMPT_TOKENS = REGISTRY.counter(
+    "ollama_prompt_tokens_total", "Токены промпта, вычисленные моделью (prompt_eval_count)", CALL_LABELS
+)
+OLLAMA_COMPLETION_TOKENS = REGISTRY.counter(
+    "ollama_completion_tokens_total", "Сгенерированные токены (eval_count)", CALL_LABELS
+)
+OLLAMA_TOKENS_PER_SECOND = REGISTRY.histogram(
+    "ollama_eval_tokens_per_second", "Скорость генерации: eval_count / eval_duration", ("model",),
+    buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 200, 500),
+)
+OLLAMA_LOAD_SECONDS = REGISTRY.histogram(
+    "ollama_load_duration_seconds", "load_duration из ответа Ollama", ("model",)
+)
+OLLAMA_MODEL_LOADS = REGISTRY.counter(
+    "ollama_model_loads_total", "Вызовы, во время которых модель загружалась в память", ("model",)
+)
+OLLAMA_QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "ollama_queue_wait_seconds", "Ожидание слота планировщика моделей", ("model",),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0),
+)
+
+OLLAMA_RETRIES = REGISTRY.counter(
+    "ollama_retries_total", "Повторные попытки вызова Ollama после сбоя", CALL_LABELS
+)
+OLLAMA_HEDGES = REGISTRY.counter(
+    "ollama_hedged_requests_total", "Хеджированные вызовы по победителю: primary или hedge", ("model", "winner")
+)
+OLLAMA_JSON_EARLY_STOPS = REGISTRY.counter(
+    "ollama_json_early_stops_total", "JSON-вызовы, оборванные сразу после закрытия объекта", CALL_LABELS
+)
+
+# Сколько последних задержек учитывается в пороге хеджирования
+LATENCY_WINDOW = 200
+
+# load_duration у уже загруженной модели - миллисекунды; больше порога - была загрузка
+MODEL_LOAD_THRESHOLD = 0.1
+
+
+def _empty_usage() -> Dict[str, float]:
+    return {"calls": 0, "cached_calls": 0, "prompt_eval_count": 0, "prompt_eval_duration_ms": 0.0,
+            "eval_count": 0, "eval_duration_ms": 0.0, "load_duration_ms": 0.0, "total_duration_ms": 0.0}
+
+
+@contextmanager
+def usage_scope() -> Iterator[Dict[str, float]]:
+    """Собирает prompt_eval/eval всех вызовов Ollama в текущем контексте."""
+    usage = _empty_usage()
+    token = _usage_scope.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage_scope.reset(token)
+
+
+JSON_INSTRUCTION = """
+Отвечай строго в формате JSON. Не добавляй пояснений, только валидный JSON.
+"""
+
+
 class TaskType(str, Enum):
     """Типы задач для автоматического переключения моделей"""
     REQUIREMENTS_ANALYSIS = "requirements_analysis"  # Анализ требований (русский)
@@ -37,15 +150,140 @@ class TaskType(str, Enum):
     CODE_REVIEW = "code_review"                     # Ревью кода
 
 
+# Длина ответа по этапам: анализ, спецификация и ревью - короткий JSON, код - самый длинный
+DEFAULT_NUM_PREDICT = {
+    TaskType.REQUIREMENTS_ANALYSIS.value: 1024,
+    TaskType.COMPONENT_DESIGN.value: 1536,
+    TaskType.CODE_GENERATION.value: 2000,
+    TaskType.CODE_REVIEW.value: 1024,
+}
+
+
+class RetryPolicy(BaseModel):
+    """Повторы вызова: экспоненциальная пауза с полным джиттером."""
+    attempts: int = Field(default=3)  # Всего попыток, включая первую
+    base_delay: float = Field(default=0.5)
+    max_delay: float = Field(default=8.0)
+
+    def delay(self, attempt: int) -> float:
+        """Пауза после attempt-й неудачи (с нуля): случайная в [0, base_delay * 2^attempt]."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
 class OllamaConfig(BaseModel):
     """Конфигурация подключения к Ollama"""
     base_url: str = Field(default="http://localhost:11434")
+    # Несколько узлов Ollama; пусто - один base_url
+    base_urls: List[str] = Field(default_factory=list)
+    health_interval: float = Field(default=10.0)
+    max_failures: int = Field(default=3)
+    eject_seconds: float = Field(default=30.0)
+    cold_penalty: int = Field(default=2)
+    # Повторы: общая политика и переопределения по TaskType. Генерация кода -
+    # самый долгий вызов, лишняя попытка удваивает время прогона
+    retry: RetryPolicy = Field(default_factory=RetryPolicy)
+    retry_policies: Dict[str, RetryPolicy] = Field(
+        default_factory=lambda: {TaskType.CODE_GENERATION.value: RetryPolicy(attempts=2)}
+    )
+    # Хеджирование: вызов дольше перцентиля задержки дублируется на другой узел
+    hedge_enabled: bool = Field(default=False)
+    hedge_percentile: float = Field(default=95.0)
+    hedge_min_samples: int = Field(default=20)
+    hedge_min_delay: float = Field(default=1.0)
     model_default: str = Field(default="qwen2.5-coder:3b")  # Для кода
     model_russian: str = Field(default="qwen2.5:3b")       # Для русского
     model_embedding: str = Field(default="nomic-embed-text")
     temperature: float = Field(default=0.7)
-    max_tokens: int = Field(default=2000)
+    max_tokens: int = Field(default=2000)  # num_predict типов задач без своего бюджета
+    # Бюджет токенов: num_predict по TaskType и num_ctx по оценке размера промпта
+    token_budget: bool = Field(default=True)
+    num_predict: Dict[str, int] = Field(default_factory=lambda: dict(DEFAULT_NUM_PREDICT))
+    min_ctx: int = Field(default=2048)
+    max_ctx: int = Field(default=8192)
     timeout: int = Field(default=120)
+    # Пул соединений: один клиент переиспользуется всеми запросами процесса
+    max_connections: int = Field(default=20)
+    max_keepalive_connections: int = Field(default=10)
+    keepalive_expiry: float = Field(default=60.0)
+    # Кэш ответов: без cache_path работает только LRU в памяти
+    cache_enabled: bool = Field(default=True)
+    cache_path: Optional[str] = Field(default=None)
+    cache_memory_items: int = Field(default=256)
+    cache_ttl: int = Field(default=7 * 24 * 3600)
+    cache_max_bytes: int = Field(default=64 * 1024 * 1024)
+    cache_nondeterministic: bool = Field(default=False)
+    # JSON-этапы (анализ, дизайн, ревью) кэшируются и при temperature > 0:
+    # повтор того же запроса не должен заново оплачивать их вызовы
+    cache_structured: bool = Field(default=True)
+    # Резидентность моделей: keep_alive передаётся в каждый запрос явно
+    keep_alive: Optional[str] = Field(default=None)
+    scheduler_enabled: bool = Field(default=False)
+    scheduler_max_loaded_models: int = Field(default=1)
+    scheduler_max_parallel: int = Field(default=1)
+    scheduler_max_batch: int = Field(default=8)
+    model_concurrency: Dict[str, int] = Field(default_factory=dict)
+    # Структурированный вывод: JSON Schema передаётся в format, декодирование ограничено грамматикой
+    structured_output: bool = Field(default=True)
+    structured_retries: int = Field(default=1)
+    # Общий контекст прогона - первым сообщением: стабильный префикс переиспользуется в KV-кэше
+    context_prefix: bool = Field(default=True)
+    # JSON-ответ читается потоком и обрывается, как только закрыт верхнеуровневый объект
+    json_early_stop: bool = Field(default=True)
+
+    @classmethod
+    def from_settings(cls, settings) -> "OllamaConfig":
+        """Создаёт конфигурацию из настроек приложения."""
+        retry = RetryPolicy(
+            attempts=settings.OLLAMA_RETRY_ATTEMPTS,
+            base_delay=settings.OLLAMA_RETRY_BASE_DELAY,
+            max_delay=settings.OLLAMA_RETRY_MAX_DELAY,
+        )
+        return cls(
+            base_url=settings.OLLAMA_BASE_URL,
+            base_urls=settings.OLLAMA_BASE_URLS,
+            health_interval=settings.OLLAMA_HEALTH_INTERVAL,
+            max_failures=settings.OLLAMA_MAX_FAILURES,
+            eject_seconds=settings.OLLAMA_EJECT_SECONDS,
+            cold_penalty=settings.OLLAMA_COLD_PENALTY,
+            retry=retry,
+            retry_policies={
+                task: RetryPolicy(**{**retry.model_dump(), **override})
+                for task, override in settings.OLLAMA_RETRY_POLICIES.items()
+            },
+            hedge_enabled=settings.OLLAMA_HEDGE_ENABLED,
+            hedge_percentile=settings.OLLAMA_HEDGE_PERCENTILE,
+            hedge_min_delay=settings.OLLAMA_HEDGE_MIN_DELAY,
+            model_default=settings.OLLAMA_MODEL_DEFAULT,
+            model_russian=settings.OLLAMA_MODEL_RUSSIAN,
+            model_embedding=settings.OLLAMA_MODEL_EMBEDDING,
+            temperature=settings.TEMPERATURE,
+            max_tokens=settings.MAX_TOKENS,
+            token_budget=settings.OLLAMA_TOKEN_BUDGET,
+            num_predict=settings.OLLAMA_NUM_PREDICT,
+            min_ctx=settings.OLLAMA_MIN_CTX,
+            max_ctx=settings.OLLAMA_MAX_CTX,
+            timeout=settings.OLLAMA_TIMEOUT,
+            max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.OLLAMA_KEEPALIVE_EXPIRY,
+            cache_enabled=settings.OLLAMA_CACHE_ENABLED,
+            cache_path=settings.OLLAMA_CACHE_PATH,
+            cache_memory_items=settings.OLLAMA_CACHE_MEMORY_ITEMS,
+            cache_ttl=settings.OLLAMA_CACHE_TTL,
+            cache_max_bytes=settings.OLLAMA_CACHE_MAX_BYTES,
+            cache_nondeterministic=settings.OLLAMA_CACHE_NONDETERMINISTIC,
+            cache_structured=settings.OLLAMA_CACHE_STRUCTURED,
+            keep_alive=settings.OLLAMA_KEEP_ALIVE,
+            scheduler_enabled=settings.OLLAMA_SCHEDULER_ENABLED,
+            scheduler_max_loaded_models=settings.OLLAMA_MAX_LOADED_MODELS,
+            scheduler_max_parallel=settings.OLLAMA_NUM_PARALLEL,
+            scheduler_max_batch=settings.OLLAMA_SCHEDULER_MAX_BATCH,
+            model_concurrency=settings.OLLAMA_MODEL_CONCURRENCY,
+            structured_output=settings.OLLAMA_STRUCTURED_OUTPUT,
+            structured_retries=settings.OLLAMA_STRUCTURED_RETRIES,
+            context_prefix=settings.OLLAMA_CONTEXT_PREFIX,
+            json_early_stop=settings.OLLAMA_JSON_EARLY_STOP,
+        )
 
 
 class OllamaService:
@@ -54,16 +292,79 @@ class OllamaService:
     Особенности:
     - Автоматическое переключение моделей по типу задачи
     - Поддержка стриминга ответов
+    - Кэширование детерминированных и JSON-ответов (см. ResponseCache)
+    - Группировка вызовов по модели (см. ModelScheduler)
+    - Несколько узлов Ollama с выбором по загруженной модели (см. HostPool)
+    - Повторы с джиттером, хеджирование медленных вызовов, автомат защиты узлов
     - Обработка ошибок и логирование
     """
 
-    def __init__(self, config: Optional[OllamaConfig] = None):
+    def __init__(
+        self,
+        config: Optional[OllamaConfig] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
         self.config = config or OllamaConfig()
-        self.client = httpx.AsyncClient(
-            base_url=self.config.base_url,
-            timeout=self.config.timeout
+        self.pool = HostPool(
+            [self._create_host(url, transport) for url in self.config.base_urls or [self.config.base_url]],
+            probe_interval=self.config.health_interval,
+            max_failures=self.config.max_failures,
+            eject_seconds=self.config.eject_seconds,
+            cold_penalty=self.config.cold_penalty,
         )
-        logger.info(f"OllamaService инициализирован. URL: {self.config.base_url}")
+        # Клиент и планировщик первого узла; с одним узлом - единственные
+        self.client = self.pool.hosts[0].client
+        self.scheduler: Optional[ModelScheduler] = self.pool.hosts[0].scheduler
+        self.cache: Optional[ResponseCache] = None
+        if self.config.cache_enabled:
+            self.cache = ResponseCache(
+                path=self.config.cache_path,
+                memory_items=self.config.cache_memory_items,
+                ttl=self.config.cache_ttl,
+                max_bytes=self.config.cache_max_bytes,
+            )
+        # Статистика JSON-ответов: доля неразбираемых и число повторов
+        self.json_stats: Dict[str, int] = {"requests": 0, "parse_failures": 0, "retries": 0, "failed": 0}
+        # Вычисления Ollama по моделям: сколько токенов промпта прочитано заново и за сколько
+        self.usage_stats: Dict[str, Dict[str, float]] = {}
+        self.budget: Optional[TokenBudget] = None
+        if self.config.token_budget:
+            self.budget = TokenBudget(
+                self.config.num_predict,
+                default_predict=self.config.max_tokens,
+                min_ctx=self.config.min_ctx,
+                max_ctx=self.config.max_ctx,
+            )
+        # Задержки успешных вызовов по (модель, тип задачи) - для порога хеджирования
+        self._latencies: Dict[tuple, deque] = {}
+        logger.info(f"OllamaService инициализирован. URL: {', '.join(h.url for h in self.pool.hosts)}")
+
+    def _create_host(self, url: str, transport: Optional[httpx.AsyncBaseTransport]) -> OllamaHost:
+        client = httpx.AsyncClient(
+            base_url=url,
+            timeout=self.config.timeout,
+            limits=httpx.Limits(
+                max_connections=self.config.max_connections,
+                max_keepalive_connections=self.config.max_keepalive_connections,
+                keepalive_expiry=self.config.keepalive_expiry,
+            ),
+            transport=transport,
+        )
+        scheduler = None
+        if self.config.scheduler_enabled:
+            scheduler = ModelScheduler(
+                client,
+                max_loaded_models=self.config.scheduler_max_loaded_models,
+                max_parallel=self.config.scheduler_max_parallel,
+                max_batch=self.config.scheduler_max_batch,
+                model_limits=self.config.model_concurrency,
+                pinned_models=[self.config.model_embedding],
+            )
+        return OllamaHost(url, client, scheduler)
+
+    async def start(self) -> None:
+        """Первая проба узлов и фоновые проверки здоровья (при нескольких узлах)."""
+        await self.pool.start()
 
     def _get_model_for_task(self, task_type: TaskType) -> str:
         """Определяет модель для конкретной задачи."""
@@ -75,76 +376,608 @@ class OllamaService:
         }
         return model_mapping.get(task_type, self.config.model_default)
 
-    async def generate(
+    def stage_models(self) -> List[str]:
+        """Модели этапов в порядке их вызова в прогоне, без повторов."""
+        return list(dict.fromkeys(self._get_model_for_task(task) for task in TaskType))
+
+    @property
+    def available(self) -> bool:
+        """False - автоматы всех узлов разомкнуты, вызовы будут отклонены сразу."""
+        return self.pool.available()
+
+    @asynccontextmanager
+    async def _model_slot(self, model: str, tried: Optional[List[OllamaHost]] = None):
+        """
+        Узел пула и слот его планировщика на время HTTP-вызова
+        (без планировщика - пустой контекст). Отдаёт клиент узла.
+        tried - узлы прошлых попыток: выбранный дописывается, повтор идёт на другой.
+        """
+        started = time.perf_counter()
+        async with self.pool.acquire(model, exclude=tried or ()) as host:
+            if tried is not None:
+                tried.append(host)
+            slot = nullcontext() if host.scheduler is None else host.scheduler.slot(model)
+            async with slot:
+                OLLAMA_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - started, model=model)
+                yield host.client
+
+    def _build_payload(
         self,
         prompt: str,
-        task_type: TaskType = TaskType.CODE_GENERATION,
-        system_prompt: Optional[str] = None
-    ) -> str:
-        """Генерация текста через Ollama (блокирующий режим)."""
-        model = self._get_model_for_task(task_type)
-        logger.info(f"Генерация. Модель: {model}, Тип: {task_type.value}")
-
+        task_type: TaskType,
+        system_prompt: Optional[str],
+        stream: bool,
+        response_format: Optional[Dict[str, Any]] = None,
+        shared_context: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Собирает тело запроса к /api/chat.
+        options - переопределение параметров модели (temperature, seed) для этого вызова.
+        shared_context - общий для этапов прогона блок (запрос, требования, дизайн).
+        Он идёт первым системным сообщением: Ollama склеивает подряд идущие
+        системные сообщения, и у всех вызовов прогона к одной модели получается
+        общий префикс, который раннер берёт из KV-кэша, а не вычисляет заново.
+        num_predict и num_ctx задаёт бюджет токенов (см. TokenBudget).
+        """
         messages = []
+        if shared_context and self.config.context_prefix:
+            messages.append({"role": "system", "content": shared_context})
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
+        if shared_context and not self.config.context_prefix:
+            prompt = f"{shared_context}\n\n{prompt}"
         messages.append({"role": "user", "content": prompt})
 
+        model = self._get_model_for_task(task_type)
+        if self.budget is not None:
+            limits = self.budget.plan(model, task_type.value, messages)
+        else:
+            limits = {"num_predict": self.config.max_tokens}
         payload = {
             "model": model,
             "messages": messages,
-            "stream": False,
+            "stream": stream,
             "options": {
                 "temperature": self.config.temperature,
-                "num_predict": self.config.max_tokens,
+                **limits,
+                **(options or {}),
             }
         }
+        if response_format is not None:
+            payload["format"] = response_format
+        if self.config.keep_alive:
+            payload["keep_alive"] = self.config.keep_alive
+        return payload
+
+    def _cache_key(self, payload: Dict[str, Any], use_cache: Optional[bool]) -> Optional[str]:
+        """
+        Ключ кэша для запроса или None, если кэш нужно обойти.
+        При temperature > 0 ответ недетерминирован, поэтому кэш используется
+        только по явному согласию (use_cache=True или cache_nondeterministic).
+        """
+        if self.cache is None or use_cache is False:
+            return None
+        if payload["options"].get("temperature", 0) > 0 and not (
+            use_cache or self.config.cache_nondeterministic
+        ):
+            self.cache.record_bypass()
+            return None
+        # num_ctx растёт по ходу работы процесса и на текст ответа не влияет
+        options = {key: value for key, value in payload["options"].items() if key != "num_ctx"}
+        if "format" in payload:
+            options = {**options, "format": payload["format"]}
+        return ResponseCache.make_key(payload["model"], payload["messages"], options)
+
+    async def generate(
+        self,
+        prompt: str,
+        task_type: TaskType = TaskType.CODE_GENERATION,
+        system_prompt: Optional[str] = None,
+        on_token: Optional[TokenCallback] = None,
+        use_cache: Optional[bool] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        validate: Optional[Callable[[str], Any]] = None,
+        shared_context: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        on_field: Optional[FieldCallback] = None,
+        stop_on_json: bool = False
+    ) -> str:
+        """
+        Генерация текста через Ollama.
+        Если передан on_token, ответ читается потоком и каждый фрагмент
+        отдаётся в колбэк; результатом всё равно остаётся полный текст.
+        use_cache: None - автоматически по temperature, True/False - принудительно.
+        response_format: значение поля format Ollama ("json" или JSON Schema).
+        validate: проверка ответа; не прошедший её ответ не попадает в кэш.
+        shared_context: общий контекст прогона (см. _build_payload).
+        options: параметры модели для этого вызова, например temperature и seed.
+        stop_on_json: ответ - JSON-объект; он читается потоком, вызов обрывается
+        сразу после закрывающей скобки, результатом становится сам объект.
+        on_field: колбэк для законченных полей верхнего уровня (только со stop_on_json).
+        """
+        task_type = TaskType(task_type)
+        streaming = on_token is not None or stop_on_json
+        payload = self._build_payload(
+            prompt, task_type, system_prompt, stream=streaming,
+            response_format=response_format, shared_context=shared_context, options=options
+        )
+
+        cache_key = self._cache_key(payload, use_cache)
+        if cache_key is not None:
+            cached = await self.cache.get(cache_key)
+            if cached is not None and not self._is_valid(cached, validate):
+                cached = None
+            if cached is not None:
+                logger.info(f"Ответ из кэша. Модель: {payload['model']}, Тип: {task_type.value}")
+                self._record_usage(payload["model"], None, task_type)
+                if on_token is not None:
+                    await on_token(cached)
+                if on_field is not None:
+                    for name, value in JsonStreamParser().feed(cached):
+                        await on_field(name, value)
+                return cached
+
+        if streaming:
+            content = await self._read_stream(payload, task_type, on_token, on_field if stop_on_json else None, stop_on_json)
+        else:
+            logger.info(f"Генерация. Модель: {payload['model']}, Тип: {task_type.value}")
+            started = time.perf_counter()
+            try:
+                data = await self._with_retries(
+                    lambda tried: self._hedged_chat(payload, task_type, tried), payload["model"], task_type
+                )
+                content = data["message"]["content"]
+                self._record_usage(payload["model"], data, task_type, time.perf_counter() - started)
 
+            except CircuitOpenError:
+                self._record_error(payload["model"], task_type, outcome="circuit_open")
+                raise
+            except Exception as e:
+                self._record_error(payload["model"], task_type)
+                logger.error(f"Ошибка Ollama: {e}")
+                raise OllamaError(f"Ollama error: {e}") from e
+
+        if cache_key is not None and self._is_valid(content, validate):
+            await self.cache.set(cache_key, content)
+        return content
+
+    async def _read_stream(
+        self,
+        payload: Dict[str, Any],
+        task_type: TaskType,
+        on_token: Optional[TokenCallback],
+        on_field: Optional[FieldCallback],
+        stop_on_json: bool
+    ) -> str:
+        """
+        Читает потоковый ответ целиком или, со stop_on_json, до закрытия JSON-объекта.
+        После закрытия ждём JSON_STOP_GRACE фрагментов: обычно за скобкой сразу идёт
+        итоговый фрагмент со счётчиками. Если модель продолжает, поток закрывается -
+        соединение обрывается, и Ollama прекращает генерацию.
+        """
+        parser = JsonStreamParser() if stop_on_json else None
+        chunks: List[str] = []
+        tail = 0
+        started = time.perf_counter()
+        stream = self._stream_chat(payload, task_type)
         try:
-            response = await self.client.post("/api/chat", json=payload)
+            async for chunk in stream:
+                if parser is not None and parser.complete:
+                    tail += 1
+                    if tail > JSON_STOP_GRACE:
+                        break
+                    continue
+                chunks.append(chunk)
+                if on_token is not None:
+                    await on_token(chunk)
+                if parser is None:
+                    continue
+                for name, value in parser.feed(chunk):
+                    if on_field is not None:
+                        await on_field(name, value)
+            else:
+                tail = 0
+        finally:
+            await stream.aclose()
+
+        if parser is None or not parser.complete:
+            return "".join(chunks)
+        if tail:
+            # Итогового фрагмента не было: prompt_eval неизвестен, eval - по фрагментам (токен на фрагмент)
+            self._record_usage(payload["model"], {"eval_count": len(chunks) + tail}, task_type, time.perf_counter() - started)
+            OLLAMA_JSON_EARLY_STOPS.inc(**self._call_labels(payload["model"], task_type))
+            logger.info(f"JSON-ответ закрыт, генерация оборвана. Модель: {payload['model']}, Тип: {task_type.value}")
+        return parser.document
+
+    @staticmethod
+    def _call_labels(model: str, task_type: Optional[TaskType]) -> Dict[str, str]:
+        return {"model": model, "task_type": task_type.value if task_type else "embedding", "agent": current_agent()}
+
+    def _record_error(self, model: str, task_type: Optional[TaskType], outcome: str = "error") -> None:
+        OLLAMA_REQUESTS.inc(**self._call_labels(model, task_type), outcome=outcome)
+
+    def _retry_policy(self, task_type: Optional[TaskType]) -> RetryPolicy:
+        if task_type is not None and task_type.value in self.config.retry_policies:
+            return self.config.retry_policies[task_type.value]
+        return self.config.retry
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Сбой соединения, таймаут, 5xx и 429 повторяемы; прочие 4xx и ошибки разбора - нет."""
+        if isinstance(error, httpx.TransportError):
+            return True
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code >= 500 or error.response.status_code == 429
+        return False
+
+    def _next_retry(self, attempt: int, error: Exception, model: str, task_type: Optional[TaskType]) -> Optional[float]:
+        """Пауза перед следующей попыткой или None, если повторять нельзя."""
+        policy = self._retry_policy(task_type)
+        if attempt + 1 >= policy.attempts or not self._is_retryable(error):
+            return None
+        delay = policy.delay(attempt)
+        OLLAMA_RETRIES.inc(**self._call_labels(model, task_type))
+        logger.warning(f"Ollama: попытка {attempt + 1} не удалась ({error}), повтор через {delay:.2f} с")
+        return delay
+
+    async def _with_retries(
+        self,
+        call: Callable[[List[OllamaHost]], Awaitable[T]],
+        model: str,
+        task_type: Optional[TaskType]
+    ) -> T:
+        """Выполняет call(tried) по политике повторов типа задачи (см. _model_slot)."""
+        tried: List[OllamaHost] = []
+        attempt = 0
+        while True:
+            try:
+                return await call(tried)
+            except Exception as e:
+                delay = self._next_retry(attempt, e, model, task_type)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def _post(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        tried: List[OllamaHost],
+        task_type: Optional[TaskType] = None
+    ) -> Dict[str, Any]:
+        """Один HTTP-вызов на узле пула; задержка успешного вызова идёт в порог хеджирования."""
+        started = time.perf_counter()
+        async with self._model_slot(payload["model"], tried) as client:
+            response = await client.post(path, json=payload)
             response.raise_for_status()
-            data = response.json()
-            return data["message"]["content"]
+        key = (payload["model"], task_type)
+        self._latencies.setdefault(key, deque(maxlen=LATENCY_WINDOW)).append(time.perf_counter() - started)
+        return response.json()
 
-        except Exception as e:
-            logger.error(f"Ошибка Ollama: {e}")
-            raise Exception(f"Ollama error: {e}")
+    def _hedge_delay(self, model: str, task_type: TaskType) -> Optional[float]:
+        """Порог хеджирования: hedge_percentile задержки вызовов или None, если хеджировать нельзя."""
+        if not self.config.hedge_enabled or len(self.pool.hosts) < 2:
+            return None
+        samples = self._latencies.get((model, task_type))
+        if not samples or len(samples) < self.config.hedge_min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * self.config.hedge_percentile / 100))
+        return max(self.config.hedge_min_delay, ordered[index])
+
+    async def _hedged_chat(self, payload: Dict[str, Any], task_type: TaskType, tried: List[OllamaHost]) -> Dict[str, Any]:
+        """
+        /api/chat с хеджированием: если ответа нет дольше порога (_hedge_delay),
+        тот же запрос уходит на другой узел. Берётся первый успешный ответ,
+        второй вызов отменяется.
+        """
+        delay = self._hedge_delay(payload["model"], task_type)
+        if delay is None:
+            return await self._post("/api/chat", payload, tried, task_type)
+
+        primary = asyncio.ensure_future(self._post("/api/chat", payload, tried, task_type))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not any(h.breaker.available() and h not in tried for h in self.pool.hosts):
+            return await primary
+
+        hedge = asyncio.ensure_future(self._post("/api/chat", payload, tried, task_type))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        OLLAMA_HEDGES.inc(model=payload["model"], winner="hedge" if task is hedge else "primary")
+                        return task.result()
+            # Оба вызова не удались - ошибка основного
+            return primary.result()
+        finally:
+            for task in (primary, hedge):
+                task.cancel()
+
+    def _record_usage(
+        self,
+        model: str,
+        data: Optional[Dict[str, Any]],
+        task_type: Optional[TaskType] = None,
+        duration: Optional[float] = None
+    ) -> None:
+        """
+        Учитывает prompt_eval/eval ответа; data=None - ответ из кэша.
+        Временные поля Ollama (total/load/eval_duration) идут в метрики процесса.
+        """
+        labels = self._call_labels(model, task_type)
+        OLLAMA_REQUESTS.inc(**labels, outcome="ok" if data is not None else "cached")
+        if data is not None:
+            OLLAMA_PROMPT_TOKENS.inc(data.get("prompt_eval_count", 0), **labels)
+            OLLAMA_COMPLETION_TOKENS.inc(data.get("eval_count", 0), **labels)
+            if data.get("eval_count") and data.get("eval_duration"):
+                OLLAMA_TOKENS_PER_SECOND.observe(data["eval_count"] / (data["eval_duration"] / 1e9), model=model)
+            if "load_duration" in data:
+                load_seconds = data["load_duration"] / 1e9
+                OLLAMA_LOAD_SECONDS.observe(load_seconds, model=model)
+                if load_seconds > MODEL_LOAD_THRESHOLD:
+                    OLLAMA_MODEL_LOADS.inc(model=model)
+            if duration is not None:
+                OLLAMA_REQUEST_SECONDS.observe(duration, **labels)
+
+        targets = [self.usage_stats.setdefault(model, _empty_usage())]
+        scope = _usage_scope.get()
+        if scope is not None:
+            targets.append(scope)
+        for usage in targets:
+            usage["calls"] += 1
+            if data is None:
+                usage["cached_calls"] += 1
+                continue
+            usage["prompt_eval_count"] += data.get("prompt_eval_count", 0)
+            usage["prompt_eval_duration_ms"] += data.get("prompt_eval_duration", 0) / 1e6
+            usage["eval_count"] += data.get("eval_count", 0)
+            usage["eval_duration_ms"] += data.get("eval_duration", 0) / 1e6
+            usage["load_duration_ms"] += data.get("load_duration", 0) / 1e6
+            usage["total_duration_ms"] += data.get("total_duration", 0) / 1e6
+
+    @staticmethod
+    def _is_valid(content: str, validate: Optional[Callable[[str], Any]]) -> bool:
+        if validate is None:
+            return True
+        try:
+            validate(content)
+            return True
+        except Exception:
+            return False
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        task_type: TaskType = TaskType.CODE_GENERATION,
+        system_prompt: Optional[str] = None,
+        shared_context: Optional[str] = None
+    ) -> AsyncGenerator[str, None]:
+        """Потоковая генерация: читает NDJSON-фрагменты Ollama и отдаёт текст по мере появления."""
+        task_type = TaskType(task_type)
+        payload = self._build_payload(prompt, task_type, system_prompt, stream=True, shared_context=shared_context)
+        async for chunk in self._stream_chat(payload, task_type):
+            yield chunk
+
+    async def _stream_chat(
+        self,
+        payload: Dict[str, Any],
+        task_type: TaskType
+    ) -> AsyncGenerator[str, None]:
+        logger.info(f"Потоковая генерация. Модель: {payload['model']}, Тип: {task_type.value}")
+        started = time.perf_counter()
+        tried: List[OllamaHost] = []
+        attempt = 0
+        while True:
+            streamed = False
+            try:
+                async with self._model_slot(payload["model"], tried) as client:
+                    async with client.stream("POST", "/api/chat", json=payload) as response:
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            if not line.strip():
+                                continue
+                            chunk = json.loads(line)
+                            if "error" in chunk:
+                                raise RuntimeError(chunk["error"])
+                            content = chunk.get("message", {}).get("content")
+                            if content:
+                                streamed = True
+                                yield content
+                            if chunk.get("done"):
+                                # Итоговый фрагмент несёт счётчики prompt_eval/eval
+                                self._record_usage(payload["model"], chunk, task_type, time.perf_counter() - started)
+                                break
+                return
+
+            except CircuitOpenError:
+                self._record_error(payload["model"], task_type, outcome="circuit_open")
+                raise
+            except Exception as e:
+                # Повтор возможен, пока подписчик не получил ни одного фрагмента
+                delay = None if streamed else self._next_retry(attempt, e, payload["model"], task_type)
+                if delay is None:
+                    self._record_error(payload["model"], task_type)
+                    logger.error(f"Ошибка Ollama (стриминг): {e}")
+                    raise OllamaError(f"Ollama error: {e}") from e
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _strip_fences(response: str) -> str:
+        """Убирает markdown-ограждение ``` вокруг JSON."""
+        cleaned_response = response.strip()
+        if cleaned_response.startswith("```json"):
+            cleaned_response = cleaned_response[7:]
+        if cleaned_response.startswith("```"):
+            cleaned_response = cleaned_response[3:]
+        if cleaned_response.endswith("```"):
+            cleaned_response = cleaned_response[:-3]
+        return cleaned_response
+
+    @classmethod
+    def _parse_structured(cls, response: str, schema: Type[SchemaT]) -> SchemaT:
+        try:
+            return schema.model_validate(json.loads(cls._strip_fences(response)))
+        except (json.JSONDecodeError, ValidationError) as e:
+            raise StructuredOutputError(f"Ответ не соответствует {schema.__name__}: {e}", response)
+
+    def _structured_cache(self, use_cache: Optional[bool]) -> Optional[bool]:
+        """use_cache для JSON-вызова: без явного значения - по cache_structured."""
+        if use_cache is None and self.config.cache_structured:
+            return True
+        return use_cache
+
+    async def generate_structured(
+        self,
+        prompt: str,
+        schema: Type[SchemaT],
+        task_type: TaskType = TaskType.CODE_GENERATION,
+        system_prompt: Optional[str] = None,
+        on_token: Optional[TokenCallback] = None,
+        use_cache: Optional[bool] = None,
+        shared_context: Optional[str] = None,
+        on_field: Optional[FieldCallback] = None
+    ) -> SchemaT:
+        """
+        Генерация, ограниченная JSON Schema модели Pydantic.
+        Схема передаётся в поле format, поэтому Ollama декодирует ответ по грамматике;
+        результат валидируется в объект schema. Неразбираемый ответ повторяется
+        до structured_retries раз, затем выбрасывается StructuredOutputError.
+        С json_early_stop вызов обрывается после закрытия объекта (см. _read_stream).
+        """
+        use_cache = self._structured_cache(use_cache)
+        combined_system_prompt = (system_prompt or "") + JSON_INSTRUCTION
+        response_format = schema.model_json_schema()
+
+        def validate(text: str) -> None:
+            self._parse_structured(text, schema)
+
+        last_error: Optional[StructuredOutputError] = None
+        for attempt in range(self.config.structured_retries + 1):
+            self.json_stats["requests"] += 1
+            if attempt:
+                self.json_stats["retries"] += 1
+            response = await self.generate(
+                prompt=prompt,
+                task_type=task_type,
+                system_prompt=combined_system_prompt,
+                on_token=on_token,
+                use_cache=use_cache,
+                response_format=response_format,
+                validate=validate,
+                shared_context=shared_context,
+                on_field=on_field,
+                stop_on_json=self.config.json_early_stop
+            )
+            try:
+                return self._parse_structured(response, schema)
+            except StructuredOutputError as e:
+                self.json_stats["parse_failures"] += 1
+                logger.warning(f"Ошибка структурированного ответа (попытка {attempt + 1}): {e}")
+                last_error = e
+
+        self.json_stats["failed"] += 1
+        raise last_error
 
     async def generate_json(
         self,
         prompt: str,
         task_type: TaskType = TaskType.CODE_GENERATION,
-        system_prompt: Optional[str] = None
+        system_prompt: Optional[str] = None,
+        on_token: Optional[TokenCallback] = None,
+        use_cache: Optional[bool] = None,
+        schema: Optional[Type[BaseModel]] = None,
+        shared_context: Optional[str] = None,
+        on_field: Optional[FieldCallback] = None
     ) -> Dict[str, Any]:
-        """Генерация структурированных данных в формате JSON."""
-        json_instruction = """
-Отвечай строго в формате JSON. Не добавляй пояснений, только валидный JSON.
-"""
-        combined_system_prompt = system_prompt + json_instruction if system_prompt else json_instruction
+        """
+        Генерация структурированных данных в формате JSON.
+        Со schema (и включённым structured_output) ответ ограничен схемой,
+        провалидирован и возвращается как dict; без неё - прежний разбор текста.
+        on_field получает законченные поля верхнего уровня до конца вызова.
+        """
+        if schema is not None and self.config.structured_output:
+            result = await self.generate_structured(
+                prompt=prompt,
+                schema=schema,
+                task_type=task_type,
+                system_prompt=system_prompt,
+                on_token=on_token,
+                use_cache=use_cache,
+                shared_context=shared_context,
+                on_field=on_field
+            )
+            return result.model_dump()
+
+        use_cache = self._structured_cache(use_cache)
+        combined_system_prompt = system_prompt + JSON_INSTRUCTION if system_prompt else JSON_INSTRUCTION
+        self.json_stats["requests"] += 1
 
         try:
             response = await self.generate(
                 prompt=prompt,
                 task_type=task_type,
-                system_prompt=combined_system_prompt
+                system_prompt=combined_system_prompt,
+                on_token=on_token,
+                use_cache=use_cache,
+                shared_context=shared_context,
+                on_field=on_field,
+                stop_on_json=self.config.json_early_stop
             )
 
             # Очищаем и парсим JSON
-            cleaned_response = response.strip()
-            if cleaned_response.startswith("```json"):
-                cleaned_response = cleaned_response[7:]
-            if cleaned_response.startswith("```"):
-                cleaned_response = cleaned_response[3:]
-            if cleaned_response.endswith("```"):
-                cleaned_response = cleaned_response[:-3]
-
-            return json.loads(cleaned_response)
+            return json.loads(self._strip_fences(response))
 
         except json.JSONDecodeError as e:
             logger.error(f"Ошибка парсинга JSON: {e}")
+            self.json_stats["parse_failures"] += 1
             return {"error": "Failed to parse JSON", "raw_response": response}
 
+    async def embed(self, text: str) -> List[float]:
+        """Вектор текста от модели эмбеддингов (model_embedding) через /api/embed."""
+        model = self.config.model_embedding
+        payload: Dict[str, Any] = {"model": model, "input": text}
+        if self.config.keep_alive:
+            payload["keep_alive"] = self.config.keep_alive
+        started = time.perf_counter()
+        try:
+            data = await self._with_retries(lambda tried: self._post("/api/embed", payload, tried), model, None)
+            self._record_usage(model, data, duration=time.perf_counter() - started)
+            return data["embeddings"][0]
+        except CircuitOpenError:
+            self._record_error(model, None, outcome="circuit_open")
+            raise
+        except Exception as e:
+            self._record_error(model, None)
+            logger.error(f"Ошибка эмбеддинга Ollama: {e}")
+            raise OllamaError(f"Ollama embedding error: {e}") from e
+
+    def usage_snapshot(self) -> Dict[str, Any]:
+        """
+        Счётчики по моделям. prompt_eval_count - токены промпта, которые модель
+        вычислила заново: префикс, взятый из KV-кэша, в него не входит.
+        """
+        return {model: dict(usage) for model, usage in self.usage_stats.items()}
+
+    def budget_stats(self) -> Dict[str, Any]:
+        """Бюджет токенов: num_ctx по моделям, сокращения num_predict и переполнения."""
+        if self.budget is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.budget.snapshot()}
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Счётчики попаданий и промахов кэша ответов."""
+        if self.cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.snapshot()}
+
     async def close(self):
         """Закрытие соединения."""
-        await self.client.aclose()
+        await self.pool.close()
+        if self.cache is not None:
+            self.cache.close()
         logger.info("OllamaService закрыт")
\ No newline at end of file
@@ -0,0 +1,232 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Двухуровневый кэш ответов LLM.
+Первый уровень - ограниченный LRU в памяти процесса, второй - SQLite в режиме WAL
+с TTL и вытеснением по суммарному размеру. Ключ - хэш модели, сообщений и опций.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Кэш ответов с адресацией по содержимому.
+    Особенности:
+    - LRU в памяти ограничен числом записей
+    - SQLite-хранилище переживает перезапуск и ограничено по байтам
+    - Устаревшие по TTL записи не отдаются и удаляются при обращении
+    - Чтение с диска не пишет в базу: время обращения копится в памяти и
+      записывается пачкой при следующей записи, вытеснении или закрытии
+    """
+
+    # Сколько обращений копить, если записей в кэш долго нет
+    MAX_PENDING_TOUCHES = 256
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        memory_items: int = 256,
+        ttl: float = 7 * 24 * 3600,
+        max_bytes: int = 64 * 1024 * 1024
+    ):
+        self.path = path
+        self.memory_items = memory_items
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_bytes = 0
+        self._touched: Dict[str, float] = {}
+
+        self.stats: Dict[str, int] = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "evictions": 0,
+        }
+
+        if path:
+            self._open(path)
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], options: Dict[str, Any]) -> str:
+        """Ключ кэша: SHA-256 от канонического JSON модели, сообщений и опций."""
+        canonical = json.dumps(
+            {"model": model, "messages": messages, "options": options},
+            ensure_ascii=False,
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _open(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        self._db.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+        self._db.commit()
+        row = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        self._disk_bytes = row[0]
+        logger.info(f"Кэш ответов открыт: {path} ({self._disk_bytes} байт)")
+
+    def record_bypass(self) -> None:
+        """Учитывает запрос, прошедший мимо кэша."""
+        self.stats["bypassed"] += 1
+
+    async def get(self, key: str) -> Optional[str]:
+        """Ищет ответ сначала в памяти, затем на диске."""
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            value, created_at = entry
+            if now - created_at < self.ttl:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return value
+            del self._memory[key]
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._disk_get, key, now)
+            if row is not None:
+                value, created_at = row
+                self._remember(key, value, created_at)
+                self.stats["disk_hits"] += 1
+                return value
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        """Сохраняет ответ на обоих уровнях."""
+        now = time.time()
+        self._remember(key, value, now)
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_set, key, value, now)
+
+    def _remember(self, key: str, value: str, created_at: float) -> None:
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, size, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, size, created_at = row
+            if now - created_at >= self.ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                self._disk_bytes -= size
+                self._touched.pop(key, None)
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= self.MAX_PENDING_TOUCHES:
+                self._flush_touches_locked()
+                self._db.commit()
+            return value, created_at
+
+    def _flush_touches_locked(self) -> None:
+        """Записывает накопленные времена обращений (без commit - его делает вызывающий)."""
+        if self._touched:
+            self._db.executemany(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _disk_set(self, key: str, value: str, now: float) -> None:
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._disk_bytes += size - (old[0] if old else 0)
+            self._touched.pop(key, None)
+            # Порядок вытеснения должен учитывать недавние чтения
+            self._flush_touches_locked()
+            self._evict_locked()
+            self._db.commit()
+
+    def _evict_locked(self) -> None:
+        """Удаляет давно не использованные записи, пока размер выше лимита."""
+        while self._disk_bytes > self.max_bytes:
+            rows = self._db.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at ASC LIMIT 32"
+            ).fetchall()
+            if not rows:
+                self._disk_bytes = 0
+                return
+            for key, size in rows:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._disk_bytes -= size
+                self.stats["evictions"] += 1
+                if self._disk_bytes <= self.max_bytes:
+                    break
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Счётчики и размеры кэша для мониторинга."""
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_items": len(self._memory),
+            "disk_bytes": self._disk_bytes,
+        }
+
+    def close(self) -> None:
+        if self._db is not None:
+            with self._lock:
+                self._flush_touches_locked()
+                self._db.commit()
+                self._db.close()
+            self._db = None
@@ -0,0 +1,87 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Семантический кэш запросов.
+Хранит эмбеддинги прошлых запросов в векторном индексе и находит ближайший
+по косинусному сходству: перефразированный запрос ("синяя кнопка" и
+"кнопка синего цвета") получает уже готовые анализ требований и дизайн.
+"""
+
+import asyncio
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from .vector_index import VectorIndex
+
+
+class SemanticCache:
+    """
+    Кэш ответов по смыслу запроса.
+    Особенности:
+    - Отдаётся ближайшая запись, если её сходство не ниже threshold
+    - При превышении max_items вытесняются давно не использованные записи
+    - Состояние сохраняется в .npz пачками и при close() и переживает перезапуск
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        threshold: float = 0.92,
+        max_items: int = 2048,
+        ttl: float = 30 * 24 * 3600,
+        model: str = "",
+        save_every: int = 32,
+        save_interval: float = 60.0
+    ):
+        self.threshold = threshold
+        self.index = VectorIndex(
+            path=path, max_items=max_items, ttl=ttl, model=model, save_every=save_every, save_interval=save_interval
+        )
+        self.stats: Dict[str, int] = {"lookups": 0, "hits": 0, "misses": 0, "inserts": 0}
+
+    def lookup(self, vector: Sequence[float]) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Ближайшая запись со сходством не ниже порога: (значение, сходство) или None."""
+        self.stats["lookups"] += 1
+        found = self.index.search(vector, k=1, min_similarity=self.threshold)
+        if not found:
+            self.stats["misses"] += 1
+            return None
+        entry, similarity = found[0]
+        entry["hits"] = entry.get("hits", 0) + 1
+        self.stats["hits"] += 1
+        return entry["value"], similarity
+
+    async def add(self, vector: Sequence[float], text: str, value: Dict[str, Any]) -> None:
+        """Добавляет запись; на диск кэш пишется пачками (см. VectorIndex)."""
+        self.index.add(vector, {"text": text, "value": value, "hits": 0})
+        self.stats["inserts"] += 1
+        if self.index.save_due():
+            await asyncio.to_thread(self.index.save)
+
+    async def close(self) -> None:
+        """Записывает на диск изменения, не попавшие в очередное сохранение."""
+        await asyncio.to_thread(self.index.flush)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Счётчики и размер кэша для мониторинга."""
+        lookups = self.stats["lookups"]
+        return {
+            **self.stats,
+            "evictions": self.index.evictions,
+            "expired": self.index.expired,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "items": len(self.index),
+            "threshold": self.threshold,
+            "model": self.index.model,
+        }
@@ -0,0 +1,155 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Бюджет токенов вызовов Ollama.
+Раньше num_predict был одинаковым (MAX_TOKENS) для всех этапов, а num_ctx не
+передавался вовсе: промпт, не поместившийся в контекст по умолчанию, Ollama
+молча обрезает с начала. Бюджет оценивает размер промпта, берёт num_predict
+по типу задачи и подбирает num_ctx, в который помещаются промпт и ответ.
+
+num_ctx для модели только растёт: смена num_ctx заставляет Ollama перезапустить
+раннер модели, поэтому выбранное значение запоминается и переиспользуется.
+"""
+
+import json
+import logging
+import math
+from typing import Any, Dict, List
+
+from ..core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+PROMPT_TOKENS_ESTIMATED = REGISTRY.histogram(
+    "ollama_prompt_tokens_estimated", "Оценка размера промпта в токенах", ("task_type",),
+    buckets=(128, 256, 512, 1024, 2048, 4096, 8192, 16384),
+)
+CONTEXT_TOKENS_SAVED = REGISTRY.counter(
+    "context_json_tokens_saved_total",
+    "Токены блоков контекста в компактном JSON против repr словаря (по каждому собранному промпту)"
+)
+CONTEXT_OVERFLOWS = REGISTRY.counter(
+    "ollama_context_overflows_total", "Промпты, не поместившиеся в max_ctx вместе с ответом", ("task_type",)
+)
+
+MESSAGE_OVERHEAD = 4  # Служебные токены шаблона чата на сообщение
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Оценка без токенизатора: у BPE-словарей Qwen около 4 символов латиницы
+    (код, JSON) и около 2.5 символов кириллицы на токен.
+    """
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars) / 2.5)
+
+
+def prune_empty(value: Any) -> Any:
+    """Рекурсивно убирает None, пустые строки, списки и словари - модели они ничего не сообщают."""
+    if isinstance(value, dict):
+        pruned = {key: prune_empty(item) for key, item in value.items()}
+        return {key: item for key, item in pruned.items() if not _is_empty(item)}
+    if isinstance(value, (list, tuple)):
+        pruned = [prune_empty(item) for item in value]
+        return [item for item in pruned if not _is_empty(item)]
+    return value
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def compact_json(data: Any) -> str:
+    """
+    Минифицированный JSON без пустых полей. Ключи сортируются: одинаковые данные
+    дают побайтно одинаковую строку, и префикс промпта остаётся в KV-кэше.
+    """
+    return json.dumps(prune_empty(data), ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class TokenBudget:
+    """
+    num_predict по типу задачи и num_ctx по размеру промпта.
+    num_ctx округляется вверх до ctx_step и не превышает max_ctx; если промпт
+    с ответом туда не помещаются, сокращается num_predict (но не ниже min_predict).
+    """
+
+    def __init__(
+        self,
+        num_predict: Dict[str, int],
+        default_predict: int = 2000,
+        min_ctx: int = 2048,
+        max_ctx: int = 8192,
+        ctx_step: int = 1024,
+        min_predict: int = 256
+    ):
+        self.num_predict = num_predict
+        self.default_predict = default_predict
+        self.min_ctx = min_ctx
+        self.max_ctx = max_ctx
+        self.ctx_step = ctx_step
+        self.min_predict = min_predict
+        # Текущий num_ctx по моделям: только растёт, чтобы не перезапускать раннер
+        self.contexts: Dict[str, int] = {}
+        self.stats: Dict[str, int] = {"calls": 0, "context_growths": 0, "overflows": 0, "predict_trimmed": 0}
+
+    def estimate_messages(self, messages: List[Dict[str, Any]]) -> int:
+        return sum(estimate_tokens(message["content"]) + MESSAGE_OVERHEAD for message in messages)
+
+    def plan(
+        self,
+        model: str,
+        task_type: str,
+        messages: List[Dict[str, Any]]
+    ) -> Dict[str, int]:
+        """Параметры num_predict и num_ctx для одного вызова."""
+        prompt_tokens = self.estimate_messages(messages)
+        PROMPT_TOKENS_ESTIMATED.observe(prompt_tokens, task_type=task_type)
+        self.stats["calls"] += 1
+
+        num_predict = self.num_predict.get(task_type, self.default_predict)
+        if prompt_tokens + num_predict > self.max_ctx:
+            if self.max_ctx - prompt_tokens >= self.min_predict:
+                num_predict = self.max_ctx - prompt_tokens
+                self.stats["predict_trimmed"] += 1
+            else:
+                num_predict = self.min_predict
+                self.stats["overflows"] += 1
+                CONTEXT_OVERFLOWS.inc(task_type=task_type)
+                logger.warning(
+                    f"Промпт ~{prompt_tokens} токенов ({task_type}) не помещается в контекст {self.max_ctx}: "
+                    "Ollama обрежет его начало"
+                )
+
+        needed = math.ceil((prompt_tokens + num_predict) / self.ctx_step) * self.ctx_step
+        needed = min(max(needed, self.min_ctx), self.max_ctx)
+        current = self.contexts.get(model, 0)
+        if needed > current:
+            if current:
+                self.stats["context_growths"] += 1
+                logger.info(f"num_ctx модели {model}: {current} -> {needed} (промпт ~{prompt_tokens} токенов)")
+            self.contexts[model] = needed
+        logger.debug(
+            f"Бюджет {task_type}: промпт ~{prompt_tokens}, num_predict {num_predict}, num_ctx {self.contexts[model]}"
+        )
+        return {"num_predict": num_predict, "num_ctx": self.contexts[model]}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "contexts": dict(self.contexts),
+            "num_predict": dict(self.num_predict),
+            "max_ctx": self.max_ctx,
+        }
@@ -0,0 +1,235 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Векторный индекс на NumPy.
+Общее хранилище семантического кэша и библиотеки компонентов: нормированные
+векторы в одной матрице, записи рядом, вытеснение давно не использованных,
+TTL и сохранение в .npz.
+Матрица выделяется с запасом и растёт удвоением, поэтому вставка не
+копирует все векторы. Файл перезаписывается пачками: после save_every
+изменений или спустя save_interval секунд, а остаток - в flush() при остановке.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class VectorIndex:
+    """
+    Поиск ближайших записей по косинусному сходству.
+    Строки матрицы нормированы, поэтому сходство со всеми записями - одно
+    умножение матрицы на вектор. Векторы другой модели эмбеддингов при
+    загрузке отбрасываются.
+    """
+
+    INITIAL_CAPACITY = 64
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_items: int = 2048,
+        ttl: Optional[float] = None,
+        model: str = "",
+        save_every: int = 32,
+        save_interval: float = 60.0
+    ):
+        self.path = path
+        self.max_items = max_items
+        self.ttl = ttl
+        self.model = model
+        self.save_every = save_every
+        self.save_interval = save_interval
+
+        # Первые len(_entries) строк _vectors заняты, остальные - запас под вставки
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._entries: List[Dict[str, Any]] = []
+        self._keys: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self._saved_at = time.monotonic()
+        self.evictions = 0
+        self.expired = 0
+        self.saves = 0
+
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def normalize(vector: Sequence[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(array))
+        return array / norm if norm else array
+
+    def _is_expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return self.ttl is not None and now - entry["created_at"] >= self.ttl
+
+    def search(
+        self,
+        vector: Sequence[float],
+        k: int = 1,
+        min_similarity: float = -1.0
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        До k ближайших записей со сходством не ниже min_similarity, по убыванию сходства.
+        Найденные записи считаются использованными; устаревшие по TTL удаляются.
+        """
+        query = self.normalize(vector)
+        now = time.time()
+        with self._lock:
+            if not self._entries or self._vectors.shape[1] != query.shape[0]:
+                return []
+            scores = self._vectors[:len(self._entries)] @ query
+            found, stale = [], []
+            for index in np.argsort(-scores):
+                similarity = float(scores[index])
+                if similarity < min_similarity or len(found) == k:
+                    break
+                entry = self._entries[index]
+                if self._is_expired(entry, now):
+                    stale.append(int(index))
+                    continue
+                entry["accessed_at"] = now
+                found.append((entry, similarity))
+            for index in sorted(stale, reverse=True):
+                self._remove_locked(index)
+                self.expired += 1
+            return found
+
+    def _append_locked(self, row: np.ndarray, entry: Dict[str, Any]) -> None:
+        size = len(self._entries)
+        if size == self._vectors.shape[0]:
+            capacity = max(size * 2, self.INITIAL_CAPACITY)
+            grown = np.zeros((capacity, row.shape[0]), dtype=np.float32)
+            grown[:size] = self._vectors[:size]
+            self._vectors = grown
+        self._vectors[size] = row
+        self._entries.append(entry)
+        if entry.get("key") is not None:
+            self._keys[entry["key"]] = size
+
+    def add(self, vector: Sequence[float], entry: Dict[str, Any], key: Optional[str] = None) -> None:
+        """
+        Добавляет запись. Запись с тем же key заменяется - так индекс
+        не копит дубликаты одного компонента.
+        """
+        row = self.normalize(vector)
+        now = time.time()
+        entry = {**entry, "key": key, "created_at": now, "accessed_at": now}
+        with self._lock:
+            if self._vectors.shape[1] != row.shape[0]:
+                # Сменилась размерность (другая модель) - старые векторы несравнимы
+                self._vectors = np.zeros((0, row.shape[0]), dtype=np.float32)
+                self._entries = []
+                self._keys = {}
+            if key is not None and key in self._keys:
+                self._remove_locked(self._keys[key])
+            self._append_locked(row, entry)
+            while len(self._entries) > self.max_items:
+                oldest = min(range(len(self._entries)), key=lambda i: self._entries[i]["accessed_at"])
+                self._remove_locked(oldest)
+                self.evictions += 1
+            self._unsaved += 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Запись по ключу или None."""
+        with self._lock:
+            index = self._keys.get(key)
+            return self._entries[index] if index is not None else None
+
+    def _remove_locked(self, index: int) -> None:
+        # Сдвиг на месте, без новой матрицы: порядок вставки - порядок вытеснения при равном accessed_at
+        size = len(self._entries)
+        self._vectors[index:size - 1] = self._vectors[index + 1:size]
+        removed = self._entries.pop(index)
+        if removed.get("key") is not None:
+            self._keys.pop(removed["key"], None)
+        for position in range(index, size - 1):
+            key = self._entries[position].get("key")
+            if key is not None:
+                self._keys[key] = position
+        self._unsaved += 1
+
+    def save_due(self) -> bool:
+        """Пора ли записать накопленные изменения на диск."""
+        if not self.path or not self._unsaved:
+            return False
+        return self._unsaved >= self.save_every or time.monotonic() - self._saved_at >= self.save_interval
+
+    def flush(self) -> None:
+        """Записывает индекс, если в нём есть несохранённые изменения (при остановке)."""
+        if self.path and self._unsaved:
+            self.save()
+
+    def save(self) -> None:
+        """Атомарно записывает векторы и записи в файл .npz."""
+        if not self.path:
+            return
+        with self._lock:
+            vectors = self._vectors[:len(self._entries)].copy()
+            meta = json.dumps({"model": self.model, "entries": self._entries}, ensure_ascii=False, default=str)
+            unsaved = self._unsaved
+            self._unsaved = 0
+            self._saved_at = time.monotonic()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, vectors=vectors, meta=np.array(meta))
+            os.replace(tmp_path, self.path)
+        except Exception:
+            # Изменения не записаны - сохраним их в следующий раз
+            with self._lock:
+                self._unsaved += unsaved
+            raise
+        self.saves += 1
+
+    def _load(self, path: str) -> None:
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                vectors = data["vectors"].astype(np.float32)
+                meta = json.loads(str(data["meta"]))
+        except Exception as e:
+            logger.warning(f"Векторный индекс не прочитан ({path}): {e}")
+            return
+
+        if self.model and meta.get("model") != self.model:
+            logger.info(f"Индекс {path} построен моделью {meta.get('model')} - начинаем заново")
+            return
+
+        now = time.time()
+        entries = meta.get("entries", [])
+        keep = [i for i, entry in enumerate(entries) if not self._is_expired(entry, now)]
+        # Если лимит уменьшили - оставляем недавно использованные
+        keep = sorted(keep, key=lambda i: entries[i]["accessed_at"])[-self.max_items:] if self.max_items else []
+        keep.sort()
+        if keep:
+            self._vectors = vectors[keep]
+            self._entries = [entries[i] for i in keep]
+            self._keys = {entry["key"]: i for i, entry in enumerate(self._entries) if entry.get("key") is not None}
+        logger.info(f"Векторный индекс открыт: {path} ({len(self._entries)} записей)")
@@ -0,0 +1,107 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Тесты контроля допуска и обратного давления."""
+
+import asyncio
+import json
+
+import pytest
+from unittest.mock import AsyncMock
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.services.admission import AdmissionController, Priority, QueueFullError, QueueTimeoutError
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_immediately():
+    controller = AdmissionController(max_concurrent=1, max_queue=1)
+    running = controller.enqueue()
+    await running.wait()
+    waiting = controller.enqueue()
+    assert waiting.position == 1
+
+    with pytest.raises(QueueFullError) as error:
+        controller.enqueue()
+    assert error.value.queue_position == 2
+    assert error.value.retry_after >= 1
+
+    running.release()
+    await waiting.wait()
+    assert waiting.position == 0
+    waiting.release()
+
+
+@pytest.mark.asyncio
+async def test_interactive_lane_goes_first_without_starving_batch():
+    controller = AdmissionController(max_concurrent=1, batch_every=2)
+    order = []
+
+    async def job(name, priority):
+        async with controller.admit(priority):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    first = asyncio.create_task(job("i0", Priority.INTERACTIVE))
+    await asyncio.sleep(0)
+    tasks = [asyncio.create_task(job("b1", Priority.BATCH))]
+    tasks += [asyncio.create_task(job(f"i{n}", Priority.INTERACTIVE)) for n in range(1, 5)]
+    await asyncio.gather(first, *tasks)
+
+    # Интерактивные раньше пакетных, но каждый второй слот - пакетной полосе
+    assert order == ["i0", "i1", "i2", "b1", "i3", "i4"]
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout():
+    controller = AdmissionController(max_concurrent=1, queue_timeout=0.01)
+    running = controller.enqueue()
+    await running.wait()
+    waiting = controller.enqueue()
+    with pytest.raises(QueueTimeoutError):
+        await waiting.wait()
+    assert controller.snapshot()["queued"]["interactive"] == 0
+    running.release()
+
+
+def test_generate_returns_429_with_retry_after():
+    with TestClient(app) as client:
+        app.state.admission = AdmissionController(max_concurrent=0, max_queue=0)
+        app.state.workflow.run = AsyncMock(return_value={"success": True})
+
+        response = client.post("/api/ai/generate", json={"prompt": "Кнопка"})
+
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert response.json()["detail"]["queue_position"] == 1
+        app.state.workflow.run.assert_not_awaited()
+
+
+def test_stream_takes_slot_only_when_body_is_sent():
+    """Потоковый ответ занимает слот только при отдаче тела; переполнение - событие error."""
+    with TestClient(app) as client:
+        admission = AdmissionController(max_concurrent=0, max_queue=0)
+        app.state.admission = admission
+
+        with client.stream("POST", "/api/ai/generate", json={"prompt": "Кнопка", "stream": True}) as response:
+            assert response.status_code == 200
+            events = [json.loads(line[len("data: "):]) for line in response.iter_lines() if line.startswith("data: ")]
+
+        assert events == [{
+            "event": "error", "detail": events[0]["detail"], "status": 429,
+            "queue_position": 1, "retry_after": events[0]["retry_after"],
+        }]
+        snapshot = admission.snapshot()
+        assert snapshot["running"] == 0 and snapshot["queued"]["interactive"] == 0
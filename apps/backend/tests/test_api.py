@@ -0,0 +1,102 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Тесты HTTP API.
+Проверяет, что сервис и воркфлоу создаются один раз в lifespan и переиспользуются.
+"""
+
+import json
+
+import pytest
+from unittest.mock import AsyncMock
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.agents.workflow import create_workflow
+from src.api.dependencies import get_workflow
+from src.services.ollama_service import OllamaService
+from benchmarks.fake_ollama import FakeOllama
+
+
+def test_shared_workflow_between_requests():
+    """Воркфлоу создаётся в lifespan и общий для всех запросов."""
+    with TestClient(app) as client:
+        workflow = app.state.workflow
+        service = app.state.ollama_service
+        workflow.run = AsyncMock(return_value={"success": True})
+
+        for _ in range(2):
+            response = client.post("/api/ai/generate", json={"prompt": "Кнопка"})
+            assert response.status_code == 200
+            assert response.json()["data"] == {"success": True}
+
+        assert workflow.run.await_count == 2
+        assert app.state.ollama_service is service
+
+    # После остановки клиент закрыт, а ссылки очищены
+    assert service.client.is_closed
+    assert app.state.workflow is None
+
+
+def test_generate_without_lifespan_returns_503():
+    """Без инициализации lifespan эндпоинт не создаёт сервис сам."""
+    client = TestClient(app)
+    response = client.post("/api/ai/generate", json={"prompt": "Кнопка"})
+    assert response.status_code == 503
+
+
+def test_generate_stream_emits_sse_events():
+    """Потоковый режим отдаёт события всех этапов и итоговый результат."""
+    service = OllamaService(transport=FakeOllama().transport())
+    app.dependency_overrides[get_workflow] = lambda: create_workflow(service)
+
+    with TestClient(app) as client:
+        with client.stream("POST", "/api/ai/generate", json={"prompt": "Кнопка", "stream": True}) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            events = [
+                json.loads(line[len("data: "):])
+                for line in response.iter_lines()
+                if line.startswith("data: ")
+            ]
+
+    app.dependency_overrides.clear()
+
+    kinds = [e["event"] for e in events]
+    assert kinds[0] == "stage_start"
+    assert "token" in kinds
+    assert kinds[-1] == "result"
+    stages = {e["stage"] for e in events if e["event"] == "stage_complete"}
+    assert {"analyze_requirements", "design_component", "generate_code", "review_code"} <= stages
+
+
+def test_job_api_roundtrip():
+    """Задача ставится в очередь с 202, результат забирается через long-poll."""
+    with TestClient(app) as client:
+        app.state.workflow.run = AsyncMock(return_value={"success": True})
+
+        response = client.post("/api/ai/jobs", json={"prompt": "Кнопка"})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        status = client.get(f"/api/ai/jobs/{job_id}", params={"wait": 5})
+        assert status.json()["status"] == "succeeded"
+
+        result = client.get(f"/api/ai/jobs/{job_id}/result")
+        assert result.status_code == 200
+        assert result.json()["result"] == {"success": True}
+
+        assert client.get("/api/ai/jobs/missing").status_code == 404
+        assert client.delete("/api/ai/jobs/missing").status_code == 404
@@ -0,0 +1,164 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Тесты пакетной генерации: объединение совпадающих запросов и анализов,
+порядок этапов и API пакета.
+"""
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.agents.batch import create_batch_generator, normalize_prompt
+from src.agents.workflow import create_workflow
+from src.api.dependencies import get_workflow
+from src.main import app
+from src.services.checkpoint_store import InMemoryCheckpointStore
+from src.services.ollama_service import OllamaConfig, OllamaService
+from src.services.semantic_cache import SemanticCache
+from benchmarks.fake_ollama import CANNED_JSON, FakeOllama
+
+
+async def collect(batch, prompts):
+    return [event async for event in batch.stream(prompts)]
+
+
+def test_normalize_prompt():
+    assert normalize_prompt("  Карточка   товара. ") == normalize_prompt("карточка товара")
+
+
+@pytest.mark.asyncio
+async def test_identical_prompts_share_one_pipeline():
+    fake = FakeOllama()
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    batch = create_batch_generator(create_workflow(service), concurrency=2)
+
+    events = await collect(batch, ["Кнопка", "Бейдж", "кнопка."])
+    await service.close()
+
+    items = {e["index"]: e for e in events if e["event"] == "item"}
+    assert sorted(items) == [0, 1, 2]
+    assert items[2]["shared_with"] == 0 and items[2]["data"] is items[0]["data"]
+    assert fake.stage_calls["requirements"] == 2
+    assert events[-1]["pipelines"] == 2 and events[-1]["coalesced"] == 1
+
+
+@pytest.mark.asyncio
+async def test_matching_analyses_coalesce_and_stages_are_grouped():
+    """Разные запросы с одинаковым анализом доводятся одним прогоном; все анализы - до дизайна."""
+    analysis = json.dumps({**CANNED_JSON, "summary": "Кнопка"}, ensure_ascii=False)
+    fake = FakeOllama(responses={"requirements": analysis})
+    order = []
+    analyzed = 0
+    second_analyzed = asyncio.Event()
+    handle = fake.handle
+
+    async def record(request):
+        nonlocal analyzed
+        if request.url.path != "/api/chat":
+            return await handle(request)
+        stage = fake.stage_of(json.loads(request.content))
+        first = not order
+        order.append(stage)
+        if first:
+            # Первый анализ завершается после второго: дизайн всё равно ждёт все анализы
+            await second_analyzed.wait()
+        response = await handle(request)
+        if stage == "requirements":
+            analyzed += 1
+            if analyzed == 1:
+                second_analyzed.set()
+        if stage == "design":
+            assert analyzed == 3
+        return response
+
+    fake.handle = record
+    store = InMemoryCheckpointStore()
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    batch = create_batch_generator(create_workflow(service, store), concurrency=2)
+    events = await collect(batch, ["Кнопка", "Кнопочка", "Button"])
+    await service.close()
+
+    assert events[0] == {"event": "analysis_complete", "items": 3, "unique_prompts": 3, "pipelines": 1}
+    assert order[:3] == ["requirements"] * 3 and "requirements" not in order[3:]
+    assert fake.stage_calls["design"] == 1
+    assert events[-1]["succeeded"] == 3
+    # Чекпоинты объединённых анализов удалены, ведущий прогон удалил свой по завершении
+    assert store._checkpoints == {}
+
+
+@pytest.mark.asyncio
+async def test_failed_analysis_is_not_designed():
+    """Элементы с неудавшимся анализом получают ошибку без дизайна и кода."""
+    fake = FakeOllama()
+    store = InMemoryCheckpointStore()
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    workflow = create_workflow(service, store)
+    process = workflow.requirements_analyzer.process
+
+    async def failing_for_badge(state):
+        if state.user_input == "Бейдж":
+            state.errors.append("Ошибка анализатора: модель вернула мусор")
+            state.requirements_complete = True
+            return state
+        return await process(state)
+
+    workflow.requirements_analyzer.process = failing_for_badge
+    events = await collect(create_batch_generator(workflow), ["Кнопка", "Бейдж"])
+    await service.close()
+
+    errors = [e for e in events if e["event"] == "item_error"]
+    assert [(e["index"], e["detail"]) for e in errors] == [(1, "Ошибка анализатора: модель вернула мусор")]
+    assert fake.stage_calls["design"] == 1
+    assert events[-1]["succeeded"] == 1 and events[-1]["failed"] == 1
+    assert store._checkpoints == {}
+
+
+@pytest.mark.asyncio
+async def test_batch_uses_semantic_cache_like_single_run():
+    """Пакет ищет анализ и дизайн в семантическом кэше, как и одиночный прогон."""
+    fake = FakeOllama()
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    workflow = create_workflow(service, semantic_cache=SemanticCache(threshold=0.9))
+
+    single = await workflow.run("Синяя кнопка с иконкой")
+    events = await collect(create_batch_generator(workflow), ["Кнопка с иконкой, синяя"])
+    await service.close()
+
+    item = next(e for e in events if e["event"] == "item")
+    assert item["data"]["semantic_cache"]["matched_input"] == "Синяя кнопка с иконкой"
+    assert item["data"]["design"] == single["design"]
+    assert fake.stage_calls["requirements"] == 1
+    assert fake.stage_calls["design"] == 1
+
+
+def test_batch_endpoint_without_stream():
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=FakeOllama().transport())
+    app.dependency_overrides[get_workflow] = lambda: create_workflow(service)
+
+    with TestClient(app) as client:
+        response = client.post("/api/ai/generate/batch", json={"prompts": ["Кнопка", "Бейдж"], "stream": False})
+        too_many = client.post("/api/ai/generate/batch", json={"prompts": ["Кнопка"] * 1000})
+
+    app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["success"] is True
+    assert [item["index"] for item in body["data"]["items"]] == [0, 1]
+    assert body["data"]["summary"]["pipelines"] == 2
+    assert too_many.status_code == 422
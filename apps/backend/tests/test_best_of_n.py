@@ -0,0 +1,79 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Тесты режима best-of-N: параллельные кандидаты, статический отбор и
+LLM-ревью только финалистов.
+"""
+
+import pytest
+
+from src.agents.best_of_n import static_rank
+from src.agents.static_review import analyze_tsx
+from src.agents.workflow import create_workflow
+from src.services.ollama_service import OllamaConfig, OllamaService
+from benchmarks.fake_ollama import FakeOllama, CANNED_CODE
+
+
+def test_static_rank_puts_broken_code_last():
+    clean = analyze_tsx(CANNED_CODE)
+    broken = analyze_tsx(CANNED_CODE.replace("}\n\nexport const", "\n\nexport const", 1))
+    conflicting = analyze_tsx(CANNED_CODE.replace("px-4 py-2", "px-4 px-2 py-2"))
+    assert static_rank(clean) > static_rank(conflicting) > static_rank(broken)
+
+
+@pytest.mark.asyncio
+async def test_best_of_n_reviews_finalists_and_picks_best():
+    fake = FakeOllama(candidate_variants=True, review_score=5)
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    workflow = create_workflow(service, code_selection="best_of_n")
+
+    result = await workflow.run("Кнопка")
+    await service.close()
+
+    # Три кандидата за один раунд, сломанный до ревьюера не дошёл
+    assert fake.stage_calls["generation"] == 3
+    assert fake.stage_calls["review"] == 2
+    assert 'type="button"' in result["code"]["content"]
+    assert result["review"]["quality_score"] == 8
+    assert result["iteration_count"] == 1
+    by_index = {c["index"]: c for c in result["candidates"]}
+    assert by_index[1]["selected"] and by_index[1]["temperature"] == 0.7
+    assert by_index[2]["static_verdict"] == "regenerate" and by_index[2]["quality_score"] is None
+
+
+@pytest.mark.asyncio
+async def test_best_of_n_without_candidates_reports_error():
+    """Все кандидаты упали: код не считается сгенерированным, прогон - с ошибкой."""
+    fake = FakeOllama()
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    workflow = create_workflow(service, code_selection="best_of_n")
+
+    async def failing_generate(state, index):
+        raise RuntimeError("модель недоступна")
+
+    workflow.candidate_selector._generate = failing_generate
+    final_state, result = await workflow.run_with_state("Кнопка")
+    await service.close()
+
+    assert final_state.code_generated is False
+    assert result["success"] is False and result["code"] is None and result["review"] is None
+    assert result["errors"][-1].startswith("Ошибка генератора: не получен ни один из 3 кандидатов")
+    assert "review" not in fake.stage_calls
+
+
+def test_unknown_selection_mode_is_rejected():
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=FakeOllama().transport())
+    with pytest.raises(ValueError):
+        create_workflow(service, code_selection="tournament")
@@ -0,0 +1,119 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Тесты чекпоинтов воркфлоу: прерванный прогон продолжается с последнего узла.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.agents.workflow import create_workflow
+from src.core.database import create_db_engine
+from src.services.checkpoint_store import CheckpointRecord, CheckpointStore, InMemoryCheckpointStore, SqlCheckpointStore
+from src.services.ollama_service import OllamaConfig, OllamaService
+from benchmarks.fake_ollama import FakeOllama
+
+
+@pytest.mark.asyncio
+async def test_resume_after_review_failure():
+    """Сбой ревью не теряет анализ, дизайн и код: повторный запуск начинается с ревью."""
+    fake = FakeOllama()
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    store = InMemoryCheckpointStore()
+    workflow = create_workflow(service, store)
+
+    process = workflow.code_reviewer.process
+
+    async def failing_review(state):
+        raise RuntimeError("ревьюер недоступен")
+
+    workflow.code_reviewer.process = failing_review
+    with pytest.raises(RuntimeError):
+        await workflow.run("Кнопка", run_id="run-1")
+
+    checkpoint = await store.load("run-1")
+    assert checkpoint.node == "static_review"
+    assert checkpoint.state["generated_code"]
+    calls_before = dict(fake.stage_calls)
+
+    workflow.code_reviewer.process = process
+    result = await workflow.resume("run-1")
+    await service.close()
+
+    assert result["run_id"] == "run-1"
+    assert result["review"] is not None
+    # Анализ и дизайн не повторялись
+    assert fake.stage_calls["requirements"] == calls_before["requirements"]
+    assert fake.stage_calls["design"] == calls_before["design"]
+    # Успешный прогон не оставляет чекпоинт
+    assert await store.load("run-1") is None
+
+
+@pytest.mark.asyncio
+async def test_resume_unknown_run():
+    workflow = create_workflow(OllamaService(transport=FakeOllama().transport()), InMemoryCheckpointStore())
+    with pytest.raises(KeyError):
+        await workflow.resume("missing")
+    await workflow.ollama_service.close()
+
+
+@pytest.mark.asyncio
+async def test_sql_store_keeps_latest_checkpoint(tmp_path):
+    """На прогон хранится одна строка - последний чекпоинт."""
+    engine = create_db_engine(f"sqlite:///{tmp_path}/checkpoints.sqlite3")
+    store = SqlCheckpointStore(engine)
+
+    await store.save("run-1", "analyze_requirements", {"user_input": "Кнопка"})
+    await store.save("run-1", "design_component", {"user_input": "Кнопка", "design_complete": True})
+
+    checkpoint = await store.load("run-1")
+    assert checkpoint.node == "design_component"
+    assert checkpoint.state["design_complete"] is True
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT COUNT(*) FROM workflow_checkpoints").scalar() == 1
+
+    await store.delete("run-1")
+    assert await store.load("run-1") is None
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_sql_store_purges_expired_checkpoints(tmp_path):
+    """Чекпоинты упавших и брошенных прогонов удаляются по TTL."""
+    engine = create_db_engine(f"sqlite:///{tmp_path}/checkpoints.sqlite3")
+    store = SqlCheckpointStore(engine)
+    await store.save("stale", "design_component", {"user_input": "Кнопка"})
+    await store.save("fresh", "design_component", {"user_input": "Карточка"})
+    with store._sessions() as session:
+        session.get(CheckpointRecord, "stale").updated_at = datetime.now() - timedelta(days=8)
+        session.commit()
+
+    reopened = SqlCheckpointStore(engine, ttl=7 * 24 * 3600)
+    assert await reopened.load("stale") is None
+    assert (await reopened.load("fresh")).node == "design_component"
+    assert reopened.purge_expired() == 0
+    with reopened._sessions() as session:
+        assert [r.run_id for r in session.query(CheckpointRecord)] == ["fresh"]
+    engine.dispose()
+
+
+def test_incomplete_store_fails_at_construction():
+    class LoadOnlyStore(CheckpointStore):
+        async def load(self, run_id):
+            return None
+
+    with pytest.raises(TypeError):
+        LoadOnlyStore()
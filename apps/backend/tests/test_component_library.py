@@ -0,0 +1,74 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Тесты библиотеки принятых компонентов.
+"""
+
+import pytest
+
+from src.agents.base import shared_context
+from src.agents.schemas import AgentState
+from src.agents.workflow import create_workflow
+from src.services.component_library import ComponentLibrary
+from src.services.ollama_service import OllamaConfig, OllamaService
+from benchmarks.fake_ollama import FakeOllama
+
+
+@pytest.mark.asyncio
+async def test_indexes_only_accepted_and_keeps_best():
+    library = ComponentLibrary(min_score=7)
+    assert not await library.add([1.0, 0.0], "Button", ["children"], "v1", score=5)
+    assert await library.add([1.0, 0.0], "Button", ["children"], "v2", score=9)
+    # Тот же компонент с худшей оценкой не вытесняет лучший
+    assert not await library.add([1.0, 0.0], "Button", ["children"], "v3", score=7)
+
+    examples = library.search([0.9, 0.1])
+    assert [e["code"] for e in examples] == ["v2"]
+    assert library.snapshot()["items"] == 1
+
+
+@pytest.mark.asyncio
+async def test_search_is_bounded_by_similarity_and_top_k():
+    library = ComponentLibrary(top_k=1, min_similarity=0.5)
+    await library.add([1.0, 0.0], "Button", [], "button", score=8)
+    await library.add([0.8, 0.6], "IconButton", ["icon"], "icon", score=8)
+
+    assert [e["name"] for e in library.search([1.0, 0.1])] == ["Button"]
+    assert library.search([-0.5, 1.0]) == []
+
+
+def test_examples_are_part_of_shared_context():
+    state = AgentState(user_input="Кнопка", requirements_analysis={"component_type": "Button"})
+    state.context["examples"] = [{"name": "Button", "props": ["children"], "code": "export const Button = 1;"}]
+
+    context = shared_context(state)
+    assert "### Button (пропсы: children)" in context
+    assert context.index("Требования") < context.index("Примеры принятых")
+
+
+@pytest.mark.asyncio
+async def test_accepted_component_becomes_example_for_next_request():
+    """Принятый ревью компонент подставляется в промпты следующего похожего запроса."""
+    fake = FakeOllama(review_score=5, example_fix=True)
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    workflow = create_workflow(service, component_library=ComponentLibrary(min_similarity=0.5))
+
+    first = await workflow.run("Синяя кнопка с иконкой")
+    second = await workflow.run("Кнопка с иконкой")
+    await service.close()
+
+    assert first["examples"] == [] and first["iteration_count"] == 2
+    assert second["examples"] == ["Button"]
+    assert second["iteration_count"] == 1
@@ -0,0 +1,116 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Тесты прогрева моделей и проверок живости и готовности.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.services.circuit_breaker import CircuitState
+from src.services.health import ReadinessProbe, create_model_warmup
+from src.services.ollama_service import OllamaConfig, OllamaError, OllamaService, RetryPolicy, TaskType
+from benchmarks.fake_ollama import FakeOllama
+
+
+@pytest.mark.asyncio
+async def test_warmup_preloads_models_that_fit_and_reports_missing():
+    fake = FakeOllama(max_loaded=1, models=["qwen2.5:3b", "qwen2.5-coder:3b"])
+    config = OllamaConfig(cache_enabled=False, scheduler_enabled=True, scheduler_max_loaded_models=1, keep_alive="10m")
+    service = OllamaService(config, transport=fake.transport())
+    models = service.stage_models() + ["nomic-embed-text"]
+    warmup = create_model_warmup(service, models)
+    try:
+        await warmup.run()
+        assert warmup.state == "done"
+        assert warmup.missing == ["nomic-embed-text"]
+        # В память помещается одна модель - загружается модель первого этапа
+        assert [item["model"] for item in warmup.preloaded] == ["qwen2.5:3b"]
+        assert fake.loaded == ["qwen2.5:3b"] and fake.model_loads == 1
+
+        await service.generate("Анализ", task_type=TaskType.REQUIREMENTS_ANALYSIS)
+        assert fake.model_loads == 1
+    finally:
+        await service.close()
+
+
+@pytest.mark.asyncio
+async def test_readiness_waits_for_warmup_and_caches_probe():
+    fake = FakeOllama()
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    models = service.stage_models()
+    warmup = create_model_warmup(service, models)
+    readiness = ReadinessProbe(service, models, warmup, ttl=60)
+    try:
+        assert (await readiness.check())["ready"] is False  # Прогрев ещё не начат
+        await warmup.run()
+        readiness._checked_at = -readiness.ttl  # Кэш устарел
+
+        requests = fake.requests
+        results = await asyncio.gather(*(readiness.check() for _ in range(10)))
+        assert all(result["ready"] for result in results)
+        assert fake.requests - requests == 2  # Одна проба: /api/tags и /api/ps
+        assert readiness.stats["probes"] == 2
+    finally:
+        await service.close()
+
+
+def test_health_endpoints():
+    fake = FakeOllama(models=["qwen2.5:3b"])
+    with TestClient(app) as client:
+        assert client.get("/health/live").json() == {"status": "alive"}
+
+        service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+        app.state.readiness = ReadinessProbe(service, service.stage_models())
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json()["missing_models"] == ["qwen2.5-coder:3b"]
+
+        # Без модели эмбеддингов генерация работает - это не повод отвечать 503
+        fake.models = ["qwen2.5:3b", "qwen2.5-coder:3b"]
+        app.state.readiness = ReadinessProbe(service, service.stage_models(), optional_models=["nomic-embed-text"])
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+        assert response.json()["missing_models"] == []
+        assert response.json()["missing_optional_models"] == ["nomic-embed-text"]
+
+
+@pytest.mark.asyncio
+async def test_readiness_probe_does_not_reset_circuit_breaker():
+    """Узел отвечает на /api/tags, но падает на вызовах - частые пробы не мешают его вывести."""
+    fake = FakeOllama()
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        if request.url.path in ("/api/chat", "/api/generate"):
+            return httpx.Response(500, json={"error": "out of memory"})
+        return await fake.handle(request)
+
+    config = OllamaConfig(cache_enabled=False, max_failures=3, retry=RetryPolicy(attempts=1), retry_policies={})
+    service = OllamaService(config, transport=httpx.MockTransport(handle))
+    readiness = ReadinessProbe(service, service.stage_models(), ttl=0)
+    host = service.pool.hosts[0]
+    try:
+        for _ in range(3):
+            assert (await readiness.check())["reachable_hosts"] == [host.url]
+            with pytest.raises(OllamaError):
+                await service.generate("Код", task_type=TaskType.CODE_GENERATION)
+        assert host.breaker.state is CircuitState.OPEN
+        assert (await readiness.check())["ready"] is False
+    finally:
+        await service.close()
@@ -0,0 +1,121 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Тесты пула узлов Ollama: выбор по загруженной модели, автомат защиты узла
+и возвращение узла после успешной пробы.
+"""
+
+import httpx
+import pytest
+
+from src.agents.workflow import create_workflow
+from src.services.circuit_breaker import CircuitOpenError
+from src.services.ollama_service import OllamaConfig, OllamaService, RetryPolicy, TaskType
+from benchmarks.fake_ollama import FakeOllama
+
+URLS = ["http://node-a:11434", "http://node-b:11434", "http://node-c:11434"]
+CODER = "qwen2.5-coder:3b"
+
+
+def pool_transport(fakes: dict, down: set) -> httpx.MockTransport:
+    """Несколько поддельных узлов за одним транспортом; узлы из down не отвечают."""
+    async def handle(request: httpx.Request) -> httpx.Response:
+        if request.url.host in down:
+            raise httpx.ConnectError("connection refused", request=request)
+        return await fakes[request.url.host].handle(request)
+
+    return httpx.MockTransport(handle)
+
+
+def create_service(fakes: dict, down: set = frozenset(), **config) -> OllamaService:
+    return OllamaService(
+        OllamaConfig(base_urls=URLS, cache_enabled=False, health_interval=0, **config),
+        transport=pool_transport(fakes, down),
+    )
+
+
+@pytest.mark.asyncio
+async def test_prefers_node_with_model_loaded():
+    fakes = {"node-a": FakeOllama(), "node-b": FakeOllama(), "node-c": FakeOllama()}
+    fakes["node-b"].loaded = [CODER]
+    fakes["node-c"].models = ["qwen2.5:3b"]
+    service = create_service(fakes)
+    await service.start()
+
+    await service.generate("Код", task_type=TaskType.CODE_GENERATION)
+    assert fakes["node-b"].stage_calls and not fakes["node-a"].stage_calls
+
+    # Узел без модели в /api/tags не выбирается; свободный тёплый - предпочтительнее
+    hosts = {host.url: host for host in service.pool.hosts}
+    hosts[URLS[1]].outstanding = 2
+    assert service.pool.select(CODER).url == URLS[1]
+    hosts[URLS[1]].outstanding = 3
+    assert service.pool.select(CODER).url == URLS[0]
+    hosts[URLS[0]].outstanding = hosts[URLS[1]].outstanding = 10
+    assert service.pool.select(CODER).url != URLS[2]
+    await service.close()
+
+
+@pytest.mark.asyncio
+async def test_ejects_failing_node_and_readmits_after_probe():
+    fakes = {"node-a": FakeOllama(), "node-b": FakeOllama(), "node-c": FakeOllama()}
+    down = {"node-a"}
+    service = create_service(fakes, down, max_failures=2, eject_seconds=60)
+    node_a = service.pool.hosts[0]
+
+    assert await service.pool.probe(node_a) is False
+    assert node_a.healthy is True
+    assert await service.pool.probe(node_a) is False
+    assert node_a.healthy is False and node_a.stats["ejections"] == 1
+
+    for _ in range(3):
+        await service.generate("Код", task_type=TaskType.CODE_GENERATION)
+    assert not fakes["node-a"].stage_calls
+
+    # Узел поднялся, но автомат разомкнут ещё eject_seconds - проба его не возвращает
+    down.clear()
+    assert await service.pool.probe(node_a) is True
+    assert node_a.healthy is False
+
+    node_a.breaker.reset_timeout = 0
+    assert await service.pool.probe(node_a) is True
+    assert node_a.healthy is True
+    assert service.pool.snapshot()["healthy"] == 3
+    await service.close()
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_and_workflow_skips_llm_stages():
+    requests = []
+    transport = pool_transport({}, {"localhost"})
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        return await transport.handle_async_request(request)
+
+    service = OllamaService(
+        OllamaConfig(cache_enabled=False, max_failures=2, eject_seconds=60, retry=RetryPolicy(base_delay=0)),
+        transport=httpx.MockTransport(handle),
+    )
+    with pytest.raises(Exception):
+        await service.generate("Код")
+    assert len(requests) == 2 and service.available is False
+
+    with pytest.raises(CircuitOpenError):
+        await service.generate("Код")
+    result = await create_workflow(service).run("Кнопка")
+    assert len(requests) == 2
+    assert any("пропущен" in error for error in result["errors"])
+    await service.close()
@@ -0,0 +1,160 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Тесты очереди фоновых задач генерации.
+"""
+
+import asyncio
+
+import pytest
+
+from src.core.database import create_db_engine
+from src.services.admission import AdmissionController, Priority
+from src.services.job_runner import JobRunner
+from src.services.job_store import JobStatus, JobStore
+
+
+class FakeWorkflow:
+    """Воркфлоу-заглушка: возвращает промпт или падает."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = []
+
+    async def run(self, prompt, run_id=None):
+        self.calls.append(prompt)
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("ollama недоступна")
+        return {"success": True, "prompt": prompt}
+
+
+@pytest.fixture
+def store(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path}/jobs.sqlite3")
+    yield JobStore(engine)
+    engine.dispose()
+
+
+def test_claim_next_prefers_interactive(store):
+    """Интерактивные задачи забираются раньше пакетных."""
+    batch = store.create("пакетная", Priority.BATCH.value)
+    interactive = store.create("интерактивная", Priority.INTERACTIVE.value)
+
+    assert store.claim_next().id == interactive.id
+    assert store.claim_next().id == batch.id
+    assert store.claim_next() is None
+
+
+def test_requeue_only_expired_leases(store):
+    """Задача живого владельца не перехватывается; с истёкшей арендой - возвращается в очередь."""
+    job = store.create("кнопка")
+    store.claim_next("процесс-1")
+    assert store.get(job.id).status == JobStatus.RUNNING.value
+    assert store.requeue_expired() == 0  # Аренда процесса-1 ещё действует
+
+    store.lease_seconds = 0
+    assert store.renew_lease(job.id, "процесс-1")
+    assert not store.renew_lease(job.id, "процесс-2")
+    assert store.requeue_expired() == 1
+    assert store.get(job.id).status == JobStatus.QUEUED.value
+    # Аренда потеряна - запоздавший результат прежнего владельца не записывается
+    assert not store.finish(job.id, JobStatus.SUCCEEDED, {"ok": True}, owner="процесс-1")
+
+
+def test_job_fails_after_max_attempts(store):
+    """Задача, которая снова и снова роняет воркер, не перезапускается бесконечно."""
+    store.lease_seconds = 0
+    store.max_attempts = 2
+    job = store.create("кнопка")
+    for _ in range(2):
+        store.claim_next("процесс")
+        store.requeue_expired()
+
+    job = store.get(job.id)
+    assert job.status == JobStatus.FAILED.value and job.attempts == 2
+    assert store.claim_next("процесс") is None
+
+
+def test_cancel_only_queued(store):
+    job = store.create("кнопка")
+    assert store.cancel(job.id)
+    assert store.get(job.id).status == JobStatus.CANCELLED.value
+    assert store.claim_next() is None
+    assert not store.cancel(job.id)
+
+
+@pytest.mark.asyncio
+async def test_runner_executes_and_long_polls(store):
+    """Задача выполняется в фоне, а wait возвращает её сразу после завершения."""
+    workflow = FakeWorkflow()
+    runner = JobRunner(store, workflow, admission=AdmissionController(max_concurrent=1), workers=2)
+    await runner.start()
+    try:
+        jobs = [await runner.submit(f"компонент {i}") for i in range(3)]
+        results = [await runner.wait(job.id, timeout=5) for job in jobs]
+    finally:
+        await runner.stop()
+
+    assert [job.status for job in results] == [JobStatus.SUCCEEDED.value] * 3
+    assert results[0].to_dict()["result"]["prompt"] == "компонент 0"
+    assert sorted(workflow.calls) == [f"компонент {i}" for i in range(3)]
+
+
+@pytest.mark.asyncio
+async def test_runner_records_failure(store):
+    runner = JobRunner(store, FakeWorkflow(fail=True), workers=1)
+    await runner.start()
+    try:
+        job = await runner.submit("кнопка")
+        job = await runner.wait(job.id, timeout=5)
+    finally:
+        await runner.stop()
+
+    assert job.status == JobStatus.FAILED.value
+    assert "ollama" in job.to_dict()["error"]
+
+
+@pytest.mark.asyncio
+async def test_runner_resumes_after_restart(store):
+    """Задача, начатая до «падения» процесса, выполняется после истечения его аренды."""
+    job = store.create("кнопка")
+    store.lease_seconds = 0
+    store.claim_next("упавший-процесс")
+    store.lease_seconds = 60
+
+    runner = JobRunner(store, FakeWorkflow(), workers=1)
+    await runner.start()
+    try:
+        job = await runner.wait(job.id, timeout=5)
+    finally:
+        await runner.stop()
+
+    assert job.status == JobStatus.SUCCEEDED.value
+
+
+@pytest.mark.asyncio
+async def test_wait_leaves_no_events_behind(store):
+    """Ожидание неизвестной, завершённой или не дождавшейся задачи не копит события."""
+    runner = JobRunner(store, FakeWorkflow(), workers=1)
+    queued = store.create("кнопка")
+    done = store.create("карточка")
+    store.cancel(done.id)
+
+    assert await runner.wait("нет-такой", timeout=0.05) is None
+    assert (await runner.wait(done.id, timeout=0.05)).status == JobStatus.CANCELLED.value
+    waits = [runner.wait(queued.id, timeout=0.05) for _ in range(2)]
+    assert all(job.status == JobStatus.QUEUED.value for job in await asyncio.gather(*waits))
+    assert runner._finished == {} and runner._waiters == {}
@@ -0,0 +1,75 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Тесты инкрементального разбора JSON и обрыва генерации после закрытия объекта.
+"""
+
+import json
+
+import pytest
+
+from src.agents.schemas import CodeReview
+from src.services.json_stream import JsonStreamParser
+from src.services.ollama_service import OllamaConfig, OllamaService, TaskType
+from benchmarks.fake_ollama import CANNED_JSON, FakeOllama
+
+
+def test_parser_skips_prose_and_reports_fields_as_they_close():
+    text = 'Вот ответ:\n```json\n{"name": "a}{,\\"", "props": [1, {"x": [2]}], "score": 7}\n```\nЕщё текст'
+    parser = JsonStreamParser()
+    fields = []
+    for i in range(0, len(text), 3):
+        fields += parser.feed(text[i:i + 3])
+        if parser.complete:
+            break
+    assert fields == [("name", 'a}{,"'), ("props", [1, {"x": [2]}]), ("score", 7)]
+    assert json.loads(parser.document) == dict(fields)
+    # Поле отдаётся, как только за ним пришла запятая - до конца объекта
+    partial = JsonStreamParser()
+    assert partial.feed('{"component_type": "Button", "pro') == [("component_type", "Button")]
+    assert not partial.complete
+
+
+@pytest.mark.asyncio
+async def test_structured_call_stops_after_object_and_publishes_fields():
+    fake = FakeOllama(json_tail=200)
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    fields = []
+
+    async def on_field(name, value):
+        fields.append(name)
+
+    try:
+        review = await service.generate_structured("Проверь", CodeReview, task_type=TaskType.CODE_REVIEW, on_field=on_field)
+        assert review.quality_score == 8
+        assert fields[0] == "component_type" and "quality_score" in fields
+        # Из 200 токенов хвоста прочитаны только несколько до обрыва
+        words = len(json.dumps(CANNED_JSON, ensure_ascii=False).split(" "))
+        assert sum(fake.stage_streamed.values()) < words + 10
+    finally:
+        await service.close()
+
+
+@pytest.mark.asyncio
+async def test_finished_json_keeps_ollama_usage():
+    fake = FakeOllama()
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    try:
+        result = await service.generate_json("Проверь", task_type=TaskType.CODE_REVIEW, schema=CodeReview)
+        assert result["quality_score"] == 8
+        # Итоговый фрагмент пришёл в пределах JSON_STOP_GRACE - счётчики Ollama учтены
+        assert service.usage_snapshot()[service.config.model_default]["prompt_eval_count"] > 0
+    finally:
+        await service.close()
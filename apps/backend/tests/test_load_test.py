@@ -0,0 +1,37 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Тесты расчётов нагрузочного теста: перцентили и сравнение с базой.
+"""
+
+from benchmarks.load_test import compare, percentile
+
+
+def test_percentile_interpolates():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.5
+    assert percentile(values, 99) == 99.01
+    assert percentile([], 95) == 0.0
+
+
+def test_compare_reports_regressions_beyond_tolerance():
+    baseline = {"p50_ms": 100.0, "p95_ms": 200.0, "p99_ms": 300.0, "throughput_rps": 10.0}
+    current = {
+        "p50_ms": 110.0, "p95_ms": 260.0, "p99_ms": 300.0, "throughput_rps": 7.0,
+        "requests": 10, "succeeded": 10, "statuses": {"200": 10},
+    }
+
+    regressions = compare(current, baseline, tolerance=0.2)
+    assert [line.split(":")[0] for line in regressions] == ["p95_ms", "throughput_rps"]
@@ -0,0 +1,83 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Тесты метрик: формат Prometheus, метрики вызовов Ollama и разбивка времени прогона.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.agents.workflow import create_workflow
+from src.core.metrics import MetricsRegistry
+from src.main import app
+from src.services.ollama_service import (
+    OLLAMA_COMPLETION_TOKENS,
+    OLLAMA_MODEL_LOADS,
+    OllamaConfig,
+    OllamaService,
+)
+from benchmarks.fake_ollama import FakeOllama
+
+
+def test_render_prometheus_text_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("demo_requests_total", "Запросы", ["model"])
+    latency = registry.histogram("demo_seconds", "Длительность", buckets=(0.1, 1.0))
+    requests.inc(model='qwen "3b"')
+    latency.observe(0.05)
+    latency.observe(0.5)
+
+    text = registry.render()
+    assert "# TYPE demo_requests_total counter" in text
+    assert 'demo_requests_total{model="qwen \\"3b\\""} 1.0' in text
+    assert 'demo_seconds_bucket{le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{le="+Inf"} 2' in text
+    assert "demo_seconds_count 2" in text
+    # Повторная регистрация отдаёт ту же метрику
+    assert registry.counter("demo_requests_total", "Запросы", ["model"]) is requests
+
+
+@pytest.mark.asyncio
+async def test_workflow_records_call_metrics_and_stage_timings():
+    fake = FakeOllama(load_delay=0.15)
+    config = OllamaConfig(cache_enabled=False, scheduler_enabled=False)
+    service = OllamaService(config, transport=fake.transport())
+    model = config.model_default
+    tokens_before = OLLAMA_COMPLETION_TOKENS.value(model=model, task_type="code_generation", agent="code_generator")
+    loads_before = OLLAMA_MODEL_LOADS.value(model=model)
+
+    result = await create_workflow(service).run("Кнопка")
+    await service.close()
+
+    timings = result["timings"]
+    assert [entry["stage"] for entry in timings["stages"]][:3] == [
+        "analyze_requirements", "design_component", "generate_code"
+    ]
+    assert timings["total_ms"] >= sum(timings["by_stage"].values())
+    assert result["usage"]["load_duration_ms"] > 0
+    assert OLLAMA_COMPLETION_TOKENS.value(
+        model=model, task_type="code_generation", agent="code_generator"
+    ) > tokens_before
+    assert OLLAMA_MODEL_LOADS.value(model=model) > loads_before
+
+
+def test_metrics_endpoint():
+    with TestClient(app) as client:
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE workflow_stage_duration_seconds histogram" in response.text
+    assert "admission_running 0.0" in response.text
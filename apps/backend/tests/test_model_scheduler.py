@@ -0,0 +1,114 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Тесты планировщика моделей."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from src.services.model_scheduler import ModelScheduler
+from src.services.ollama_service import OllamaConfig, OllamaService, TaskType
+from benchmarks.fake_ollama import FakeOllama
+
+
+def make_client(loaded):
+    unloaded = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/ps":
+            return httpx.Response(200, json={"models": [{"name": m} for m in loaded]})
+        unloaded.append(request.content)
+        return httpx.Response(200, json={"done": True})
+
+    client = httpx.AsyncClient(base_url="http://ollama", transport=httpx.MockTransport(handler))
+    return client, unloaded
+
+
+@pytest.mark.asyncio
+async def test_calls_are_grouped_by_model():
+    """Вперемешку пришедшие вызовы выполняются группами по модели."""
+    client, _ = make_client(loaded=[])
+    scheduler = ModelScheduler(client, max_loaded_models=1, max_parallel=1)
+    order = []
+
+    async def call(model):
+        async with scheduler.slot(model):
+            order.append(model)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(call(m) for m in ["coder", "russian", "coder", "russian", "coder"]))
+
+    assert order == ["coder", "coder", "coder", "russian", "russian"]
+    assert scheduler.stats["switches"] == 2
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_batch_limit_prevents_starvation():
+    """После max_batch выдач подряд модель уступает очередь другой."""
+    client, _ = make_client(loaded=[])
+    scheduler = ModelScheduler(client, max_loaded_models=1, max_parallel=1, max_batch=2)
+    order = []
+
+    async def call(model):
+        async with scheduler.slot(model):
+            order.append(model)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(call(m) for m in ["coder", "russian", "coder", "coder", "coder"]))
+
+    assert order[:3] == ["coder", "coder", "russian"]
+
+
+@pytest.mark.asyncio
+async def test_unloads_unneeded_model_on_switch():
+    """При переключении ненужная модель выгружается явно через keep_alive=0."""
+    client, unloaded = make_client(loaded=["russian"])
+    scheduler = ModelScheduler(client)
+
+    async with scheduler.slot("coder"):
+        pass
+
+    assert len(unloaded) == 1
+    assert b'"keep_alive": 0' in unloaded[0] or b'"keep_alive":0' in unloaded[0]
+    assert scheduler.stats["model_loads"] == 1
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_embedding_model_does_not_evict_stage_model():
+    """Эмбеддинг перед вызовом этапа не выгружает резидентную модель этапа."""
+    fake = FakeOllama(max_loaded=2)
+    fake.loaded = ["qwen2.5:3b"]
+    unloads = []
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/generate" and json.loads(request.content).get("keep_alive") == 0:
+            unloads.append(json.loads(request.content)["model"])
+        return await fake.handle(request)
+
+    config = OllamaConfig(cache_enabled=False, scheduler_enabled=True, scheduler_max_loaded_models=1)
+    service = OllamaService(config, transport=httpx.MockTransport(handle))
+    try:
+        await service.embed("Кнопка с иконкой")
+        await service.generate("Анализ", task_type=TaskType.REQUIREMENTS_ANALYSIS)
+    finally:
+        await service.close()
+
+    assert unloads == []
+    assert fake.model_loads == 0
+    assert service.pool.hosts[0].scheduler.stats["pinned_calls"] == 1
@@ -16,14 +16,200 @@
 
 import pytest
 import asyncio
-from src.services.ollama_service import OllamaService
+import json
+
+import httpx
+
+from src.agents.schemas import CodeReview
+from src.services.ollama_service import (
+    OllamaError, OllamaService, OllamaConfig, RetryPolicy, StructuredOutputError, TaskType, usage_scope
+)
+from benchmarks.fake_ollama import FakeOllama
 
 @pytest.mark.asyncio
 async def test_generate_code():
-    service = OllamaService()
+    fake = FakeOllama()
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
     result = await service.generate(
         "Создай простую функцию приветствия",
         task_type="code_generation"
     )
     assert result is not None
-    await service.close()
\ No newline at end of file
+    assert fake.stage_calls == {"other": 1}
+    await service.close()
+
+
+@pytest.mark.asyncio
+async def test_fake_ollama_serves_tags_and_canned_stages_over_asgi():
+    """Поддельный сервер работает и как ASGI-приложение: /api/tags и заготовки этапов."""
+    fake = FakeOllama(responses={"review": "{}"}, models=["qwen2.5-coder:3b"])
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=fake), base_url="http://fake") as client:
+        tags = (await client.get("/api/tags")).json()
+        chat = (await client.post("/api/chat", json={
+            "model": "qwen2.5-coder:3b",
+            "messages": [{"role": "system", "content": "Ты эксперт по ревью"}, {"role": "user", "content": "код"}],
+            "stream": False,
+        })).json()
+
+    assert [m["name"] for m in tags["models"]] == ["qwen2.5-coder:3b"]
+    assert chat["message"]["content"] == "{}"
+
+
+@pytest.mark.asyncio
+async def test_generate_stream_reads_ndjson():
+    """Потоковая генерация склеивает NDJSON-фрагменты и вызывает колбэк на каждый."""
+    chunks = ["const ", "Button", " = 1;"]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        assert payload["stream"] is True
+        lines = [
+            json.dumps({"message": {"role": "assistant", "content": c}, "done": False})
+            for c in chunks
+        ]
+        lines.append(json.dumps({"done": True, "eval_count": 3}))
+        return httpx.Response(200, content="\n".join(lines).encode())
+
+    service = OllamaService(transport=httpx.MockTransport(handler))
+    received = []
+
+    async def on_token(token):
+        received.append(token)
+
+    result = await service.generate(
+        "Создай константу", task_type=TaskType.CODE_GENERATION, on_token=on_token
+    )
+
+    assert result == "const Button = 1;"
+    assert received == chunks
+    await service.close()
+
+
+
+@pytest.mark.asyncio
+async def test_generate_structured_sends_schema_and_validates():
+    """JSON Schema уходит в format, ответ валидируется в типизированный объект."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        assert payload["format"]["properties"]["quality_score"]["type"] == "integer"
+        content = json.dumps({"quality_score": 8, "issues": [{"description": "Нет aria-label"}]})
+        return httpx.Response(200, json={"message": {"role": "assistant", "content": content}, "done": True})
+
+    service = OllamaService(transport=httpx.MockTransport(handler))
+    review = await service.generate_structured("Проведи ревью", CodeReview, task_type=TaskType.CODE_REVIEW)
+
+    assert isinstance(review, CodeReview)
+    assert review.quality_score == 8
+    assert review.issues[0].severity == "minor"
+    assert service.json_stats["parse_failures"] == 0
+    await service.close()
+
+
+@pytest.mark.asyncio
+async def test_generate_structured_retries_then_raises():
+    """Неразбираемый ответ повторяется, затем выбрасывается StructuredOutputError."""
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(200, json={"message": {"role": "assistant", "content": "Оценка: 8/10"}, "done": True})
+
+    service = OllamaService(OllamaConfig(structured_retries=1), transport=httpx.MockTransport(handler))
+    with pytest.raises(StructuredOutputError):
+        await service.generate_json("Проведи ревью", task_type=TaskType.CODE_REVIEW, schema=CodeReview)
+
+    assert calls == 2
+    assert service.json_stats == {"requests": 2, "parse_failures": 2, "retries": 1, "failed": 1}
+    await service.close()
+
+
+@pytest.mark.asyncio
+async def test_shared_context_goes_first_and_usage_is_recorded():
+    """Общий контекст - первое системное сообщение; prompt_eval учитывается по моделям и в области прогона."""
+    payloads = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payloads.append(json.loads(request.content))
+        return httpx.Response(200, json={
+            "message": {"role": "assistant", "content": "ok"},
+            "done": True,
+            "prompt_eval_count": 12,
+            "prompt_eval_duration": 6_000_000,
+            "eval_count": 2,
+        })
+
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=httpx.MockTransport(handler))
+    with usage_scope() as usage:
+        await service.generate("Задача", system_prompt="Роль", shared_context="Контекст")
+
+    assert [m["content"] for m in payloads[0]["messages"]] == ["Контекст", "Роль", "Задача"]
+    assert usage["calls"] == 1 and usage["prompt_eval_count"] == 12
+    assert usage["prompt_eval_duration_ms"] == 6.0
+    model = payloads[0]["model"]
+    assert service.usage_snapshot()[model]["eval_count"] == 2
+    await service.close()
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors_by_task_type_policy():
+    fake = FakeOllama()
+    statuses = []
+
+    async def handler(request):
+        # Первый вызов каждого типа - 503, затем ответ; 404 не повторяется
+        if b"missing" in request.content:
+            statuses.append(404)
+            return httpx.Response(404, json={"error": "model not found"})
+        if len(statuses) % 2 == 0:
+            statuses.append(503)
+            return httpx.Response(503, json={"error": "busy"})
+        statuses.append(200)
+        return await fake.handle(request)
+
+    config = OllamaConfig(
+        cache_enabled=False,
+        retry=RetryPolicy(attempts=3, base_delay=0),
+        retry_policies={"code_generation": RetryPolicy(attempts=1)},
+    )
+    service = OllamaService(config, transport=httpx.MockTransport(handler))
+
+    assert await service.generate("Анализ", task_type=TaskType.REQUIREMENTS_ANALYSIS)
+    assert statuses == [503, 200]
+
+    with pytest.raises(OllamaError):
+        await service.generate("Код", task_type=TaskType.CODE_GENERATION)
+    assert statuses == [503, 200, 503]
+
+    with pytest.raises(OllamaError):
+        await service.generate("missing", task_type=TaskType.CODE_REVIEW)
+    assert statuses[-1] == 404 and len(statuses) == 4
+    await service.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_call_is_hedged_to_another_node():
+    slow, fast = FakeOllama(latency=2.0), FakeOllama()
+    nodes = {"node-a": slow, "node-b": fast}
+
+    async def handler(request):
+        return await nodes[request.url.host].handle(request)
+
+    config = OllamaConfig(
+        base_urls=["http://node-a:11434", "http://node-b:11434"],
+        cache_enabled=False,
+        hedge_enabled=True,
+        hedge_min_samples=5,
+        hedge_min_delay=0.05,
+    )
+    service = OllamaService(config, transport=httpx.MockTransport(handler))
+    service._latencies[(config.model_default, TaskType.CODE_REVIEW)] = [0.01] * 5
+
+    started = asyncio.get_running_loop().time()
+    assert await service.generate("Ревью", task_type=TaskType.CODE_REVIEW)
+    assert asyncio.get_running_loop().time() - started < 1.0
+    assert slow.stage_calls and fast.stage_calls
+    # Проигравший вызов отменён - узел свободен
+    await asyncio.sleep(0)
+    assert all(host.outstanding == 0 for host in service.pool.hosts)
+    await service.close()
@@ -0,0 +1,124 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Тесты применения правок и режима улучшения кода правками.
+"""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from src.agents.code_generator import CodeGeneratorAgent
+from src.agents.patching import PatchError, apply_patch
+from src.agents.schemas import AgentState
+
+CODE = """export const Button = ({ children }) => (
+  <button className="px-4 py-2">{children}</button>
+);
+
+export default Button;
+"""
+
+
+def test_search_replace_block():
+    patch = """```
+<<<<<<< SEARCH
+  <button className="px-4 py-2">{children}</button>
+=======
+  <button type="button" className="px-4 py-2">{children}</button>
+>>>>>>> REPLACE
+```"""
+    patched = apply_patch(CODE, patch)
+    assert '<button type="button"' in patched
+    assert patched.endswith("export default Button;\n")
+
+
+def test_search_replace_ignores_indentation():
+    patch = """<<<<<<< SEARCH
+<button className="px-4 py-2">{children}</button>
+=======
+  <button className="px-4 py-2" disabled>{children}</button>
+>>>>>>> REPLACE"""
+    assert "disabled" in apply_patch(CODE, patch)
+
+
+def test_unified_diff_with_wrong_line_numbers():
+    """Номера строк в заголовке - только подсказка: hunk ищется по содержимому."""
+    patch = """--- a/Button.tsx
++++ b/Button.tsx
+@@ -40,3 +40,3 @@
+ export const Button = ({ children }) => (
+-  <button className="px-4 py-2">{children}</button>
++  <button className="px-4 py-2 rounded">{children}</button>
+ );
+"""
+    patched = apply_patch(CODE, patch)
+    assert 'className="px-4 py-2 rounded"' in patched
+    assert patched.count("<button") == 1
+
+
+@pytest.mark.parametrize("patch", [
+    "Код выглядит хорошо.",
+    "<<<<<<< SEARCH\nнет такой строки\n=======\nзамена\n>>>>>>> REPLACE",
+    "<<<<<<< SEARCH\n);\n=======\n)\n>>>>>>> REPLACE",
+])
+def test_invalid_patch_raises(patch):
+    code = CODE + "const x = (\n);\n"
+    with pytest.raises(PatchError):
+        apply_patch(code, patch)
+
+
+@pytest.mark.asyncio
+async def test_generator_patches_with_review_findings():
+    """В раунде улучшения модель получает код и замечания, а не дизайн."""
+    service = AsyncMock()
+    service.generate.return_value = (
+        "<<<<<<< SEARCH\n  <button className=\"px-4 py-2\">{children}</button>\n=======\n"
+        "  <button type=\"button\" className=\"px-4 py-2\">{children}</button>\n>>>>>>> REPLACE"
+    )
+    agent = CodeGeneratorAgent(service, patch_mode=True)
+    state = AgentState(
+        user_input="Кнопка",
+        generated_code=CODE,
+        iteration_count=1,
+        code_review={"quality_score": 5, "issues": [{"severity": "major", "description": "Нет type"}]},
+    )
+
+    state = await agent.process(state)
+
+    kwargs = service.generate.await_args.kwargs
+    assert CODE in kwargs["shared_context"] and "Нет type" in kwargs["prompt"]
+    assert '<button type="button"' in state.generated_code
+    assert state.iteration_count == 2
+    assert agent.stats["patched"] == 1
+
+
+@pytest.mark.asyncio
+async def test_generator_falls_back_to_full_generation():
+    service = AsyncMock()
+    service.generate.side_effect = ["без правок", "export const Button = () => null;"]
+    agent = CodeGeneratorAgent(service, patch_mode=True)
+    state = AgentState(
+        user_input="Кнопка",
+        generated_code=CODE,
+        component_design={"name": "Button"},
+        code_review={"quality_score": 5, "suggestions": ["Добавить type"]},
+    )
+
+    state = await agent.process(state)
+
+    assert state.generated_code == "export const Button = () => null;"
+    assert agent.stats == {"generated": 1, "patched": 0, "patch_failures": 1}
+    # Полная генерация тоже получает замечания ревью
+    assert "Добавить type" in service.generate.await_args.kwargs["prompt"]
@@ -0,0 +1,79 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Тесты для агента анализа требований.
+Проверяет режим одного структурированного вызова и прежний режим из двух.
+"""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from src.agents.requirements_analyzer import create_requirements_analyzer
+from src.agents.schemas import AgentState
+
+ANALYSIS = {
+    "component_type": "Button",
+    "purpose": "Интерактивная кнопка",
+    "features": ["Текст", "Иконка"],
+    "styling_requirements": ["Современный стиль"],
+    "technical_requirements": ["React", "TypeScript"],
+    "accessibility_notes": ["Поддержка клавиатуры"],
+    "dependencies": []
+}
+
+
+@pytest.mark.asyncio
+async def test_single_call_returns_summary_and_analysis():
+    """Один вызов возвращает и текстовое резюме, и структуру."""
+    mock_ollama = AsyncMock()
+    mock_ollama.generate_json.return_value = {"summary": "Нужна кнопка с иконкой.", **ANALYSIS}
+
+    analyzer = create_requirements_analyzer(mock_ollama, single_call=True)
+    result = await analyzer.process(AgentState(user_input="Создай кнопку с иконкой"))
+
+    assert result.requirements == "Нужна кнопка с иконкой."
+    assert result.requirements_analysis == ANALYSIS
+    assert result.requirements_complete == True
+    mock_ollama.generate_json.assert_called_once()
+    mock_ollama.generate.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_single_call_builds_summary_when_missing():
+    """Если модель не вернула summary, резюме собирается из структуры."""
+    mock_ollama = AsyncMock()
+    mock_ollama.generate_json.return_value = dict(ANALYSIS)
+
+    analyzer = create_requirements_analyzer(mock_ollama, single_call=True)
+    result = await analyzer.process(AgentState(user_input="Создай кнопку"))
+
+    assert "Button" in result.requirements
+    assert result.requirements_analysis["component_type"] == "Button"
+
+
+@pytest.mark.asyncio
+async def test_two_call_mode_still_available():
+    """Прежний режим: текстовый анализ, затем отдельный JSON."""
+    mock_ollama = AsyncMock()
+    mock_ollama.generate.return_value = "Нужна кнопка."
+    mock_ollama.generate_json.return_value = dict(ANALYSIS)
+
+    analyzer = create_requirements_analyzer(mock_ollama, single_call=False)
+    result = await analyzer.process(AgentState(user_input="Создай кнопку"))
+
+    assert result.requirements == "Нужна кнопка."
+    assert result.requirements_analysis == ANALYSIS
+    mock_ollama.generate.assert_called_once()
+    mock_ollama.generate_json.assert_called_once()
@@ -0,0 +1,124 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Тесты для двухуровневого кэша ответов."""
+
+import json
+
+import httpx
+import pytest
+
+from src.agents.workflow import create_workflow
+from src.services.ollama_service import OllamaService, OllamaConfig, TaskType
+from src.services.response_cache import ResponseCache
+from benchmarks.fake_ollama import FakeOllama
+
+
+@pytest.mark.asyncio
+async def test_cache_persists_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResponseCache(path=path)
+    key = ResponseCache.make_key("m", [{"role": "user", "content": "кнопка"}], {"temperature": 0})
+    await cache.set(key, "ответ")
+    cache.close()
+
+    reopened = ResponseCache(path=path)
+    assert await reopened.get(key) == "ответ"
+    assert reopened.stats["disk_hits"] == 1
+    # Второе обращение уже из памяти
+    assert await reopened.get(key) == "ответ"
+    assert reopened.stats["memory_hits"] == 1
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_cache_ttl_and_size_eviction(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"), memory_items=1, max_bytes=10)
+    await cache.set("a", "12345")
+    await cache.set("b", "12345")
+    await cache.set("c", "12345")
+    # На диске осталось не больше 10 байт - самая старая запись вытеснена
+    assert cache.stats["evictions"] >= 1
+    assert cache.snapshot()["disk_bytes"] <= 10
+
+    cache.ttl = 0
+    assert await cache.get("c") is None
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_disk_hit_does_not_write_but_counts_for_eviction(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"), memory_items=1, max_bytes=10)
+    await cache.set("a", "12345")
+    await cache.set("b", "12345")
+    changes = cache._db.total_changes
+
+    # "a" вытеснена из памяти другой записью - чтение идёт с диска без записи в базу
+    assert await cache.get("a") == "12345"
+    assert cache.stats["disk_hits"] == 1
+    assert cache._db.total_changes == changes
+
+    # Время чтения записано вместе со следующей вставкой: вытесняется "b", а не "a"
+    await cache.set("c", "12345")
+    assert await cache.get("b") is None
+    assert await cache.get("a") == "12345"
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_service_uses_cache_only_when_deterministic():
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(200, json={"message": {"role": "assistant", "content": "ok"}, "done": True})
+
+    service = OllamaService(OllamaConfig(temperature=0), transport=httpx.MockTransport(handler))
+    for _ in range(3):
+        assert await service.generate("кнопка с иконкой", task_type=TaskType.CODE_GENERATION) == "ok"
+    assert calls == 1
+    assert service.cache_stats()["memory_hits"] == 2
+    await service.close()
+
+    # При temperature > 0 кэш обходится, если вызывающий не согласился явно
+    service = OllamaService(OllamaConfig(temperature=0.7), transport=httpx.MockTransport(handler))
+    await service.generate("кнопка с иконкой")
+    await service.generate("кнопка с иконкой")
+    assert calls == 3
+    assert service.cache_stats()["bypassed"] == 2
+
+    await service.generate("кнопка с иконкой", use_cache=True)
+    await service.generate("кнопка с иконкой", use_cache=True)
+    assert calls == 4
+    await service.close()
+
+
+@pytest.mark.asyncio
+async def test_repeated_run_hits_cache_with_default_settings():
+    """Повтор запроса при temperature > 0: JSON-этапы берутся из кэша, генерация кода - нет."""
+    fake = FakeOllama(review_score=9)
+    service = OllamaService(OllamaConfig(), transport=fake.transport())
+    workflow = create_workflow(service)
+    try:
+        await workflow.run("Кнопка с иконкой")
+        first = dict(fake.stage_calls)
+        await workflow.run("Кнопка с иконкой")
+    finally:
+        await service.close()
+
+    for stage in ("requirements", "design", "review"):
+        assert fake.stage_calls[stage] == first[stage]
+    assert fake.stage_calls["generation"] == first["generation"] + 1
+    assert service.cache_stats()["memory_hits"] >= 3
@@ -0,0 +1,110 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Тесты семантического кэша анализа и дизайна.
+"""
+
+import pytest
+
+from src.agents.workflow import create_workflow
+from src.services.ollama_service import OllamaConfig, OllamaService
+from src.services.semantic_cache import SemanticCache
+from src.services.vector_index import VectorIndex
+from benchmarks.fake_ollama import FakeOllama
+
+
+@pytest.mark.asyncio
+async def test_lookup_respects_threshold():
+    cache = SemanticCache(threshold=0.9)
+    await cache.add([1.0, 0.0, 0.0], "синяя кнопка", {"design": 1})
+
+    value, similarity = cache.lookup([0.95, 0.05, 0.0])
+    assert value == {"design": 1} and similarity > 0.99
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    assert cache.snapshot()["hit_rate"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_evicts_least_recently_used():
+    cache = SemanticCache(threshold=0.99, max_items=2)
+    await cache.add([1.0, 0.0, 0.0], "a", {"id": "a"})
+    await cache.add([0.0, 1.0, 0.0], "b", {"id": "b"})
+    assert cache.lookup([1.0, 0.0, 0.0]) is not None  # "a" использована недавно
+    await cache.add([0.0, 0.0, 1.0], "c", {"id": "c"})
+
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    assert cache.lookup([1.0, 0.0, 0.0])[0] == {"id": "a"}
+    assert cache.snapshot()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_persists_to_disk(tmp_path):
+    path = str(tmp_path / "semantic.npz")
+    cache = SemanticCache(path=path, model="nomic-embed-text")
+    await cache.add([0.6, 0.8], "кнопка", {"design": "Button"})
+    await cache.close()
+
+    reopened = SemanticCache(path=path, model="nomic-embed-text")
+    assert reopened.lookup([0.6, 0.8])[0] == {"design": "Button"}
+    # Векторы другой модели несравнимы - кэш начинается пустым
+    assert SemanticCache(path=path, model="other-embed").snapshot()["items"] == 0
+
+
+@pytest.mark.asyncio
+async def test_saves_in_batches(tmp_path):
+    """Файл перезаписывается раз в save_every вставок, остаток - при закрытии."""
+    path = str(tmp_path / "semantic.npz")
+    cache = SemanticCache(path=path, threshold=0.99, save_every=3, save_interval=3600)
+    for i in range(7):
+        await cache.add([1.0, float(i)], f"запрос {i}", {"i": i})
+    assert cache.index.saves == 2
+
+    await cache.close()
+    await cache.close()
+    assert cache.index.saves == 3
+    assert SemanticCache(path=path).snapshot()["items"] == 7
+
+
+def test_index_grows_and_removes_without_losing_rows():
+    index = VectorIndex(max_items=100)
+    for i in range(150):
+        index.add([1.0, i / 150], {"i": i}, key=f"k{i % 120}")
+
+    # Ключи k0..k29 перезаписаны, вытеснены давно не использованные записи
+    assert len(index) == 100
+    assert index.get("k0")["i"] == 120 and index.get("k5")["i"] == 125
+    for i in range(50, 150):
+        entry, similarity = index.search([1.0, i / 150])[0]
+        assert entry["i"] == i and similarity == pytest.approx(1.0)
+
+
+@pytest.mark.asyncio
+async def test_similar_request_skips_analysis_and_design():
+    """Перефразированный запрос начинается с генерации кода."""
+    fake = FakeOllama()
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    workflow = create_workflow(service, semantic_cache=SemanticCache(threshold=0.9))
+
+    first = await workflow.run("Синяя кнопка с иконкой")
+    second = await workflow.run("Кнопка с иконкой, синяя")
+    await service.close()
+
+    assert first["semantic_cache"] is None
+    assert second["semantic_cache"]["matched_input"] == "Синяя кнопка с иконкой"
+    assert second["design"] == first["design"]
+    assert second["code"] is not None
+    assert fake.stage_calls["requirements"] == 1
+    assert fake.stage_calls["design"] == 1
+    assert workflow.semantic_cache.snapshot()["hits"] == 1
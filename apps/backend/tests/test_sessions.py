@@ -0,0 +1,114 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Тесты сессий уточнений: выбор маршрута, повторное использование состояния,
+вытеснение и WebSocket-эндпоинт.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.agents.schemas import AgentState
+from src.agents.sessions import (
+    REFINE_FULL, REFINE_PATCH, REFINE_REDESIGN, create_session_manager, route_follow_up,
+)
+from src.agents.workflow import create_workflow
+from src.services.ollama_service import OllamaConfig, OllamaService
+from benchmarks.fake_ollama import FakeOllama
+
+
+def create_sessions(fake: FakeOllama, **kwargs):
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    return service, create_session_manager(create_workflow(service), **kwargs)
+
+
+def test_route_follow_up():
+    done = AgentState(user_input="Кнопка", generated_code="export const Button = () => null;")
+    assert route_follow_up("Сделай кнопку круглой", None) == REFINE_FULL
+    assert route_follow_up("Сделай кнопку круглой", done) == REFINE_PATCH
+    assert route_follow_up("Добавь проп size", done) == REFINE_REDESIGN
+    assert route_follow_up("Создай карточку товара", done) == REFINE_FULL
+
+
+@pytest.mark.asyncio
+async def test_follow_up_reuses_state_and_runs_only_patch():
+    fake = FakeOllama(review_score=9)
+    service, sessions = create_sessions(fake)
+    try:
+        session = sessions.open()
+        first = await sessions.handle(session, "Создай кнопку")
+        assert first["session"]["route"] == REFINE_FULL
+        calls = dict(fake.stage_calls)
+
+        second = await sessions.handle(session, "Сделай кнопку круглой")
+        assert second["session"] == {"id": session.id, "route": REFINE_PATCH, "turn": 2}
+        assert 'type="button"' in second["code"]["content"]
+        # Ни анализа, ни дизайна, ни LLM-ревью - одна правка кода
+        new_calls = {stage: count - calls.get(stage, 0) for stage, count in fake.stage_calls.items()}
+        assert {stage: count for stage, count in new_calls.items() if count} == {"patch": 1}
+        assert session.state.conversation_history == [{"role": "user", "content": "Сделай кнопку круглой"}]
+
+        third = await sessions.handle(sessions.open(session.id), "Добавь проп size")
+        assert third["session"]["route"] == REFINE_REDESIGN
+        assert fake.stage_calls["design"] == calls["design"] + 1
+        assert sessions.snapshot()["routes"] == {REFINE_FULL: 1, REFINE_REDESIGN: 1, REFINE_PATCH: 1}
+    finally:
+        await service.close()
+
+
+@pytest.mark.asyncio
+async def test_sessions_evicted_by_idle_timeout_and_memory_cap():
+    now = [0.0]
+    fake = FakeOllama(review_score=9)
+    service, sessions = create_sessions(fake, max_sessions=2, idle_timeout=60)
+    sessions._clock = lambda: now[0]
+    try:
+        first, second, third = (sessions.open() for _ in range(3))
+        await sessions.handle(second, "Создай кнопку")
+        now[0] = 100
+        await sessions.handle(third, "Создай кнопку")
+        # Лимит - две сессии: вытеснена самая давняя
+        assert [s.id for s in sessions._sessions.values()] == [second.id, third.id]
+        assert sessions.stats["evicted_memory"] == 1
+
+        now[0] = 150
+        assert sessions.open(third.id) is third
+        assert list(sessions._sessions) == [third.id]
+        assert sessions.stats["evicted_idle"] == 1
+    finally:
+        await service.close()
+
+
+def test_session_websocket_streams_events():
+    fake = FakeOllama(review_score=9)
+    with TestClient(app) as client:
+        service, sessions = create_sessions(fake)
+        app.state.sessions = sessions
+        with client.websocket_connect("/api/ai/sessions/ws") as websocket:
+            session_id = websocket.receive_json()["session_id"]
+            websocket.send_text("не json")
+            assert websocket.receive_json()["event"] == "error"
+            websocket.send_bytes(b"\x00")
+            assert websocket.receive_json()["event"] == "error"
+            for prompt, route in (("Создай кнопку", REFINE_FULL), ("Сделай кнопку круглой", REFINE_PATCH)):
+                websocket.send_json({"prompt": prompt})
+                events = []
+                while not events or events[-1]["event"] not in ("result", "error"):
+                    events.append(websocket.receive_json())
+                assert events[-1]["event"] == "result"
+                assert events[-1]["data"]["session"]["route"] == route
+                assert any(event["event"] == "stage_start" for event in events)
+        assert sessions.open(session_id).turns == 2
@@ -0,0 +1,116 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Тесты статической проверки TSX перед LLM-ревью.
+"""
+
+import pytest
+
+from src.agents.static_review import (
+    VERDICT_LLM_REVIEW,
+    VERDICT_REGENERATE,
+    VERDICT_SKIP_LLM,
+    analyze_tsx,
+    check_brackets,
+)
+from src.agents.workflow import create_workflow
+from src.services.ollama_service import OllamaConfig, OllamaService
+from benchmarks.fake_ollama import CANNED_CODE, FakeOllama
+
+DESIGN = {"name": "Button", "props": {"children": {"type": "ReactNode"}}}
+
+
+def test_clean_component_can_skip_llm():
+    review = analyze_tsx(CANNED_CODE, DESIGN)
+    assert review.verdict == VERDICT_SKIP_LLM
+    assert review.component_name == "Button"
+    assert review.issues == []
+
+
+def test_brackets_ignore_strings_templates_and_jsx_text():
+    code = "const C = () => <p className={`p-2 ${a ? '(' : `b${c}`}`}>Don't {'}'}</p>;"
+    assert check_brackets(code) == []
+    assert check_brackets("const C = () => (<p>{x</p>);")
+
+
+@pytest.mark.parametrize("code", [
+    "Извините, я не могу сгенерировать этот компонент.",
+    CANNED_CODE.replace("({ children }) => (", "({ children } => ("),
+    CANNED_CODE.replace("export const Button", "const Button").replace("export default Button;", ""),
+])
+def test_broken_code_goes_to_regeneration(code):
+    assert analyze_tsx(code, DESIGN).verdict == VERDICT_REGENERATE
+
+
+WRAPPED = """import React, { forwardRef, memo } from 'react';
+
+interface ButtonProps { children?: React.ReactNode }
+
+const Button = ({ children }: ButtonProps) => <button className="px-4 py-2">{children}</button>;
+
+"""
+
+
+@pytest.mark.parametrize("export, name", [
+    ("export default memo(Button);", "Button"),
+    ("export default React.memo(Button);", "Button"),
+    ("export default withStyles(styles)(Button);", "Button"),
+    ("export default forwardRef<HTMLButtonElement, ButtonProps>(function FancyButton(props, ref) { return null; });", "FancyButton"),
+    ("export default forwardRef<HTMLButtonElement, ButtonProps>((props, ref) => <Button {...props} />);", None),
+    ("export default forwardRef((props, ref) => null);", None),
+])
+def test_wrapped_default_export_is_an_export(export, name):
+    """memo/forwardRef и прочие обёртки в export default не отправляют код на перегенерацию."""
+    review = analyze_tsx(WRAPPED + export, DESIGN)
+    assert review.verdict != VERDICT_REGENERATE
+    assert review.component_name == name
+
+
+def test_markdown_is_stripped():
+    review = analyze_tsx("Вот компонент:\n```tsx\n" + CANNED_CODE + "```\nГотово!", DESIGN)
+    assert review.verdict == VERDICT_SKIP_LLM
+    assert review.cleaned_code.strip() == CANNED_CODE.strip()
+
+
+def test_missing_design_props_need_llm_review():
+    design = {"props": {"children": {}, "variant": {}}}
+    review = analyze_tsx(CANNED_CODE, design)
+    assert review.verdict == VERDICT_LLM_REVIEW
+    assert "variant" in review.issues[0].description
+
+
+def test_tailwind_conflicts():
+    code = CANNED_CODE.replace('"px-4 py-2 rounded', '"px-4 px-2 md:px-6 py-2 mt-4px rounded')
+    descriptions = [issue.description for issue in analyze_tsx(code, DESIGN).issues]
+    assert any("px-4 и px-2" in d for d in descriptions)
+    assert any("mt-4px" in d for d in descriptions)
+    assert not any("md:px-6" in d for d in descriptions)
+
+
+@pytest.mark.asyncio
+async def test_workflow_skips_llm_review_for_clean_code():
+    """С чистой проверкой ревьюер не вызывается; экономия видна в статистике."""
+    fake = FakeOllama()
+    service = OllamaService(OllamaConfig(cache_enabled=False), transport=fake.transport())
+    workflow = create_workflow(service)
+    workflow.static_reviewer.skip_llm = True
+
+    result = await workflow.run("Кнопка")
+    await service.close()
+
+    assert "review" not in fake.stage_calls
+    assert result["review"]["source"] == "static"
+    assert result["code"]["component_name"] == "Button"
+    assert workflow.static_reviewer.snapshot()["llm_calls_saved"] == 1
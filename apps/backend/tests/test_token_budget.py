@@ -0,0 +1,72 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Тесты бюджета токенов: компактная сериализация контекста, num_predict по
+этапам и num_ctx, который растёт вместе с промптом, но не уменьшается.
+"""
+
+import json
+
+from src.agents.base import shared_context
+from src.agents.schemas import AgentState
+from src.services.ollama_service import OllamaConfig, OllamaService, TaskType
+from src.services.token_budget import CONTEXT_TOKENS_SAVED, TokenBudget, compact_json, estimate_tokens
+
+
+def test_compact_json_prunes_empty_fields():
+    data = {"b": [], "a": {"x": None, "y": "", "z": [1, {}]}, "c": "текст", "d": 0, "e": False}
+    assert compact_json(data) == '{"a":{"z":[1]},"c":"текст","d":0,"e":false}'
+
+
+def test_shared_context_is_smaller_than_indented_json():
+    analysis = {"component_type": "button", "props": ["label", "onClick"], "issues": [], "notes": None}
+    state = AgentState(user_input="Кнопка", requirements_analysis=analysis)
+    saved_before = CONTEXT_TOKENS_SAVED.value()
+    context = shared_context(state)
+    assert '"issues"' not in context and "\n " not in context
+    # Экономия считается против repr словаря, который раньше шёл в промпт
+    assert CONTEXT_TOKENS_SAVED.value() - saved_before == estimate_tokens(str(analysis)) - estimate_tokens(compact_json(analysis))
+    indented = json.dumps(analysis, ensure_ascii=False, sort_keys=True, indent=1)
+    assert estimate_tokens(context) < estimate_tokens("Запрос пользователя: Кнопка\n\nТребования:\n" + indented)
+
+
+def test_budget_grows_context_and_trims_prediction():
+    budget = TokenBudget({"code_review": 512}, default_predict=2000, min_ctx=2048, max_ctx=4096)
+    small = [{"role": "user", "content": "a" * 400}]
+    assert budget.plan("m", "code_review", small) == {"num_predict": 512, "num_ctx": 2048}
+
+    large = [{"role": "user", "content": "a" * 12000}]  # ~3000 токенов
+    plan = budget.plan("m", "code_generation", large)
+    assert plan["num_ctx"] == 4096
+    assert plan["num_predict"] == 4096 - budget.estimate_messages(large)
+
+    # Меньший промпт не уменьшает num_ctx: иначе Ollama перезапустит раннер модели
+    assert budget.plan("m", "code_review", small)["num_ctx"] == 4096
+    assert budget.snapshot()["context_growths"] == 1 and budget.stats["predict_trimmed"] == 1
+
+
+def test_payload_budget_per_stage_keeps_cache_key():
+    service = OllamaService(OllamaConfig(cache_enabled=True, temperature=0))
+    review = service._build_payload("Проверь код", TaskType.CODE_REVIEW, None, stream=False)
+    code = service._build_payload("Сгенерируй", TaskType.CODE_GENERATION, None, stream=False)
+    assert review["options"]["num_predict"] == 1024
+    assert code["options"]["num_predict"] == 2000
+    assert review["options"]["num_ctx"] >= 2048
+
+    key = service._cache_key(review, None)
+    service._build_payload("x" * 30000, TaskType.CODE_REVIEW, None, stream=False)
+    grown = service._build_payload("Проверь код", TaskType.CODE_REVIEW, None, stream=False)
+    assert grown["options"]["num_ctx"] > review["options"]["num_ctx"]
+    assert service._cache_key(grown, None) == key
@@ -0,0 +1,57 @@
+# Copyright 2026 ToriYv, SofochkaSofia
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Тесты дельт состояния графа: узлы возвращают только изменённые поля.
+"""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from src.agents.schemas import AgentState, merge_state
+from src.agents.workflow import MultiAgentWorkflow
+
+
+def test_merge_state_accumulates_errors():
+    state = {"errors": ["первая"], "generated_code": "old"}
+    merged = merge_state(state, {"errors": ["вторая"], "generated_code": "new"})
+
+    assert merged == {"errors": ["первая", "вторая"], "generated_code": "new"}
+    # Исходное состояние не изменяется
+    assert state["errors"] == ["первая"]
+
+
+@pytest.mark.asyncio
+async def test_stage_returns_only_changed_fields():
+    """Узел отдаёт только поля, изменённые агентом, и только новые ошибки."""
+    workflow = MultiAgentWorkflow(AsyncMock())
+    state = AgentState(user_input="Кнопка", errors=["старая"], generated_code="x" * 10_000).model_dump()
+
+    class Reviewer:
+        async def process(self, agent_state):
+            agent_state.code_review = {"quality_score": 8}
+            agent_state.code_reviewed = True
+            agent_state.errors.append("новая")
+            return agent_state
+
+    update = await workflow._run_stage("review_code", Reviewer(), state)
+
+    assert update == {
+        "code_review": {"quality_score": 8},
+        "code_reviewed": True,
+        "current_stage": "review_code",
+        "errors": ["новая"],
+    }
+    # Состояние графа не изменено агентом напрямую
+    assert state["errors"] == ["старая"]